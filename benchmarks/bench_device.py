@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import environment
+import benchmark
+from fs20.device import DeviceRegistry
+from fs20.device import Dimmer
+from fs20.device import Switch
+
+DIMMER = Dimmer('1234-1234-1111')
+SUPPRESSED = Dimmer('1234-1234-1112', suppression=3600)
+SUPPRESSED.on()
+
+REGISTRY = DeviceRegistry()
+for i in range(10000):
+    REGISTRY.add(chr(i >> 8) + chr(i & 0xff) + '\x00', [Dimmer, Switch][i % 2], status=i % 101)
+
+
+def resolve():
+    for i in range(1000):
+        DIMMER.on
+        DIMMER.dim_brightness_level_8_in_time
+
+def on():
+    DIMMER.on()
+
+def on_suppressed():
+    SUPPRESSED.on()
+
+def dim_in_time():
+    DIMMER.dim_brightness_level_8_in_time(time_string='00:01:4.0')
+
+
+def registry_get():
+    for i in range(1000):
+        REGISTRY.get('\x12\x34\x00')
+
+def registry_select():
+    REGISTRY.select(Dimmer, minimum=51)
+
+
+def get_benchmarks():
+    return [ ('device.Dimmer method resolution', resolve, 2000)
+           , ('device.Dimmer.on() simulated', on, 1)
+           , ('device.Dimmer.on() suppressed', on_suppressed, 1)
+           , ('device.Dimmer.dim_..._in_time() simulated', dim_in_time, 1)
+           , ('device.DeviceRegistry.get() 10000 devices', registry_get, 1000)
+           , ('device.DeviceRegistry.select() 10000 devices', registry_select, 1)
+           ]
+
+
+if __name__ == '__main__':
+    benchmark.main(get_benchmarks())
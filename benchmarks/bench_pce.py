@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+import random
+
+import environment
+import benchmark
+from fs20 import command
+from fs20 import util
+from fs20.device import Dimmer
+from fs20.pce import Receiver
+from fs20.pce import Response
+
+random.seed(0)
+ADDRESSES = random.sample(range(2**24), 10000)
+FRAMES = 1000
+
+
+# Returns the given responses (like fs20.pce.PCE) and stops the receiver with the last one,
+# so a pass never runs into the pause after a failed read.
+class FramePCE:
+
+    def __init__(self, receiver, responses):
+        self._receiver = receiver
+        self._responses = responses
+
+    def get_response(self, timeout=100):
+        self._position += 1
+        if self._position == len(self._responses):
+            self._receiver.receiving = False
+        return self._responses[self._position - 1]
+
+    def reset(self):
+        self._position = 0
+        self._receiver.receiving = True
+
+
+def callback(response):
+    pass
+
+# Returns a receiver with the given number of address callbacks and a catchall callback.
+def get_receiver(callbacks):
+    receiver = Receiver()
+    responses = []
+    for address in ADDRESSES[0:callbacks]:
+        address = util.byte_to_address(chr(address >> 16) + chr(address >> 8 & 0xff) + chr(address & 0xff))
+        receiver.add_callback(callback, address=address, command=command.ON)
+        if len(responses) < FRAMES:
+            frame = []
+            for part in address.split('-'):
+                frame.extend([int(part[0]) << 4 | int(part[1]), int(part[2]) << 4 | int(part[3])])
+            responses.append(Response(array('B', frame + [0x16, 0, 0, 0, 22])))
+    receiver.add_callback(callback)
+    responses = (responses * FRAMES)[0:FRAMES]
+    receiver.pce = FramePCE(receiver, responses)
+    return receiver
+
+def dispatch(receiver):
+    receiver.pce.reset()
+    receiver.run()
+
+
+def get_benchmarks():
+    benchmarks = []
+    for callbacks in [1, 100, 10000]:
+        receiver = get_receiver(callbacks)
+        benchmarks.append(( 'pce.Receiver.run() %i callbacks' % (callbacks)
+                          , lambda receiver=receiver: dispatch(receiver)
+                          , FRAMES
+                         ))
+    receiver = get_receiver(10000)
+    receiver.mirror([Dimmer(util.byte_to_address(chr(address >> 16) + chr(address >> 8 & 0xff) + chr(address & 0xff))) for address in ADDRESSES])
+    benchmarks.append(( 'pce.Receiver.run() 10000 callbacks, mirrored'
+                      , lambda receiver=receiver: dispatch(receiver)
+                      , FRAMES
+                     ))
+    return benchmarks
+
+
+if __name__ == '__main__':
+    benchmark.main(get_benchmarks())
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import environment
+import benchmark
+from fs20 import command
+from fs20.pcs import PCS
+
+PCS_ = PCS()
+
+
+def get_dataframe_once():
+    for i in range(1000):
+        PCS_.get_dataframe('\x1b\x1b\x00', command.ON)
+
+def get_dataframe_multiple():
+    for i in range(1000):
+        PCS_.get_dataframe('\x1b\x1b\x00', command.DIM_UP, '\x00', 10)
+
+def send_once():
+    PCS_.send_once('\x1b\x1b\x00', command.ON)
+
+
+def get_benchmarks():
+    return [ ('pcs.PCS.get_dataframe() once', get_dataframe_once, 1000)
+           , ('pcs.PCS.get_dataframe() multiple', get_dataframe_multiple, 1000)
+           , ('pcs.PCS.send_once() simulated', send_once, 1)
+           ]
+
+
+if __name__ == '__main__':
+    benchmark.main(get_benchmarks())
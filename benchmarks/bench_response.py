@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+
+import environment
+import benchmark
+from fs20.pce import Response
+
+FRAMES = [ array('B', [17, 17, 17, 17, 17, 17, 22, 0, 0, 0, 22])
+         , array('B', [18, 52, 18, 52, 17, 17, 4, 20, 145, 82, 22])
+         , array('B', [68, 68, 33, 33, 17, 68, 0, 0, 0, 0, 22])
+         , array('B', [19, 20, 19, 20, 65, 65, 49, 16, 0, 36, 22])
+         ]
+
+
+def decode():
+    for frame in FRAMES:
+        Response(frame)
+
+def decode_format():
+    for frame in FRAMES:
+        str(Response(frame))
+
+
+def get_benchmarks():
+    return [ ('pce.Response()', decode, len(FRAMES))
+           , ('pce.Response() + str()', decode_format, len(FRAMES))
+           ]
+
+
+if __name__ == '__main__':
+    benchmark.main(get_benchmarks())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import random
+
+import environment
+import benchmark
+from fs20 import util
+
+random.seed(0)
+BUFFER = ''.join([chr(random.randrange(256)) for i in range(3 * 10000)])
+ADDRESSES = [util.byte_to_address(BUFFER[i:i + 3]) for i in range(0, len(BUFFER), 3)]
+SECONDS = [random.uniform(0, 15360) for i in range(10000)]
+TIME_STRINGS = [ '%02i:%02i:%06.3f' % (seconds // 3600, seconds % 3600 // 60, seconds % 60)
+                 for seconds in SECONDS
+               ]
+
+
+def address_to_byte():
+    for address in ADDRESSES:
+        util.address_to_byte(address)
+
+def byte_to_address():
+    for i in range(0, len(BUFFER), 3):
+        util.byte_to_address(BUFFER[i:i + 3])
+
+def addresses_to_bytes():
+    util.addresses_to_bytes(ADDRESSES)
+
+def addresses_to_bytes_python():
+    numpy, util.numpy = util.numpy, None
+    try:
+        util.addresses_to_bytes(ADDRESSES)
+    finally:
+        util.numpy = numpy
+
+def bytes_to_addresses():
+    util.bytes_to_addresses(BUFFER)
+
+def bytes_to_addresses_python():
+    numpy, util.numpy = util.numpy, None
+    try:
+        util.bytes_to_addresses(BUFFER)
+    finally:
+        util.numpy = numpy
+
+def time_string_to_byte():
+    for time_string in TIME_STRINGS:
+        util.time_string_to_byte(time_string)
+
+def time_string_to_byte_default():
+    for time_string in TIME_STRINGS:
+        util.time_string_to_byte('00:00:0.0')
+
+def time_to_byte():
+    for seconds in SECONDS:
+        util.time_to_byte(seconds)
+
+
+def get_benchmarks():
+    benchmarks = [ ('util.address_to_byte()', address_to_byte, len(ADDRESSES))
+                 , ('util.byte_to_address()', byte_to_address, len(ADDRESSES))
+                 , ('util.addresses_to_bytes()', addresses_to_bytes, len(ADDRESSES))
+                 , ('util.bytes_to_addresses()', bytes_to_addresses, len(ADDRESSES))
+                 , ('util.time_string_to_byte()', time_string_to_byte, len(TIME_STRINGS))
+                 , ('util.time_string_to_byte() default', time_string_to_byte_default, len(TIME_STRINGS))
+                 , ('util.time_to_byte() seconds', time_to_byte, len(SECONDS))
+                 ]
+    if util.numpy is not None:
+        benchmarks += [ ('util.addresses_to_bytes() without NumPy', addresses_to_bytes_python, len(ADDRESSES))
+                      , ('util.bytes_to_addresses() without NumPy', bytes_to_addresses_python, len(ADDRESSES))
+                      ]
+    return benchmarks
+
+
+if __name__ == '__main__':
+    benchmark.main(get_benchmarks())
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function
+
+import json
+import platform
+import sys
+import time
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# Minimum duration of a single measurement (seconds).
+MIN_TIME = 0.2
+
+# Number of measurements, the fastest one is used.
+REPEAT = 5
+
+
+def measure(function, ops=1):
+    """
+    Measures the given function.
+
+    Args:
+        function: A callable without arguments.
+        ops: Integer value of operations a single call of the function does.
+
+    Returns:
+        >>> measure(lambda: None)
+        {'ops_per_sec': 12345678.9, 'peak_bytes': 0}
+    """
+    number = 1
+    while True:
+        seconds = timeit.timeit(function, number=number)
+        if MIN_TIME <= seconds:
+            break
+        number *= 10 if seconds < MIN_TIME / 10 else 2
+    seconds = min(timeit.repeat(function, number=number, repeat=REPEAT))
+    peak_bytes = None
+    if tracemalloc is not None:
+        # Peak of traced memory while calling the function once.
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        function()
+        peak_bytes = tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+    return { 'ops_per_sec': ops * number / seconds
+           , 'peak_bytes': peak_bytes
+           }
+
+def run(benchmarks, previous=None):
+    """
+    Runs the given benchmarks and prints the results.
+
+    Args:
+        benchmarks: A list of tuples (name, function, ops), see measure().
+        previous: A dictionary which holds the results of a former run (see main()).
+
+    Returns:
+        >>> run([('noop', lambda: None, 1)])
+        {'noop': {'ops_per_sec': 12345678.9, 'peak_bytes': 0}}
+    """
+    results = {}
+    for name, function, ops in benchmarks:
+        result = measure(function, ops)
+        results[name] = result
+        line = '%-45s %14.0f ops/s' % (name, result['ops_per_sec'])
+        if result['peak_bytes'] is not None:
+            line += ' %10i bytes peak' % (result['peak_bytes'])
+        if previous and name in previous:
+            line += ' %+7.1f%%' % (100.0 * (result['ops_per_sec'] / previous[name]['ops_per_sec'] - 1))
+        print(line)
+        sys.stdout.flush()
+    return results
+
+def main(benchmarks):
+    """
+    Runs the given benchmarks with the command line arguments.
+
+    Usage:
+        python <benchmark>.py [--output results.json] [--compare previous.json]
+
+    Args:
+        benchmarks: A list of tuples (name, function, ops), see measure().
+    """
+    output = None
+    previous = None
+    arguments = sys.argv[1:]
+    while arguments:
+        argument = arguments.pop(0)
+        if '--output' == argument and arguments:
+            output = arguments.pop(0)
+        elif '--compare' == argument and arguments:
+            with open(arguments.pop(0)) as file:
+                previous = json.load(file)['results']
+        else:
+            sys.exit('Usage: %s [--output results.json] [--compare previous.json]' % (sys.argv[0]))
+    results = run(benchmarks, previous)
+    if output is not None:
+        with open(output, 'w') as file:
+            json.dump( { 'machine': platform.machine()
+                       , 'platform': platform.platform()
+                       , 'python': platform.python_version()
+                       , 'results': results
+                       , 'time': time.strftime('%Y-%m-%dT%H:%M:%S')
+                       }
+                     , file
+                     , indent=2
+                     , sort_keys=True
+                     )
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Drives fs20.pce.Receiver and fs20.pcs.PCS through the simulator: sensors fire
+# at a fixed rate, an automation switches one actuator for each event and every
+# n-th event fans out a scene to further actuators.
+#
+# Usage:
+#     python load.py [--devices 500] [--rate 50,100,200] [--duration 10] [--output load.json]
+
+from __future__ import print_function
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import threading
+import time
+
+import environment
+from fs20 import command
+from fs20 import util
+from fs20.pce import Executor
+from fs20.pce import Receiver
+from fs20.simulator import Simulator
+from fs20.transmitter import AirtimeBudget
+from fs20.transmitter import Transmitter
+
+# Seconds to wait for outstanding events after the last one was sent.
+DRAIN_TIME = 5.0
+
+# Seconds an automation waits for the acknowledgement of FS20 PCS.
+ACK_TIMEOUT = 10.0
+
+
+# Returns the given percentile of the sorted values (in milliseconds).
+def percentile(values, percent):
+    if not values:
+        return None
+    return 1000.0 * values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+class Load:
+
+    def __init__(self, options):
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        # Send time of the event each sensor has on the air (one at most).
+        self._outstanding = {}
+        self.acks = []
+        self.errors = 0
+        self.events = []
+        self.lost = 0
+        self.options = options
+        # Sensors and actuators get separate house codes.
+        self.sensors = [chr(i >> 8) + chr(i & 0xff) + '\x00' for i in range(options.devices)]
+        self.actuators = [chr(i >> 8 | 0x80) + chr(i & 0xff) + '\x00' for i in range(options.devices)]
+        self.addresses = util.bytes_to_addresses(''.join(self.sensors))
+        self.index = dict([(sensor, i) for i, sensor in enumerate(self.sensors)])
+
+    # Automation: switches the actuator of the sensor, every n-th event switches a scene.
+    def react(self, response):
+        now = time.time()
+        with self._lock:
+            sent = self._outstanding.pop(response.raw_address, None)
+        if sent is None:
+            return
+        self.events.append(now - sent)
+        i = self.index[response.raw_address]
+        handles = [(time.time(), self.transmitter.send_once(self.actuators[i], command.ON))]
+        if self.options.scene_every and 0 == next(self._counter) % self.options.scene_every:
+            for j in range(1, self.options.scene_size + 1):
+                actuator = self.actuators[(i + j) % len(self.actuators)]
+                handles.append((time.time(), self.transmitter.send_once(actuator, command.OFF)))
+        for start, handle in handles:
+            try:
+                handle.result(ACK_TIMEOUT)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                continue
+            if not handle.superseded:
+                self.acks.append(time.time() - start)
+
+    # Sends the events round robin, so each sensor has a single event on the air.
+    def generate(self, rate):
+        count = int(self.options.duration * rate)
+        start = time.time()
+        for k in range(count):
+            delay = start + k / float(rate) - time.time()
+            if 0 < delay:
+                time.sleep(delay)
+            i = k % len(self.sensors)
+            with self._lock:
+                if self.sensors[i] in self._outstanding:
+                    self.lost += 1
+                self._outstanding[self.sensors[i]] = time.time()
+            if not self.simulator.send(self.addresses[i], command.ON):
+                with self._lock:
+                    self._outstanding.pop(self.sensors[i], None)
+        return count, time.time() - start
+
+    def run(self, rate):
+        self.simulator = Simulator(latency=self.options.latency, buffer_size=self.options.buffer_size)
+        self.simulator.install()
+        executor = Executor(self.options.workers, self.options.queue_size, self.options.overflow)
+        receiver = Receiver(timeout=100, executor=executor)
+        for address in self.addresses:
+            receiver.add_callback(self.react, address=address, command=command.ON)
+        budget = None
+        if self.options.duty_cycle:
+            budget = AirtimeBudget()
+        self.transmitter = Transmitter(budget=budget)
+        receiver.start()
+        start = time.time()
+        count, elapsed = self.generate(rate)
+        deadline = time.time() + DRAIN_TIME
+        while self._outstanding and time.time() < deadline:
+            time.sleep(0.01)
+        receiver.stop()
+        receiver.join()
+        executor.shutdown()
+        self.transmitter.close()
+        elapsed_total = time.time() - start
+        with self._lock:
+            self.lost += len(self._outstanding)
+            self._outstanding.clear()
+        self.acks.sort()
+        self.events.sort()
+        return { 'ack_ms': [percentile(self.acks, percent) for percent in (50, 99, 99.9)]
+               , 'commands_per_sec': len(self.acks) / elapsed_total
+               , 'dropped_executor': executor.dropped
+               , 'dropped_pce': self.simulator.dropped
+               , 'errors': self.errors + executor.failed
+               , 'event_ms': [percentile(self.events, percent) for percent in (50, 99, 99.9)]
+               , 'events_per_sec': len(self.events) / elapsed_total
+               , 'lost': self.lost
+               , 'offered_per_sec': count / elapsed
+               , 'rate': rate
+               , 'superseded': self.transmitter.superseded
+               }
+
+
+# Formats three latencies (milliseconds).
+def format_latencies(values):
+    return '/'.join(['-' if value is None else '%.1f' % (value) for value in values])
+
+
+def get_options():
+    parser = argparse.ArgumentParser(description='Load harness for FS20 PCE and FS20 PCS (simulated).')
+    parser.add_argument('--devices', type=int, default=500, help='number of sensors and actuators each')
+    parser.add_argument('--rate', default='100', help='events per second (comma separated to sweep)')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to send events per rate')
+    parser.add_argument('--scene-every', type=int, default=50, help='every n-th event switches a scene (0 disables scenes)')
+    parser.add_argument('--scene-size', type=int, default=8, help='actuators of a scene')
+    parser.add_argument('--workers', type=int, default=4, help='workers of fs20.pce.Executor')
+    parser.add_argument('--queue-size', type=int, default=100, help='queue size of each worker')
+    parser.add_argument('--overflow', default='drop_oldest', help='overflow policy of fs20.pce.Executor')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds on the air (simulated)')
+    parser.add_argument('--buffer-size', type=int, default=1024, help='frames FS20 PCE holds at most (simulated)')
+    parser.add_argument('--duty-cycle', action='store_true', help='pace commands by fs20.transmitter.AirtimeBudget')
+    parser.add_argument('--output', help='write the results to a JSON file')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    options = get_options()
+    results = []
+    print('%8s %10s %10s %10s %22s %22s %8s %8s %8s'
+          % ('rate', 'offered/s', 'events/s', 'commands/s', 'event p50/p99/p999 ms', 'ack p50/p99/p999 ms', 'dropped', 'lost', 'errors'))
+    for rate in [float(rate) for rate in options.rate.split(',')]:
+        result = Load(options).run(rate)
+        results.append(result)
+        print('%8.0f %10.1f %10.1f %10.1f %22s %22s %8i %8i %8i'
+              % ( rate
+                , result['offered_per_sec']
+                , result['events_per_sec']
+                , result['commands_per_sec']
+                , format_latencies(result['event_ms'])
+                , format_latencies(result['ack_ms'])
+                , result['dropped_pce'] + result['dropped_executor']
+                , result['lost']
+                , result['errors']
+                ))
+        sys.stdout.flush()
+    if options.output is not None:
+        with open(options.output, 'w') as file:
+            json.dump( { 'machine': platform.machine()
+                       , 'options': vars(options)
+                       , 'platform': platform.platform()
+                       , 'python': platform.python_version()
+                       , 'results': results
+                       , 'time': time.strftime('%Y-%m-%dT%H:%M:%S')
+                       }
+                     , file
+                     , indent=2
+                     , sort_keys=True
+                     )
@@ -0,0 +1,15 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import glob
+import os.path
+
+import benchmark
+
+if __name__ == '__main__':
+    benchmarks = []
+    for i in sorted(glob.glob('bench_*.py')):
+        module = __import__(os.path.splitext(i)[0])
+        if hasattr(module, 'get_benchmarks'):
+            benchmarks.extend(module.get_benchmarks())
+    benchmark.main(benchmarks)
@@ -25,21 +25,39 @@ PyFS20 - Control all your FS20 devices easily with Python!
 
 This package exports the following modules and subpackages:
 
-    command - Holds all possible FS20 commands
-    device  - Abstraction layer for FS20 devices
-    pce     - Handler for device FS20 PCE (receiver)
-    pcs     - Handler for device FS20 PCS (transmitter)
-    util    - Utility module
+    command     - Holds all possible FS20 commands
+    connection  - Persistent USB connections to FS20 devices
+    device      - Abstraction layer for FS20 devices
+    pce         - Handler for device FS20 PCE (receiver)
+    pcs         - Handler for device FS20 PCS (transmitter)
+    state       - Persistent device state in a memory-mapped file
+    stats       - Latency histograms and counters of all I/O
+    trace       - Tracing hooks around all sends and receives
+    transmitter - Queued transmitting of commands via FS20 PCS
+    util        - Utility module
+
+The module "simulator" (loopback simulation of FS20 PCS and FS20 PCE, POSIX
+only) is not imported by default, use "import fs20.simulator" explicitly.
 """
 
 __all__ = ['command',
+           'connection',
            'device',
            'pce',
            'pcs',
+           'state',
+           'stats',
+           'trace',
+           'transmitter',
            'util']
 
 import fs20.command as command
+import fs20.connection as connection
 import fs20.device as device
 import fs20.pce as pce
 import fs20.pcs as pcs
+import fs20.state as state
+import fs20.stats as stats
+import fs20.trace as trace
+import fs20.transmitter as transmitter
 import fs20.util as util
\ No newline at end of file
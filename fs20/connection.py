@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2013 Daniel Prokscha
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import errno
+import threading
+
+import usb.core
+import usb.util
+
+from fs20 import stats
+
+# Module which finds USB devices (see set_backend()).
+_backend = usb.core
+
+# Holds all shared connections (key is a tuple of vendor and product ID).
+_connections = {}
+_connections_lock = threading.Lock()
+
+
+class Connection:
+    """
+    Handles a persistent USB connection to a FS20 device.
+
+    Attributes:
+        bus: Integer value of the USB bus the device was found on (or "None" if never found).
+        device: Holds the opened usb.core.Device instance (or "None" if not opened), see set_backend().
+        id_product: Integer value of the USB product ID.
+        id_vendor: Integer value of the USB vendor ID.
+        lock: Reentrant lock which guards opening and closing of the device.
+        port_numbers: Tuple of USB port numbers the device was found on (or "None" if never found).
+    """
+
+    def __init__(self, id_vendor, id_product):
+        """
+        Initializes the connection instance.
+
+        Args:
+            id_vendor: Integer value of the USB vendor ID.
+            id_product: Integer value of the USB product ID.
+        """
+        self.bus = None
+        self.device = None
+        self.id_product = id_product
+        self.id_vendor = id_vendor
+        self.lock = threading.RLock()
+        self.port_numbers = None
+
+    def _find(self):
+        """
+        Searches the device within a single enumeration (the last known bus and port path is preferred).
+
+        Returns:
+            >>> self._find()
+            <usb.core.Device object>
+            >>> self._find()
+            None
+        """
+        candidates = []
+        def match(device):
+            if self.bus is not None and self._is_known_path(device):
+                return True
+            candidates.append(device)
+            return False
+        device = _backend.find( idVendor=self.id_vendor
+                              , idProduct=self.id_product
+                              , custom_match=match
+                              )
+        if device is None and candidates:
+            device = candidates[0]
+        return device
+
+    def _is_known_path(self, device):
+        """
+        Returns TRUE if the given device is connected to the last known bus and port path.
+
+        Args:
+            device: A usb.core.Device instance.
+
+        Returns:
+            >>> self._is_known_path(device)
+            True
+        """
+        return ( device.bus == self.bus
+             and getattr(device, 'port_numbers', None) == self.port_numbers
+               )
+
+    def close(self):
+        """
+        Releases the device, the next call of get_device() opens it again.
+        """
+        with self.lock:
+            if self.device is not None:
+                try:
+                    usb.util.dispose_resources(self.device)
+                except Exception:
+                    pass
+                self.device = None
+
+    def get_device(self):
+        """
+        Returns the opened device (opens it once if necessary).
+
+        Returns:
+            >>> self.get_device()
+            <usb.core.Device object>
+            >>> self.get_device()
+            None
+        """
+        device = self.device
+        if device is not None:
+            return device
+        with self.lock:
+            if self.device is None:
+                start = stats.enabled and stats.clock()
+                device = self._find()
+                if start:
+                    stats.observe('connection.find', stats.clock() - start)
+                if device is None:
+                    return None
+                # Set configuration if there is no active one.
+                try:
+                    device.get_active_configuration()
+                except Exception:
+                    device.set_configuration()
+                # Force I/O if device seems to be busy.
+                try:
+                    device.detach_kernel_driver(0)
+                except Exception:
+                    pass
+                self.bus = device.bus
+                self.port_numbers = getattr(device, 'port_numbers', None)
+                self.device = device
+            return self.device
+
+    def handle_error(self, error):
+        """
+        Closes the device after an I/O error (timeouts keep the device opened).
+
+        Args:
+            error: The exception which was raised while doing I/O.
+
+        Returns:
+            >>> self.handle_error(usb.core.USBError('Pipe error'))
+            True
+            >>> self.handle_error(usb.core.USBError('Operation timed out', errno=110))
+            False
+        """
+        if is_timeout(error):
+            return False
+        self.close()
+        return True
+
+
+def get_connection(id_vendor, id_product):
+    """
+    Returns the shared connection for the given USB device ID.
+
+    Args:
+        id_vendor: Integer value of the USB vendor ID.
+        id_product: Integer value of the USB product ID.
+
+    Returns:
+        >>> get_connection(0x18ef, 0xe015)
+        <fs20.connection.Connection instance>
+    """
+    key = (id_vendor, id_product)
+    with _connections_lock:
+        if key not in _connections:
+            _connections[key] = Connection(id_vendor, id_product)
+        return _connections[key]
+
+def is_timeout(error):
+    """
+    Returns TRUE if the given exception is a USB timeout.
+
+    Args:
+        error: An exception instance.
+
+    Returns:
+        >>> is_timeout(usb.core.USBError('Operation timed out', errno=110))
+        True
+    """
+    return ( isinstance(error, usb.core.USBError)
+         and getattr(error, 'errno', None) == errno.ETIMEDOUT
+           )
+
+def set_backend(backend=None):
+    """
+    Sets the module which finds USB devices, all opened devices are closed.
+
+    Args:
+        backend: An object with a find() function like usb.core (defaults to usb.core), e.g. fs20.simulator.Simulator.
+
+    Example:
+        >>> set_backend(fs20.simulator.Simulator())
+    """
+    global _backend
+    with _connections_lock:
+        _backend = backend or usb.core
+        for connection in _connections.values():
+            connection.close()
+            connection.bus = None
+            connection.port_numbers = None
@@ -20,29 +20,122 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+from array import array
+from bisect import bisect_left
 from functools import partial
+try:
+    from itertools import izip
+except ImportError:
+    izip = zip
+import time as _time
 
 from fs20 import command
 from fs20 import pcs
+from fs20 import stats
+from fs20 import transmitter as _transmitter
 from fs20 import util
 
+# Maximum number of cached data frames per device (the cache is cleared when it is full).
+FRAME_CACHE_SIZE = 64
 
-class Device:
+# Status value of fs20.device.DeviceRegistry which represents an unknown status.
+STATUS_UNKNOWN = 0xff
+
+# Default deviation (percent) of a transition from its target, half a brightness level.
+TRANSITION_TOLERANCE = 100 / 32.0
+
+
+def _compile_command(name, command, status):
+    """
+    Returns a method which executes the given command (see Device.callable()).
+
+    Args:
+        name: String which represents the command name.
+        command: Byte string which represents a fully qualified command.
+        status: The new device status (brightness level 0-100 or "None" for unknown).
+
+    Returns:
+        >>> _compile_command('on', '\x10', 100)
+        <function on>
+    """
+    def method(self, time_string='00:00:0.0', interval=1):
+        return self.callable(command, status, time_string, interval)
+    method.__name__ = name
+    method.__doc__ = 'Executes the command "%s" (see callable()).' % (name)
+    method.compiled = True
+    return method
+
+def _get_key(address):
+    """
+    Returns the integer key of the given address (see DeviceRegistry).
+
+    Args:
+        address: A string which represents a fully qualified address or a byte string of 3 bytes.
+
+    Returns:
+        >>> _get_key('1234-1234-1111')
+        1776384
+        >>> _get_key('\x1b\x1b\x00')
+        1776384
+
+    Raises:
+        InvalidInput: If the given address is invalid.
+    """
+    if not 3 == len(address):
+        address = util.address_to_byte(address)
+    return ord(address[0]) << 16 | ord(address[1]) << 8 | ord(address[2])
+
+
+class DeviceType(type):
+    """
+    Metaclass which compiles the callables of a device class into methods.
+
+    Methods which are defined explicitly are never overwritten. The status
+    each command results in is collected into "statuses" (see
+    fs20.pce.Receiver.mirror()).
+    """
+
+    def __init__(cls, name, bases, attributes):
+        """
+        Initializes the device class.
+        """
+        super(DeviceType, cls).__init__(name, bases, attributes)
+        cls.statuses = {}
+        for command_name, definition in cls.callables.items():
+            cls.statuses[definition['command']] = definition['status']
+            method = getattr(cls, command_name, None)
+            if method is None or getattr(method, 'compiled', False):
+                setattr( cls
+                       , command_name
+                       , _compile_command( command_name
+                                         , definition['command']
+                                         , definition['status']
+                                         )
+                       )
+
+
+class Device(object):
     """
     Abstract class for device abstraction layers.
 
     Attributes:
         address: A string which represents a fully qualified address.
-        callables: A dictionary which holds all callable commands of the device.
+        callables: A dictionary which holds all callable commands of the device (compiled into methods, see DeviceType).
         blocked: Is set to TRUE it the device is blocked.
         status: Holds the current device status (brightness level 0-100 or "None" for unknown).
+        statuses: A dictionary which holds the resulting device status of each command of the callables (see DeviceType).
+        suppressed: Integer value of commands which were not sent, because the device already had the status (see suppression).
+        suppression: Float value of seconds a known status is trusted to suppress commands (or "None" to always send).
     """
 
+    __metaclass__ = DeviceType
+
     callables = {}
 
     def __getattr__(self, name):
         """
-        Returns a callable for the given command name.
+        Returns a callable for the given command name (only used for commands
+        which are not compiled, e.g. if the callables are changed later on).
 
         Args:
             name: String which represents the command name.
@@ -52,8 +145,11 @@ class Device:
             <type 'instancemethod'>
 
         Raises:
+            AttributeError: If a special method name (e.g. "__hash__") is given.
             UnknownCommand: If the given command name does not exists.
         """
+        if name.startswith('__'):
+            raise AttributeError(name)
         if name in self.callables:
             return partial( self.callable
                           , command=self.callables[name]['command']
@@ -61,22 +157,39 @@ class Device:
                           )
         raise UnknownCommand('Command "%s" does not exists.' % (name))
 
-    def __init__(self, address = '1111-1111-1111'):
+    def __init__(self, address = '1111-1111-1111', transmitter=None, state=None, suppression=None):
         """
         Initializes device instance.
 
         Args:
             address: A string which represents a fully qualified address (defaults to "1111-1111-1111").
+            transmitter: A fs20.pcs.PCS or fs20.transmitter.Transmitter instance (defaults to the shared one, see fs20.pcs.get_pcs()).
+            state: A fs20.state.StateFile instance which keeps status and blocked flag across restarts (a stored state is restored).
+            suppression: Float value of seconds a known status is trusted to suppress commands (defaults to "None" which always sends).
         """
-        self._pcs = pcs.PCS()
+        self._blocked = False
+        self._frames = {}
+        self._pcs = transmitter or pcs.get_pcs()
+        self._state = state
+        self._status = 0
+        # Time of the last status update (restored or initial status is never trusted).
+        self._updated = 0.0
         self.address = util.address_to_byte(address)
-        self.blocked = False
-        self.status = 0
+        self.suppressed = 0
+        self.suppression = suppression
+        if state is not None:
+            stored = state.get(self.address)
+            if stored is not None:
+                self._status, self._blocked = stored
 
     def callable(self, command='\x00', status=None, time_string='00:00:0.0', interval=1):
         """
         Executes the command and returns the new device status on success.
 
+        With suppression, a state command (see fs20.transmitter.STATE_COMMANDS)
+        is not sent if the device already has the resulting status and the
+        status was updated within the suppression window.
+
         Args:
             command: Byte string which represents a fully qualified command.
             status: The new device status (brightness level 0-100 or "None" for unknown).
@@ -92,21 +205,71 @@ class Device:
         """
         if self.blocked:
             raise DeviceBlocked('Device is currently blocked.')
-        if interval is 1:
-            response = self._pcs.send_once( address=self.address
-                                          , command=command
-                                          , time=util.time_string_to_byte(time_string)
-                                          )
-        else:
-            response = self._pcs.send_multiple( address=self.address
-                                              , command=command
-                                              , time=util.time_string_to_byte(time_string)
-                                              , interval=interval
-                                              )
+        if ( self.suppression is not None
+         and status is not None
+         and 1 == interval
+         and status == self.status
+         and command in _transmitter.STATE_COMMANDS
+         and _time.time() - self._updated < self.suppression
+           ):
+            self.suppressed += 1
+            if stats.enabled:
+                stats.increment('device.suppressed')
+            return status
+        key = (self.address, command, time_string, interval)
+        frames = self._frames
+        dataframe = frames.get(key)
+        if dataframe is None:
+            dataframe = self.get_dataframe(command, time_string, interval)
+            if FRAME_CACHE_SIZE <= len(frames):
+                frames.clear()
+            frames[key] = dataframe
+        response = self._pcs.send_dataframe(dataframe)
         if pcs.RESPONSE_OK == response:
             self.status = status
+        elif response is None:
+            # Queued or superseded by fs20.transmitter.Transmitter, the status is not known yet.
+            self.status = None
         return self.status
 
+    def get_dataframe(self, command='\x00', time_string='00:00:0.0', interval=1):
+        """
+        Returns the data frame of FS20 PCS for the given command (see fs20.pcs.PCS.get_dataframe()).
+
+        Args:
+            command: Byte string which represents a fully qualified command.
+            time_string: A time string like "%H:%M:%S.%f" (between 0ms and 4h 16m).
+            interval: Interval between 1 and 255 how often the command should be sent.
+
+        Returns:
+            >>> self.get_dataframe('\x10')
+            '\x01\x06\xf1\x00\x00\x00\x10\x00'
+        """
+        time = util.time_string_to_byte(time_string)
+        if 1 == interval:
+            return self._pcs.get_dataframe(self.address, command, time)
+        return self._pcs.get_dataframe(self.address, command, time, interval)
+
+    def _get_blocked(self):
+        return self._blocked
+
+    def _get_status(self):
+        return self._status
+
+    def _set_blocked(self, blocked):
+        if self._state is not None:
+            self._state.set(self.address, self._status, blocked)
+        self._blocked = blocked
+
+    def _set_status(self, status):
+        if self._state is not None:
+            self._state.set(self.address, status, self._blocked)
+        self._status = status
+        self._updated = _time.time()
+
+    blocked = property(_get_blocked, _set_blocked, doc='Is set to TRUE it the device is blocked.')
+    status = property(_get_status, _set_status, doc='Holds the current device status (brightness level 0-100 or "None" for unknown).')
+
 
 class Dimmer(Device):
     """
@@ -114,9 +277,7 @@ class Dimmer(Device):
     """
 
     callables = {
-        """
-        Single byte commands.
-        """
+        # Single byte commands.
         'change_internal_timer': {
             'command': command.CHANGE_INTERNAL_TIMER,
             'status': None
@@ -241,9 +402,7 @@ class Dimmer(Device):
             'command': command.TOGGLE,
             'status': None
         },
-        """
-        Commands with additional byte.
-        """
+        # Commands with additional byte.
         'dim_brightness_level_1_in_time': {
             'command': command.DIM_BRIGHTNESS_LEVEL_1_IN_TIME,
             'status': 6
@@ -366,6 +525,75 @@ class Dimmer(Device):
         }
     }
 
+    def get_transition(self, percent, duration=0, tolerance=TRANSITION_TOLERANCE):
+        """
+        Returns the commands which move the dimmer to the given brightness level within the given duration.
+
+        All state commands of the callables (see fs20.transmitter.STATE_COMMANDS)
+        which reach the target within the tolerance are candidates, a duration
+        requires a command with time byte. The command which comes closest to
+        the target wins, the airtime only decides between equally close ones.
+        Nothing is sent if the dimmer is known to be at the target already (the
+        status was updated by a command, see Device.callable()).
+
+        Args:
+            percent: Integer value of the brightness level (0-100).
+            duration: Seconds, a timedelta object or a time string like "%H:%M:%S.%f" (between 0ms and 4h 16m).
+            tolerance: Float value of percent the resulting brightness level may differ from the target.
+
+        Returns:
+            >>> self.get_transition(50)
+            [('\x08', 50, '00:00:0.000')]
+            >>> self.get_transition(50, 10)
+            [('\x28', 50, '00:00:10.000')]
+
+        Raises:
+            InvalidInput: If the brightness level or the duration is out of range.
+        """
+        if not 0 <= percent <= 100:
+            raise util.InvalidInput('Only brightness levels between 0 and 100 are supported.')
+        time = util.time_to_byte(duration)
+        if ( self.status is not None
+         and self._updated
+         and abs(self.status - percent) <= tolerance
+           ):
+            return []
+        candidates = []
+        for command, status in self.statuses.items():
+            if ( status is None
+              or command not in _transmitter.STATE_COMMANDS
+              or abs(status - percent) > tolerance
+              or ('\x00' != time and not ord(command) & 0x20)
+               ):
+                continue
+            airtime = _transmitter.get_airtime(self.address, command, time)
+            candidates.append((abs(status - percent), airtime, command, status))
+        if not candidates:
+            raise util.InvalidInput('No command reaches the brightness level within the tolerance.')
+        deviation, airtime, command, status = min(candidates)
+        return [(command, status, util.byte_to_time_string(time))]
+
+    def transition_to(self, percent, duration=0, tolerance=TRANSITION_TOLERANCE):
+        """
+        Moves the dimmer to the given brightness level within the given duration (see get_transition()).
+
+        Args:
+            percent: Integer value of the brightness level (0-100).
+            duration: Seconds, a timedelta object or a time string like "%H:%M:%S.%f" (between 0ms and 4h 16m).
+            tolerance: Float value of percent the resulting brightness level may differ from the target.
+
+        Returns:
+            >>> self.transition_to(50, 10)
+            50
+
+        Raises:
+            DeviceBlocked: If the device is currently blocked.
+            InvalidInput: If the brightness level or the duration is out of range.
+        """
+        for command, status, time_string in self.get_transition(percent, duration, tolerance):
+            self.callable(command, status, time_string)
+        return self.status
+
 
 class Switch(Device):
     """
@@ -373,9 +601,7 @@ class Switch(Device):
     """
 
     callables = {
-        """
-        Single byte commands.
-        """
+        # Single byte commands.
         'change_internal_timer': {
             'command': command.CHANGE_INTERNAL_TIMER,
             'status': None
@@ -424,9 +650,7 @@ class Switch(Device):
             'command': command.TOGGLE,
             'status': None
         },
-        """
-        Commands with additional byte.
-        """
+        # Commands with additional byte.
         'off_for_time_then_last_brightness_level': {
             'command': command.OFF_FOR_TIME_THEN_LAST_BRIGHTNESS_LEVEL,
             'status': 100
@@ -454,10 +678,504 @@ class Switch(Device):
     }
 
 
+class DeviceGroup:
+    """
+    Sends commands to many devices with as few frames as possible.
+
+    FS20 devices can learn function group ("xxxx-xxxx-44xx"), local master
+    ("xxxx-xxxx-xx44") and global master ("xxxx-xxxx-4444") addresses. A single
+    frame to such an address switches all devices which learned it. Please
+    note that all devices which learned a group or master address have to be
+    added, otherwise devices which are not known would be switched too.
+
+    Attributes:
+        devices: A list which holds all added devices.
+        learned: A dictionary which holds all devices (value) of each learned group or master address (key).
+    """
+
+    def __init__(self, transmitter=None):
+        """
+        Initializes the device group instance.
+
+        Args:
+            transmitter: A fs20.pcs.PCS or fs20.transmitter.Transmitter instance (defaults to the shared one, see fs20.pcs.get_pcs()).
+        """
+        self._pcs = transmitter or pcs.get_pcs()
+        self.devices = []
+        self.learned = {}
+
+    def add(self, device, *addresses):
+        """
+        Adds a device and the group or master addresses it has learned.
+
+        Args:
+            device: A fs20.device.Device instance.
+            addresses: Strings which represent fully qualified group or master addresses.
+
+        Raises:
+            InvalidInput: If a given address is invalid or not a group or master address.
+        """
+        learned = []
+        for address in addresses:
+            address = util.address_to_byte(address)
+            if not ( util.is_function_group_address(address)
+                  or util.is_local_master_address(address)
+                  or util.is_global_master_address(address)
+                   ):
+                raise util.InvalidInput('Group or master address expected (e.g. "1234-1234-4411").')
+            learned.append(address)
+        if device not in self.devices:
+            self.devices.append(device)
+        for address in learned:
+            if address not in self.learned:
+                self.learned[address] = []
+            if device not in self.learned[address]:
+                self.learned[address].append(device)
+
+    def compile(self, devices):
+        """
+        Returns the fewest addresses which reach exactly the given devices.
+
+        Group and master addresses are only used if all devices which learned
+        them should be reached, all other devices are reached by their own
+        address.
+
+        Args:
+            devices: A sequence of fs20.device.Device instances.
+
+        Returns:
+            >>> self.compile([dimmer_1, dimmer_2, switch])
+            [('\x1b\x1b\xf0', [dimmer_1, dimmer_2]), ('\x1b\x1b\x05', [switch])]
+        """
+        targets = set(devices)
+        candidates = []
+        for address, members in sorted(self.learned.items()):
+            if targets.issuperset(members):
+                candidates.append((address, members))
+        frames = []
+        uncovered = set(targets)
+        while True:
+            best = None
+            for address, members in candidates:
+                count = len(uncovered.intersection(members))
+                if 2 <= count and (best is None or count > best[0]):
+                    best = (count, address, members)
+            if best is None:
+                break
+            frames.append((best[1], list(best[2])))
+            uncovered.difference_update(best[2])
+        for device in devices:
+            if device in uncovered:
+                frames.append((device.address, [device]))
+                uncovered.remove(device)
+        return frames
+
+    def execute(self, devices, name, time_string='00:00:0.0', interval=1):
+        """
+        Executes the given command for all given devices and updates their status on success.
+
+        Blocked devices are left out (group and master addresses they learned can't be used then).
+
+        Args:
+            devices: A sequence of fs20.device.Device instances.
+            name: String which represents the command name (e.g. "off").
+            time_string: A time string like "%H:%M:%S.%f" (between 0ms and 4h 16m).
+            interval: Interval between 1 and 255 how often the command should be sent.
+
+        Returns:
+            >>> self.execute([dimmer_1, dimmer_2, switch], 'off')
+            [0, 0]
+
+        Raises:
+            UnknownCommand: If the given command name does not exists for one of the devices.
+        """
+        devices = [device for device in devices if not device.blocked]
+        for device in devices:
+            if name not in device.callables:
+                raise UnknownCommand('Command "%s" does not exists.' % (name))
+        time = util.time_string_to_byte(time_string)
+        commands = {}
+        frames = []
+        for address, members in self.compile(devices):
+            # Devices with different commands for the same name can't share a frame.
+            command = members[0].callables[name]['command']
+            if [member for member in members if member.callables[name]['command'] != command]:
+                for member in members:
+                    frames.append((member.address, [member]))
+            else:
+                frames.append((address, members))
+        batch = []
+        for address, members in frames:
+            if 1 == interval:
+                batch.append((address, members[0].callables[name]['command'], time))
+            else:
+                batch.append((address, members[0].callables[name]['command'], time, interval))
+        results = self._pcs.send_batch(batch)
+        for (address, members), result in zip(frames, results):
+            if pcs.RESPONSE_OK == result:
+                for member in members:
+                    member.status = member.callables[name]['status']
+        return results
+
+
+class DeviceRegistry:
+    """
+    Compact registry of many devices.
+
+    Address, type, status and blocked flag of all devices are kept in parallel
+    arrays sorted by address (a few bytes per device instead of a Python
+    object), devices are handed out as views on demand (see DeviceView).
+
+    Attributes:
+        state: Holds the fs20.state.StateFile instance (or "None" if the state is not kept across restarts).
+        suppressed: Integer value of commands of all views which were not sent (see fs20.device.Device.suppression).
+        suppression: Float value of seconds a known status is trusted to suppress commands of views (or "None" to always send).
+        transmitter: Holds the fs20.pcs.PCS (or fs20.transmitter.Transmitter) instance used by all views.
+        types: A list which holds all registered device types (e.g. fs20.device.Dimmer).
+    """
+
+    def __init__(self, transmitter=None, state=None, suppression=None):
+        """
+        Initializes the registry instance.
+
+        Args:
+            transmitter: A fs20.pcs.PCS or fs20.transmitter.Transmitter instance (defaults to the shared one, see fs20.pcs.get_pcs()).
+            state: A fs20.state.StateFile instance which keeps status and blocked flags across restarts.
+            suppression: Float value of seconds a known status is trusted to suppress commands of views (defaults to "None").
+        """
+        self._addresses = array('L')
+        self._blocked = array('B')
+        # Cached data frames of each device by address key (see Device.callable()).
+        self._frames = {}
+        self._kinds = array('B')
+        self._status = array('B')
+        self._updated = array('d')
+        self._view_types = []
+        self.state = state
+        self.suppressed = 0
+        self.suppression = suppression
+        self.transmitter = transmitter or pcs.get_pcs()
+        self.types = []
+
+    def __contains__(self, address):
+        """
+        Returns TRUE if a device with the given address is registered.
+
+        Args:
+            address: A string which represents a fully qualified address or a byte string of 3 bytes.
+        """
+        return -1 != self._find(_get_key(address))
+
+    def __iter__(self):
+        """
+        Returns an iterator over views of all devices (ordered by address).
+        """
+        return iter([self._get_view(i) for i in range(len(self._addresses))])
+
+    def __len__(self):
+        """
+        Returns the number of registered devices.
+        """
+        return len(self._addresses)
+
+    def _find(self, key):
+        """
+        Returns the index of the device with the given key (or -1 if it is not registered).
+
+        Args:
+            key: Integer key of the address (see _get_key()).
+
+        Returns:
+            >>> self._find(1776384)
+            0
+        """
+        i = bisect_left(self._addresses, key)
+        if i < len(self._addresses) and key == self._addresses[i]:
+            return i
+        return -1
+
+    def _get_index(self, key):
+        """
+        Returns the index of the device with the given key.
+
+        Args:
+            key: Integer key of the address (see _get_key()).
+
+        Returns:
+            >>> self._get_index(1776384)
+            0
+
+        Raises:
+            DeviceNotRegistered: If no device with the given key is registered.
+        """
+        i = self._find(key)
+        if -1 == i:
+            raise DeviceNotRegistered('Device is not registered.')
+        return i
+
+    def _get_view(self, i):
+        """
+        Returns a view of the device with the given index.
+
+        Args:
+            i: Integer index of the device within the arrays.
+
+        Returns:
+            >>> self._get_view(0)
+            <fs20.device.DimmerView object>
+        """
+        return self._view_types[self._kinds[i]](self, self._addresses[i])
+
+    def _select_numpy(self, kinds, low, high, blocked):
+        """
+        Same as the selection of select(), but with NumPy.
+
+        Args:
+            kinds: A set of integer indexes of the device types.
+            low: Integer value of the lowest status.
+            high: Integer value of the highest status (STATUS_UNKNOWN includes unknown status).
+            blocked: Boolean value of the blocked flag (or "None" for any).
+
+        Returns:
+            >>> self._select_numpy(set([0]), 51, 100, None)
+            [0, 3]
+        """
+        numpy = util.numpy
+        status = numpy.frombuffer(self._status, dtype=numpy.uint8)
+        mask = (low <= status) & (status <= high)
+        if len(kinds) < len(self.types):
+            mask &= numpy.in1d(numpy.frombuffer(self._kinds, dtype=numpy.uint8), list(kinds))
+        if blocked is not None:
+            mask &= numpy.frombuffer(self._blocked, dtype=numpy.uint8) == int(bool(blocked))
+        return numpy.flatnonzero(mask).tolist()
+
+    def add(self, address, device_type=None, status=0, blocked=False):
+        """
+        Registers a device and returns its view.
+
+        With a state file, the stored status and blocked flag of the device
+        are restored (the given ones are used for devices without stored state).
+
+        Args:
+            address: A string which represents a fully qualified address or a byte string of 3 bytes.
+            device_type: A subclass of fs20.device.Device (defaults to fs20.device.Switch).
+            status: The device status (brightness level 0-100 or "None" for unknown).
+            blocked: Boolean value whether the device is blocked.
+
+        Returns:
+            >>> self.add('1234-1234-1111', Dimmer)
+            <fs20.device.DimmerView object>
+
+        Raises:
+            InvalidInput: If the address, type or status is invalid or the address is already registered.
+        """
+        device_type = device_type or Switch
+        if not isinstance(device_type, type) or not issubclass(device_type, Device):
+            raise util.InvalidInput('Invalid device type given (subclass of fs20.device.Device expected).')
+        key = _get_key(address)
+        i = bisect_left(self._addresses, key)
+        if i < len(self._addresses) and key == self._addresses[i]:
+            raise util.InvalidInput('Address is already registered.')
+        if device_type not in self.types:
+            if STATUS_UNKNOWN <= len(self.types):
+                raise util.InvalidInput('Too many device types registered.')
+            self.types.append(device_type)
+            self._view_types.append(type(device_type.__name__ + 'View', (DeviceView, device_type), {}))
+        self._addresses.insert(i, key)
+        self._blocked.insert(i, int(bool(blocked)))
+        self._kinds.insert(i, self.types.index(device_type))
+        self._status.insert(i, 0)
+        self._updated.insert(i, 0.0)
+        view = self._get_view(i)
+        if self.state is not None:
+            stored = self.state.get(view.address)
+            if stored is not None:
+                status, blocked = stored
+        try:
+            view.status = status
+            view.blocked = blocked
+        except util.InvalidInput:
+            self.remove(address)
+            raise
+        # Like a device, the initial status is never trusted (see fs20.device.Device.suppression).
+        self._updated[i] = 0.0
+        return view
+
+    def get(self, address):
+        """
+        Returns the view of the device with the given address (e.g. the address of a received command).
+
+        Args:
+            address: A string which represents a fully qualified address or a byte string of 3 bytes.
+
+        Returns:
+            >>> self.get('\x1b\x1b\x00')
+            <fs20.device.DimmerView object>
+            >>> self.get('1234-1234-4444')
+            None
+        """
+        i = self._find(_get_key(address))
+        if -1 == i:
+            return None
+        return self._get_view(i)
+
+    def remove(self, address):
+        """
+        Removes the device with the given address (views of the device can't be used anymore).
+
+        Args:
+            address: A string which represents a fully qualified address or a byte string of 3 bytes.
+
+        Raises:
+            DeviceNotRegistered: If no device with the given address is registered.
+        """
+        key = _get_key(address)
+        i = self._get_index(key)
+        for values in (self._addresses, self._blocked, self._kinds, self._status, self._updated):
+            del values[i]
+        self._frames.pop(key, None)
+
+    def select(self, device_type=None, minimum=None, maximum=None, blocked=None):
+        """
+        Returns views of all devices which match all given conditions (ordered by address).
+
+        Large registries are queried with NumPy (if installed).
+
+        Args:
+            device_type: A subclass of fs20.device.Device (subclasses match too).
+            minimum: Integer value of the lowest status (devices with unknown status never match a status range).
+            maximum: Integer value of the highest status.
+            blocked: Boolean value of the blocked flag.
+
+        Returns:
+            >>> self.select(Dimmer, minimum=51)
+            [<fs20.device.DimmerView object>, <fs20.device.DimmerView object>]
+        """
+        kinds = set([ kind for kind, registered in enumerate(self.types)
+                      if device_type is None or issubclass(registered, device_type)
+                    ])
+        low = minimum or 0
+        high = 100 if maximum is None else maximum
+        if minimum is None and maximum is None:
+            high = STATUS_UNKNOWN
+        if util.numpy is not None and util.NUMPY_THRESHOLD <= len(self._addresses):
+            indexes = self._select_numpy(kinds, low, high, blocked)
+        else:
+            if blocked is not None:
+                blocked = int(bool(blocked))
+            indexes = [ i for i, (kind, status, is_blocked) in enumerate(izip(self._kinds, self._status, self._blocked))
+                        if kind in kinds and low <= status <= high and (blocked is None or blocked == is_blocked)
+                      ]
+        return [self._get_view(i) for i in indexes]
+
+
+class DeviceView(object):
+    """
+    View of a device within a fs20.device.DeviceRegistry.
+
+    For each registered device type a view type is derived (e.g. "DimmerView"
+    from fs20.device.Dimmer), so a view executes all commands of its device
+    type. Status and blocked flag are read from and written to the registry.
+
+    Attributes:
+        address: A string which represents a fully qualified address.
+    """
+
+    def __eq__(self, other):
+        """
+        Returns TRUE if the given view represents the same device.
+        """
+        return ( isinstance(other, DeviceView)
+             and self._registry is other._registry
+             and self._key == other._key
+               )
+
+    def __hash__(self):
+        """
+        Returns the hash of the represented device.
+        """
+        return hash((id(self._registry), self._key))
+
+    def __init__(self, registry, key):
+        """
+        Initializes the view instance.
+
+        Args:
+            registry: The fs20.device.DeviceRegistry instance.
+            key: Integer key of the address (see _get_key()).
+        """
+        self._key = key
+        self._pcs = registry.transmitter
+        self._registry = registry
+        self.address = chr(key >> 16) + chr(key >> 8 & 0xff) + chr(key & 0xff)
+        self.suppression = registry.suppression
+
+    def __ne__(self, other):
+        """
+        Returns TRUE if the given view represents another device.
+        """
+        return not self.__eq__(other)
+
+    def _get_blocked(self):
+        return 1 == self._registry._blocked[self._registry._get_index(self._key)]
+
+    def _get_frames(self):
+        # Each device has its own cache within the registry, so no device evicts the frames of others.
+        frames = self._registry._frames.get(self._key)
+        if frames is None:
+            frames = self._registry._frames[self._key] = {}
+        return frames
+
+    def _get_status(self):
+        status = self._registry._status[self._registry._get_index(self._key)]
+        if STATUS_UNKNOWN == status:
+            return None
+        return status
+
+    def _get_suppressed(self):
+        return self._registry.suppressed
+
+    def _get_updated(self):
+        return self._registry._updated[self._registry._get_index(self._key)]
+
+    def _set_blocked(self, blocked):
+        registry = self._registry
+        i = registry._get_index(self._key)
+        registry._blocked[i] = int(bool(blocked))
+        if registry.state is not None:
+            registry.state.set(self.address, self.status, blocked)
+
+    def _set_status(self, status):
+        registry = self._registry
+        i = registry._get_index(self._key)
+        if status is None:
+            registry._status[i] = STATUS_UNKNOWN
+        elif 0 <= status <= 100:
+            registry._status[i] = int(status)
+        else:
+            raise util.InvalidInput('Invalid status given (0-100 or "None" expected).')
+        registry._updated[i] = _time.time()
+        if registry.state is not None:
+            registry.state.set(self.address, status, 1 == registry._blocked[i])
+
+    def _set_suppressed(self, suppressed):
+        self._registry.suppressed = suppressed
+
+    _frames = property(_get_frames)
+    _updated = property(_get_updated)
+    blocked = property(_get_blocked, _set_blocked, doc='Is set to TRUE it the device is blocked.')
+    status = property(_get_status, _set_status, doc='Holds the current device status (brightness level 0-100 or "None" for unknown).')
+    suppressed = property(_get_suppressed, _set_suppressed, doc='Integer value of suppressed commands of all views of the registry.')
+
+
 # Module exceptions.
 class DeviceBlocked(Exception):
     pass
 
 
+class DeviceNotRegistered(Exception):
+    pass
+
+
 class UnknownCommand(Exception):
     pass
\ No newline at end of file
@@ -21,14 +21,21 @@
 # THE SOFTWARE.
 
 from array import array
-from binascii import hexlify
 from time import sleep
-import hashlib
+from time import time as _time
 import threading
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
-import usb
+import usb.core
 
 from fs20 import command
+from fs20 import connection
+from fs20 import stats
+from fs20 import trace
+from fs20 import util
 
 # USB device ID of FS20 PCE.
 ID_PRODUCT = 0xe014
@@ -37,6 +44,33 @@ ID_VENDOR = 0x18ef
 # I/O endpoint.
 ENDPOINT_READ = 0x81
 
+# Seconds the receiver pauses after a failed read, doubled up to the maximum
+# as long as FS20 PCE stays unavailable (e.g. unplugged).
+RETRY_DELAY = 0.1
+RETRY_DELAY_MAX = 1.0
+
+# Overflow policies of fs20.pce.Executor (if the queue of a worker is full).
+OVERFLOW_BLOCK = 'block'
+OVERFLOW_DROP_NEWEST = 'drop_newest'
+OVERFLOW_DROP_OLDEST = 'drop_oldest'
+
+# Maps a received address byte (two digits between 1 and 4) to its four bit value.
+_ADDRESS_NIBBLES = [0] * 256
+for i in range(1, 5):
+    for j in range(1, 5):
+        _ADDRESS_NIBBLES[i << 4 | j] = (i - 1) << 2 | (j - 1)
+del i, j
+
+# Same as above, but already shifted into the high nibble.
+_ADDRESS_HIGH = [_ADDRESS_NIBBLES[i] << 4 for i in range(256)]
+
+# Maps a byte (two BCD digits) to its decimal value (invalid digits are decoded as well).
+_BCD = [(i >> 4) * 10 + (i & 0x0f) for i in range(256)]
+
+# Maps a byte to its character and its two hexadecimal digits.
+_CHARS = [chr(i) for i in range(256)]
+_HEX = ['%02x' % i for i in range(256)]
+
 
 class PCE:
     """
@@ -48,9 +82,15 @@ class PCE:
 
     version = None
 
+    def __init__(self):
+        """
+        Initializes the PCE instance (the USB connection is shared by all instances).
+        """
+        self._connection = connection.get_connection(ID_VENDOR, ID_PRODUCT)
+
     def _get_device(self):
         """
-        Returns FS20 PCE device instance.
+        Returns FS20 PCE device instance (the device is opened only once).
 
         Returns:
             >>> self._get_device()
@@ -59,26 +99,18 @@ class PCE:
         Raises:
             DeviceNotFound: If FS20 PCE is not connected or can't be found.
         """
-        device = usb.core.find(idVendor=ID_VENDOR,
-                               idProduct=ID_PRODUCT)
+        device = self._connection.get_device()
         if device is None:
             raise DeviceNotFound('FS20 PCE not found.')
-        # Set configuration if there is no active one.
-        try:
-            device.get_active_configuration()
-        except Exception:
-            device.set_configuration()
-        # Force I/O if device seems to be busy.
-        try:
-            device.detach_kernel_driver(0)
-        except Exception:
-            pass
         return device
 
-    def get_response(self):
+    def get_response(self, timeout=100):
         """
         Returns the response of FS20 PCE (after receiving commands).
 
+        Args:
+            timeout: Integer value of milliseconds to wait for a received command.
+
         Returns:
             >>> self.get_response()
             <fs20.pce.Response>
@@ -86,13 +118,34 @@ class PCE:
         Raises:
             DeviceInvalidResponse: If FS20 PCE returns an invalid response or there is none.
         """
+        start = (stats.enabled or trace.tracers) and stats.clock()
         try:
-            response = self._get_device().read(ENDPOINT_READ, 13, timeout=100)
+            response = self._get_device().read(ENDPOINT_READ, 13, timeout=timeout)
+        except usb.core.USBError as error:
+            if stats.enabled:
+                stats.increment('pce.timeouts' if connection.is_timeout(error) else 'pce.usb_errors')
+            self._connection.handle_error(error)
+            response = ''
         except Exception:
             response = ''
+        if start:
+            now = stats.clock()
+            if stats.enabled:
+                stats.observe('pce.read', now - start)
         if response[0:2] == array('B', [0x02, 0x0b]):
             PCE.version = response[12]
-            return Response(response[2:])
+            if not start:
+                return Response(response[2:])
+            frame = response
+            response = Response(frame[2:])
+            seconds = stats.clock() - now
+            if stats.enabled:
+                stats.observe('pce.decode', seconds)
+            if trace.tracers:
+                trace.after_decode(frame, response, seconds)
+            return response
+        if stats.enabled and response:
+            stats.increment('pce.invalid_responses')
         raise DeviceInvalidResponse('Invalid response from device.')
 
     def get_version(self):
@@ -122,27 +175,234 @@ class PCE:
                 break
 
 
+class Executor:
+    """
+    Calls the callbacks of received commands by a pool of worker threads.
+
+    Each worker has its own bounded queue. Responses for the same address are
+    always queued for the same worker, so they are handled in received order.
+
+    Attributes:
+        dropped: Integer value of responses which were dropped because of a full queue.
+        failed: Integer value of callbacks which raised an exception.
+        overflow: String which represents the overflow policy (see fs20.pce.OVERFLOW_*).
+    """
+
+    def __init__(self, workers=4, queue_size=100, overflow=OVERFLOW_BLOCK):
+        """
+        Initializes the executor instance and starts all workers.
+
+        Args:
+            workers: Integer value of worker threads (defaults to 4).
+            queue_size: Integer value of responses each worker can queue (defaults to 100).
+            overflow: String which represents the overflow policy (defaults to fs20.pce.OVERFLOW_BLOCK).
+
+        Raises:
+            InvalidInput: If the number of workers, the queue size or the overflow policy is invalid.
+        """
+        if not 1 <= int(workers):
+            raise InvalidInput('Invalid number of workers given (at least 1 expected).')
+        if not 1 <= int(queue_size):
+            raise InvalidInput('Invalid queue size given (at least 1 expected).')
+        if overflow not in (OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST):
+            raise InvalidInput('Invalid overflow policy given.')
+        self._lock = threading.Lock()
+        self._queues = []
+        self._workers = []
+        self.dropped = 0
+        self.failed = 0
+        self.overflow = overflow
+        for i in range(int(workers)):
+            worker_queue = queue.Queue(int(queue_size))
+            worker = threading.Thread(target=self._work, args=(worker_queue,))
+            worker.daemon = True
+            worker.start()
+            self._queues.append(worker_queue)
+            self._workers.append(worker)
+
+    def _work(self, worker_queue):
+        """
+        Calls the callbacks of queued responses until the executor is shut down.
+
+        Args:
+            worker_queue: The queue of the worker.
+        """
+        while True:
+            item = worker_queue.get()
+            if item is None:
+                break
+            response, callbacks = item
+            for callback in callbacks:
+                try:
+                    callback(response=response)
+                except Exception:
+                    with self._lock:
+                        self.failed += 1
+                    if stats.enabled:
+                        stats.increment('executor.callback_errors')
+
+    def get_queue_depth(self):
+        """
+        Returns the number of queued responses of all workers.
+
+        Returns:
+            >>> self.get_queue_depth()
+            3
+        """
+        return sum([worker_queue.qsize() for worker_queue in self._queues])
+
+    def shutdown(self, wait=True):
+        """
+        Stops all workers after they have handled their queued responses.
+
+        Args:
+            wait: Boolean value whether to wait until all workers are stopped.
+        """
+        for worker_queue in self._queues:
+            worker_queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def submit(self, response, callbacks):
+        """
+        Queues the given callbacks for the given response.
+
+        Args:
+            response: A fs20.pce.Response instance.
+            callbacks: A sequence of callables.
+        """
+        worker_queue = self._queues[hash(response.raw_address) % len(self._queues)]
+        item = (response, callbacks)
+        if OVERFLOW_BLOCK == self.overflow:
+            worker_queue.put(item)
+        elif OVERFLOW_DROP_NEWEST == self.overflow:
+            try:
+                worker_queue.put_nowait(item)
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+        else:
+            while True:
+                try:
+                    worker_queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        worker_queue.get_nowait()
+                        with self._lock:
+                            self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+
 class Receiver(threading.Thread):
     """
     Receives commands asynchronously.
 
     Attributes:
-        callbacks: A dictionary which holds a hash table with callbacks.
-        interval: Float value of seconds after which time the receiver is checking for new received commands.
+        callbacks: A dictionary which holds all callbacks by (raw address, command) ("None" is a wildcard).
+        executor: Holds the instance of fs20.pce.Executor (or "None" if callbacks are called by the receiver itself).
+        interval: Float value of seconds the receiver pauses after a read without new commands.
         pce: Holds the instance of fs20.pce.PCE.
         receiving: Boolean value is set to TRUE as long as the receiver is running.
+        timeout: Integer value of milliseconds a single read waits for new received commands.
     """
 
-    def __init__(self):
+    def __init__(self, timeout=1000, interval=0, executor=None):
         """
         Initializes the receiver instance.
+
+        By default a long running read is kept outstanding, so received commands
+        are handled the moment they arrive. A short timeout together with an
+        interval (e.g. 100 and 0.15) results in polling.
+
+        Args:
+            timeout: Integer value of milliseconds a single read waits for new received commands (defaults to 1000).
+            interval: Float value of seconds to pause after a read without new commands (defaults to 0).
+            executor: A fs20.pce.Executor instance which calls the callbacks, so slow callbacks never delay reading.
         """
         threading.Thread.__init__(self)
+        self._dispatch = {}
+        self._lock = threading.Lock()
+        self._mirror = None
         self.callbacks = {}
         self.daemon = True
-        self.interval = 0.15
+        self.executor = executor
+        self.interval = interval
         self.pce = PCE()
         self.receiving = True
+        self.timeout = timeout
+
+    def _apply(self, response):
+        """
+        Updates the status of all mirrored devices with the address of the given response (see mirror()).
+
+        Args:
+            response: A fs20.pce.Response instance.
+        """
+        mirror = self._mirror
+        if isinstance(mirror, dict):
+            devices = mirror.get(response.raw_address, ())
+        else:
+            device = mirror.get(response.raw_address)
+            devices = () if device is None else (device,)
+        for device in devices:
+            statuses = device.statuses
+            if response.command in statuses:
+                device.status = statuses[response.command]
+
+    def _compile(self, key):
+        """
+        Returns all callbacks for the given (raw address, command) in the order of their priority.
+
+        The result is stored in the dispatch index, so wildcards are resolved only once per key.
+        Callbacks can't be added or removed meanwhile, so the index never holds an outdated entry.
+
+        Args:
+            key: A tuple of raw address and command.
+
+        Returns:
+            >>> self._compile(('\x00\x00\x00', '\x10'))
+            (<function callback>,)
+        """
+        with self._lock:
+            dispatch = self._dispatch
+            if key not in dispatch:
+                dispatch[key] = self._resolve(key)
+            return dispatch[key]
+
+    def _rebuild(self):
+        """
+        Rebuilds the dispatch index (wildcards of fully qualified keys are resolved ahead).
+
+        The new index replaces the former one at once, it must be called with the lock held.
+        """
+        dispatch = {}
+        for key in self.callbacks:
+            if key[0] is not None and key[1] is not None:
+                dispatch[key] = self._resolve(key)
+        self._dispatch = dispatch
+
+    def _resolve(self, key):
+        """
+        Returns all callbacks for the given (raw address, command) in the order of their priority.
+
+        Args:
+            key: A tuple of raw address and command.
+
+        Returns:
+            >>> self._resolve(('\x00\x00\x00', '\x10'))
+            (<function callback>,)
+        """
+        address, command = key
+        callbacks = []
+        keys = []
+        for wildcard in ((address, command), (address, None), (None, command), (None, None)):
+            if wildcard not in keys:
+                keys.append(wildcard)
+                callbacks.extend(self.callbacks.get(wildcard, ()))
+        return tuple(callbacks)
 
     def add_callback(self, callback, address=None, command=None):
         """
@@ -152,31 +412,124 @@ class Receiver(threading.Thread):
             callback: A callable which is called after a command was received.
             address: String which represents a fully qualified address (callable will be only called if the response is for this address).
             command: Byte string which represents a fully qualified command (callable will be only called if the response is for this command).
+
+        Raises:
+            InvalidInput: If the given address is invalid.
         """
-        hash = hashlib.md5(str(address) + str(command)).hexdigest()
-        if hash not in self.callbacks:
-            self.callbacks[hash] = []
-        self.callbacks[hash].append(callback)
+        if address is not None:
+            address = util.address_to_byte(address)
+        key = (address, command)
+        with self._lock:
+            if key not in self.callbacks:
+                self.callbacks[key] = []
+            self.callbacks[key].append(callback)
+            # Wildcards of fully qualified keys are resolved ahead, a new wildcard
+            # may affect any key of the dispatch index.
+            if address is None or command is None:
+                self._rebuild()
+            else:
+                self._dispatch[key] = self._resolve(key)
+
+    def clear_callbacks(self):
+        """
+        Removes all callbacks from the receiver.
+        """
+        with self._lock:
+            self.callbacks = {}
+            self._dispatch = {}
+
+    def mirror(self, devices):
+        """
+        Mirrors received commands (e.g. of remote controls or wall switches) into the status of the given devices.
+
+        For each received command the device is looked up by its address, the
+        new status is taken from the callables of the device (see
+        fs20.device.Device.statuses). The status is updated before any
+        callback is called.
+
+        Args:
+            devices: A fs20.device.DeviceRegistry instance, a sequence of fs20.device.Device instances or "None" to stop mirroring.
+        """
+        if devices is None or hasattr(devices, 'select'):
+            # Registries are looked up directly, so added devices are mirrored as well.
+            self._mirror = devices
+            return
+        mirror = {}
+        for device in devices:
+            mirror.setdefault(device.address, []).append(device)
+        self._mirror = mirror
+
+    def remove_callback(self, callback, address=None, command=None):
+        """
+        Removes a callback from the receiver (see add_callback()).
+
+        Args:
+            callback: A callable which was added before.
+            address: String which represents a fully qualified address.
+            command: Byte string which represents a fully qualified command.
+
+        Raises:
+            InvalidInput: If the given address is invalid.
+        """
+        if address is not None:
+            address = util.address_to_byte(address)
+        key = (address, command)
+        with self._lock:
+            if callback in self.callbacks.get(key, ()):
+                self.callbacks[key].remove(callback)
+                if not self.callbacks[key]:
+                    del self.callbacks[key]
+                self._rebuild()
 
     def run(self):
         """
         Waits for new responses and calls the associated callables.
+
+        Back-to-back received commands are handled without any pause, the
+        receiver only pauses (see interval) after a read without new commands.
+        A read which fails before its timeout (FS20 PCE is missing or broken)
+        is retried with an increasing pause (see RETRY_DELAY).
         """
+        delay = RETRY_DELAY
         while self.receiving:
+            read = _time()
             try:
-                response = self.pce.get_response()
-                hashes = ( hashlib.md5(str(response.address) + str(response.command)).hexdigest()
-                         , hashlib.md5(str(response.address) + str(None)).hexdigest()
-                         , hashlib.md5(str(None) + str(response.command)).hexdigest()
-                         , hashlib.md5(str(None) + str(None)).hexdigest()
-                         )
-                for hash in hashes:
-                    if hash in self.callbacks:
-                        for callback in self.callbacks[hash]:
-                            callback(response=response)
+                response = self.pce.get_response(self.timeout)
             except DeviceInvalidResponse:
-                pass
-            sleep(self.interval)
+                if _time() - read < self.timeout / 2000.0:
+                    sleep(max(delay, self.interval))
+                    delay = min(delay * 2, RETRY_DELAY_MAX)
+                    continue
+                delay = RETRY_DELAY
+                if self.interval:
+                    sleep(self.interval)
+                continue
+            delay = RETRY_DELAY
+            start = (stats.enabled or trace.tracers) and stats.clock()
+            if self._mirror is not None:
+                self._apply(response)
+            key = (response.raw_address, response.command)
+            try:
+                callbacks = self._dispatch[key]
+            except KeyError:
+                callbacks = self._compile(key)
+            if self.executor is not None:
+                if callbacks:
+                    self.executor.submit(response, callbacks)
+            else:
+                for callback in callbacks:
+                    try:
+                        callback(response=response)
+                    except Exception:
+                        if stats.enabled:
+                            stats.increment('receiver.callback_errors')
+                        raise
+            if start:
+                seconds = stats.clock() - start
+                if stats.enabled:
+                    stats.observe('receiver.dispatch', seconds)
+                if trace.tracers:
+                    trace.after_dispatch(response, seconds, callbacks)
 
     def stop(self):
         """
@@ -185,15 +538,16 @@ class Receiver(threading.Thread):
         self.receiving = False
 
 
-class Response:
+class Response(object):
     """
     Handles response of FS20 PCE.
 
     Attributes:
-        address: String which represents a fully qualified address (response target).
-        command: Byte string which represents a fully qualified command.
-        commands: A dictionary which holds a hash table for command translation.
+        address: String which represents a fully qualified address (response target, formatted on first access).
+        command: Byte string which represents a fully qualified command (or "None" if unknown).
+        commands: A dictionary which holds a hash table for command translation (see _COMMANDS_WITH_TIME).
         name: String which represents the command name.
+        raw_address: Byte string which represents a fully qualified address (response target).
         response: Byte array which holds the raw response of FS20 PCE.
         time: Float value which represents the execution time for the command (seconds).
     """
@@ -521,6 +875,8 @@ class Response:
         }
     }
 
+    __slots__ = ('_address', 'command', 'name', 'raw_address', 'response', 'time')
+
     def __init__(self, response):
         """
         Initializes the response instance.
@@ -528,23 +884,43 @@ class Response:
         Args:
             reponse: Byte array which holds the raw response of FS20 PCE (see fs20.PCE.get_response()).
         """
+        self._address = None
         self.response = response
-        self.address = '%s-%s-%s' % ( hexlify(response[0:2])
-                                    , hexlify(response[2:4])
-                                    , hexlify(response[4:6])
-                                    )
-        self.name = 'UNKNOWN'
-        command = int(hexlify(response[6:7]))
-        time = hexlify(response[7:10])
-        if 1 == int(time[0]):
-            self.command = Response.commands[command]['with_time']['command']
-            self.name = Response.commands[command]['with_time']['name']
-            self.time = 0.25 * float(time[1:])
+        self.raw_address = ( _CHARS[_ADDRESS_HIGH[response[0]] | _ADDRESS_NIBBLES[response[1]]]
+                           + _CHARS[_ADDRESS_HIGH[response[2]] | _ADDRESS_NIBBLES[response[3]]]
+                           + _CHARS[_ADDRESS_HIGH[response[4]] | _ADDRESS_NIBBLES[response[5]]]
+                           )
+        flag = response[7]
+        if 0x10 == flag & 0xf0:
+            self.command, self.name = _COMMANDS_WITH_TIME[response[6]]
+            self.time = 0.25 * ( (flag & 0x0f) * 10000
+                               + _BCD[response[8]] * 100
+                               + _BCD[response[9]]
+                               )
         else:
-            self.command = Response.commands[command]['without_time']['command']
-            self.name = Response.commands[command]['without_time']['name']
+            self.command, self.name = _COMMANDS_WITHOUT_TIME[response[6]]
             self.time = None
 
+    @property
+    def address(self):
+        """
+        String which represents a fully qualified address (formatted on first access).
+
+        Returns:
+            >>> self.address
+            '1234-1234-1111'
+        """
+        if self._address is None:
+            response = self.response
+            self._address = '%s%s-%s%s-%s%s' % ( _HEX[response[0]]
+                                               , _HEX[response[1]]
+                                               , _HEX[response[2]]
+                                               , _HEX[response[3]]
+                                               , _HEX[response[4]]
+                                               , _HEX[response[5]]
+                                               )
+        return self._address
+
     def __str__(self):
         """
         Makes the response readable.
@@ -559,6 +935,18 @@ class Response:
                                                       )
 
 
+# Maps a received command byte (two BCD digits) to the translated command and name.
+_COMMANDS_WITH_TIME = [(None, 'UNKNOWN')] * 256
+_COMMANDS_WITHOUT_TIME = [(None, 'UNKNOWN')] * 256
+for i, commands in Response.commands.items():
+    _COMMANDS_WITH_TIME[(i // 10) << 4 | i % 10] = ( commands['with_time']['command']
+                                                   , commands['with_time']['name']
+                                                   )
+    _COMMANDS_WITHOUT_TIME[(i // 10) << 4 | i % 10] = ( commands['without_time']['command']
+                                                      , commands['without_time']['name']
+                                                      )
+del i, commands
+
 # Module exceptions.
 class DeviceInvalidResponse(Exception):
     pass
@@ -569,4 +957,8 @@ class DeviceMissingResponse(Exception):
 
 
 class DeviceNotFound(Exception):
+    pass
+
+
+class InvalidInput(Exception):
     pass
\ No newline at end of file
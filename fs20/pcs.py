@@ -21,8 +21,13 @@
 # THE SOFTWARE.
 
 from array import array
+import threading
 
-import usb
+import usb.core
+
+from fs20 import connection
+from fs20 import stats
+from fs20 import trace
 
 # USB device ID of FS20 PCS.
 ID_PRODUCT = 0xe015
@@ -46,15 +51,25 @@ RESPONSE_OK = 0x00
 RESPONSE_STOP_MULTIPLE_SENDING_OK = 0x04
 RESPONSE_STOP_MULTIPLE_SENDING_NOT_SENT = 0x05
 
+# Holds the shared PCS instance (see get_pcs()).
+_pcs = None
+_pcs_lock = threading.Lock()
+
 
 class PCS:
     """
     Handles I/O of FS20 PCS.
     """
 
+    def __init__(self):
+        """
+        Initializes the PCS instance (the USB connection is shared by all instances).
+        """
+        self._connection = connection.get_connection(ID_VENDOR, ID_PRODUCT)
+
     def _get_device(self):
         """
-        Returns FS20 PCS device instance.
+        Returns FS20 PCS device instance (the device is opened only once).
 
         Returns:
             >>> self._get_device()
@@ -63,20 +78,9 @@ class PCS:
         Raises:
             DeviceNotFound: If FS20 PCS is not connected or can't be found.
         """
-        device = usb.core.find(idVendor=ID_VENDOR,
-                               idProduct=ID_PRODUCT)
+        device = self._connection.get_device()
         if device is None:
             raise DeviceNotFound('FS20 PCS not found.')
-        # Set configuration if there is no active one.
-        try:
-            device.get_active_configuration()
-        except Exception:
-            device.set_configuration()
-        # Force I/O if device seems to be busy.
-        try:
-            device.detach_kernel_driver(0)
-        except Exception:
-            pass
         return device
 
     def _get_raw_address(self, address):
@@ -152,10 +156,18 @@ class PCS:
             DeviceCommandMismatch: If FS20 PCS can't handle the sent command.
             DeviceInvalidResponse: If FS20 PCS returns an invalid response.
         """
+        start = stats.enabled and stats.clock()
         try:
             response = self._get_device().read(ENDPOINT_READ, 5, timeout=500)
+        except usb.core.USBError as error:
+            if stats.enabled:
+                stats.increment('pcs.timeouts' if connection.is_timeout(error) else 'pcs.usb_errors')
+            self._connection.handle_error(error)
+            response = ''
         except Exception:
             response = ''
+        if start:
+            stats.observe('pcs.response', stats.clock() - start)
         if response[0:3] == array('B', [0x02, 0x03, 0xa0]):
             if response[3] in [RESPONSE_STOP_MULTIPLE_SENDING_OK,
                                RESPONSE_STOP_MULTIPLE_SENDING_NOT_SENT,
@@ -163,14 +175,20 @@ class PCS:
                                RESPONSE_OK]:
                 return response[3:5]
             elif RESPONSE_DATAFRAME_UNKNOWN == response[3]:
+                if stats.enabled:
+                    stats.increment('pcs.dataframe_errors')
                 raise DeviceDataframeUnknown('Unknown data frame sent to device.')
             elif RESPONSE_DATAFRAME_MISMATCH == response[3]:
+                if stats.enabled:
+                    stats.increment('pcs.dataframe_errors')
                 raise DeviceDataframeMismatch('Device can not handle data frame.')
+        if stats.enabled:
+            stats.increment('pcs.invalid_responses')
         raise DeviceInvalidResponse('Invalid response from device.')
 
-    def _write(self, dataframe, with_response=True):
+    def _transfer(self, dataframe, with_response=True):
         """
-        Writes the given data frame to FS20 PCS.
+        Writes the given data frame to FS20 PCS (without tracing, see _write()).
 
         Args:
             dataframe: Byte string which represents a fully qualified data frame.
@@ -179,11 +197,69 @@ class PCS:
         Returns:
             Depends from the given data frame.
         """
-        self._get_device().write(ENDPOINT_WRITE, dataframe)
-        if with_response:
-            return self._get_response()
+        # The write and its response are a unit, otherwise concurrent callers get each other's response.
+        with self._connection.lock:
+            start = stats.enabled and stats.clock()
+            try:
+                self._get_device().write(ENDPOINT_WRITE, dataframe)
+            except usb.core.USBError as error:
+                if stats.enabled:
+                    stats.increment('pcs.timeouts' if connection.is_timeout(error) else 'pcs.usb_errors')
+                # Reconnect once, the device may have been replugged.
+                if not self._connection.handle_error(error):
+                    raise
+                self._get_device().write(ENDPOINT_WRITE, dataframe)
+            if start:
+                stats.observe('pcs.write', stats.clock() - start)
+            if with_response:
+                return self._get_response()
         return array('B', [RESPONSE_OK, 0])
 
+    def _write(self, dataframe, with_response=True):
+        """
+        Writes the given data frame to FS20 PCS (all tracers are called, see fs20.trace).
+
+        Args:
+            dataframe: Byte string which represents a fully qualified data frame.
+            with_response: Boolean value whether to get a response from the sent command.
+
+        Returns:
+            Depends from the given data frame.
+        """
+        if trace.tracers:
+            return trace.write(self._transfer, dataframe, with_response)
+        return self._transfer(dataframe, with_response)
+
+    def get_dataframe(self, address, command, time='\x00', interval=None):
+        """
+        Returns the data frame to send the given command (once or multiple).
+
+        Args:
+            address: Byte string which represents a fully qualified address.
+            command: Byte string which represents a fully qualified command.
+            time: Byte string which represents a fully qualified time.
+            interval: Interval between 1 and 255 how often the command should be sent (or "None" to send once).
+
+        Returns:
+            >>> self.get_dataframe('\x00\x00\x00', '\x10')
+            '\x01\x06\xf1\x00\x00\x00\x10\x00'
+            >>> self.get_dataframe('\x00\x00\x00', '\x10', interval=10)
+            '\x01\x07\xf2\x00\x00\x00\x10\x00\x0a'
+
+        Raises:
+            InvalidInput: If the given address, command or interval is invalid.
+        """
+        if interval is None:
+            return ( DATAFRAME_SEND_ONCE
+                   + self._get_raw_address(address)
+                   + self._get_raw_command(command + time)
+                   )
+        return ( DATAFRAME_SEND_MULTIPLE
+               + self._get_raw_address(address)
+               + self._get_raw_command(command + time)
+               + self._get_raw_interval(interval)
+               )
+
     def get_version(self):
         """
         Returns the firmware version of FS20 PCS.
@@ -195,6 +271,59 @@ class PCS:
         version = str(self._write(DATAFRAME_VERSION)[1])
         return 'v%s.%s' % (version[0], version[1])
 
+    def send_batch(self, commands):
+        """
+        Sends the given commands in order (all data frames are validated before sending).
+
+        The device is locked for the whole batch, so no other command is sent
+        in between. Errors (invalid responses and USB errors alike) are
+        returned in place of the response of each failed command, so all
+        commands are tried and the caller knows which were sent.
+
+        Args:
+            commands: Iterable of tuples (address, command[, time[, interval]]), see get_dataframe().
+
+        Returns:
+            >>> self.send_batch([('\x00\x00\x00', '\x10'), ('\x00\x00\x01', '\x00')])
+            [0, 0]
+            >>> self.send_batch([('\x00\x00\x00', '\x10'), ('\x00\x00\x01', '\x00')])
+            [0, DeviceInvalidResponse('Invalid response from device.',)]
+            >>> self.send_batch([('\x00\x00\x00', '\x10'), ('\x00\x00\x01', '\x00')])
+            [0, DeviceNotFound('FS20 PCS not found.',)]
+
+        Raises:
+            InvalidInput: If any of the given commands is invalid (nothing is sent).
+        """
+        dataframes = [self.get_dataframe(*command) for command in commands]
+        results = []
+        with self._connection.lock:
+            for dataframe in dataframes:
+                try:
+                    results.append(self.send_dataframe(dataframe))
+                except ( DeviceDataframeMismatch
+                       , DeviceDataframeUnknown
+                       , DeviceInvalidResponse
+                       , DeviceNotFound
+                       , usb.core.USBError
+                       ) as error:
+                    results.append(error)
+        return results
+
+    def send_dataframe(self, dataframe):
+        """
+        Sends the given data frame (see get_dataframe()).
+
+        Args:
+            dataframe: Byte string which represents a fully qualified data frame.
+
+        Returns:
+            >>> self.send_dataframe('\x01\x06\xf1\x00\x00\x00\x10\x00')
+            0
+        """
+        return self._write( dataframe
+                          , DATAFRAME_SEND_MULTIPLE != dataframe[0:3]
+                          )[0]
+
     def send_multiple(self, address, command, time='\x00', interval=1):
         """
         Sends the given command multiple for the given address.
@@ -209,12 +338,7 @@ class PCS:
             >>> self.send_multiple('\x00\x00\x00', '\x10', 10)
             '\x00'
         """
-        return self._write( DATAFRAME_SEND_MULTIPLE
-                          + self._get_raw_address(address)
-                          + self._get_raw_command(command + time)
-                          + self._get_raw_interval(interval)
-                          , False
-                          )[0]
+        return self._write(self.get_dataframe(address, command, time, interval), False)[0]
 
     def send_once(self, address, command, time='\x00'):
         """
@@ -229,10 +353,7 @@ class PCS:
             >>> self.send('\x00\x00\x00', '\x10')
             '\x00'
         """
-        return self._write( DATAFRAME_SEND_ONCE
-                          + self._get_raw_address(address)
-                          + self._get_raw_command(command + time)
-                          )[0]
+        return self._write(self.get_dataframe(address, command, time))[0]
 
     def stop_multiple_sending(self):
         """
@@ -245,6 +366,24 @@ class PCS:
         return self._write(DATAFRAME_STOP_MULTIPLE_SENDING)[0]
 
 
+def get_pcs():
+    """
+    Returns the shared PCS instance (used by all devices by default).
+
+    All writes are serialized per FS20 PCS, each write is kept together with
+    its response.
+
+    Returns:
+        >>> get_pcs()
+        <fs20.pcs.PCS instance>
+    """
+    global _pcs
+    with _pcs_lock:
+        if _pcs is None:
+            _pcs = PCS()
+        return _pcs
+
+
 # Module exceptions.
 class DeviceDataframeMismatch(Exception):
     pass
@@ -0,0 +1,506 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2013 Daniel Prokscha
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from array import array
+from collections import deque
+import errno
+import fcntl
+import heapq
+import itertools
+import os
+import select
+import threading
+import time as _time
+
+import usb.core
+
+from fs20 import connection
+from fs20 import pce
+from fs20 import pcs
+from fs20 import util
+
+# Size of each known data frame (see fs20.pcs.DATAFRAME_*), which is the second byte of a data frame.
+DATAFRAME_SIZES = { 0xf0: 1
+                  , 0xf1: 6
+                  , 0xf2: 7
+                  , 0xf3: 1
+                  }
+
+# Firmware versions reported by the simulated devices ("v1.7" and "v2.2").
+VERSION_PCE = 22
+VERSION_PCS = 17
+
+
+class SimulatedDevice:
+    """
+    Abstract class for simulated USB devices (only what fs20.connection and I/O need).
+
+    Attributes:
+        bus: Integer value of the simulated USB bus.
+        idProduct: Integer value of the USB product ID.
+        idVendor: Integer value of the USB vendor ID.
+        port_numbers: Tuple of simulated USB port numbers.
+    """
+
+    def __init__(self, simulator, id_vendor, id_product, port):
+        """
+        Initializes the simulated device.
+
+        Args:
+            simulator: The fs20.simulator.Simulator instance the device belongs to.
+            id_vendor: Integer value of the USB vendor ID.
+            id_product: Integer value of the USB product ID.
+            port: Integer value of the simulated USB port.
+        """
+        self._simulator = simulator
+        self.bus = 1
+        self.idProduct = id_product
+        self.idVendor = id_vendor
+        self.port_numbers = (port,)
+
+    def _check_endpoint(self, endpoint, expected):
+        """
+        Raises an USB error if the given endpoint is not the expected one.
+
+        Args:
+            endpoint: Integer value of the used endpoint.
+            expected: Integer value of the expected endpoint.
+
+        Raises:
+            usb.core.USBError: If the endpoint is invalid.
+        """
+        if not endpoint == expected:
+            raise usb.core.USBError('Invalid endpoint', errno=errno.EINVAL)
+
+    def _timeout(self):
+        """
+        Raises an USB timeout.
+
+        Raises:
+            usb.core.USBError: Always.
+        """
+        raise usb.core.USBError('Operation timed out', errno=errno.ETIMEDOUT)
+
+    def detach_kernel_driver(self, interface):
+        """
+        Does nothing, there is no kernel driver.
+        """
+        pass
+
+    def get_active_configuration(self):
+        """
+        Returns the active configuration (always 1).
+        """
+        return 1
+
+    def read(self, endpoint, size, timeout=None):
+        """
+        Reads from the simulated device (see usb.core.Device.read()).
+        """
+        self._timeout()
+
+    def set_configuration(self, configuration=None):
+        """
+        Does nothing, the simulated device is always configured.
+        """
+        pass
+
+    def write(self, endpoint, data, timeout=None):
+        """
+        Writes to the simulated device (see usb.core.Device.write()).
+        """
+        raise usb.core.USBError('Pipe error', errno=errno.EPIPE)
+
+
+class SimulatedPCE(SimulatedDevice):
+    """
+    Simulated FS20 PCE, returns all frames received over the simulated radio.
+    """
+
+    def __init__(self, simulator):
+        """
+        Initializes the simulated FS20 PCE.
+
+        Args:
+            simulator: The fs20.simulator.Simulator instance the device belongs to.
+        """
+        SimulatedDevice.__init__(self, simulator, pce.ID_VENDOR, pce.ID_PRODUCT, 2)
+
+    def read(self, endpoint, size, timeout=None):
+        """
+        Returns the next received frame (13 bytes) within the given timeout.
+
+        Args:
+            endpoint: Integer value of the endpoint (0x81).
+            size: Integer value of the maximum size to read.
+            timeout: Integer value of milliseconds to wait for a received frame.
+
+        Returns:
+            >>> self.read(0x81, 13, 100)
+            array('B', [2, 11, 17, 17, 17, 17, 17, 17, 16, 0, 0, 0, 22])
+
+        Raises:
+            usb.core.USBError: If no frame was received within the timeout.
+        """
+        self._check_endpoint(endpoint, pce.ENDPOINT_READ)
+        frame = self._simulator._receive(timeout)
+        if frame is None:
+            self._timeout()
+        return frame[0:size]
+
+
+class SimulatedPCS(SimulatedDevice):
+    """
+    Simulated FS20 PCS, transmits all sent commands over the simulated radio.
+    """
+
+    def __init__(self, simulator):
+        """
+        Initializes the simulated FS20 PCS.
+
+        Args:
+            simulator: The fs20.simulator.Simulator instance the device belongs to.
+        """
+        SimulatedDevice.__init__(self, simulator, pcs.ID_VENDOR, pcs.ID_PRODUCT, 1)
+        self._responses = deque()
+
+    def _respond(self, code, value=0):
+        """
+        Queues a response of FS20 PCS.
+
+        Args:
+            code: Integer value of the response code (see fs20.pcs.RESPONSE_*).
+            value: Integer value which follows the response code.
+        """
+        self._responses.append(array('B', [0x02, 0x03, 0xa0, code, value]))
+
+    def read(self, endpoint, size, timeout=None):
+        """
+        Returns the response to the last written data frame.
+
+        Unlike the real device, a missing response is reported instantly.
+
+        Args:
+            endpoint: Integer value of the endpoint (0x81).
+            size: Integer value of the maximum size to read.
+            timeout: Integer value of milliseconds to wait for a response.
+
+        Returns:
+            >>> self.read(0x81, 5, 500)
+            array('B', [2, 3, 160, 0, 0])
+
+        Raises:
+            usb.core.USBError: If there is no response.
+        """
+        self._check_endpoint(endpoint, pcs.ENDPOINT_READ)
+        try:
+            return self._responses.popleft()[0:size]
+        except IndexError:
+            self._timeout()
+
+    def write(self, endpoint, data, timeout=None):
+        """
+        Handles the given data frame like FS20 PCS does.
+
+        Args:
+            endpoint: Integer value of the endpoint (0x01).
+            data: Byte string or byte array which holds the data frame.
+
+        Returns:
+            >>> self.write(0x01, '\x01\x06\xf1\x00\x00\x00\x10\x00')
+            11
+        """
+        self._check_endpoint(endpoint, pcs.ENDPOINT_WRITE)
+        # Data frames are sent as reports of 11 bytes, missing bytes are zero.
+        try:
+            frame = bytearray(data)
+        except TypeError:
+            # Data frames are unicode strings on Python 3.
+            frame = bytearray(data, 'latin-1')
+        frame += bytearray(max(0, 11 - len(frame)))
+        # Only the response to the last data frame can be read.
+        self._responses.clear()
+        if not 0x01 == frame[0] or not frame[2] in DATAFRAME_SIZES:
+            self._respond(pcs.RESPONSE_DATAFRAME_UNKNOWN)
+        elif not DATAFRAME_SIZES[frame[2]] == frame[1]:
+            self._respond(pcs.RESPONSE_DATAFRAME_MISMATCH)
+        elif 0xf0 == frame[2]:
+            self._respond(pcs.RESPONSE_FIRMWARE_REQUEST_OK, VERSION_PCS)
+        elif 0xf1 == frame[2]:
+            # A new command ends the multiple sending.
+            self._simulator._stop()
+            self._simulator._transmit(''.join(map(chr, frame[3:6])), chr(frame[6]), chr(frame[7]))
+            self._respond(pcs.RESPONSE_OK)
+        elif 0xf2 == frame[2]:
+            # No response while sending multiple (see fs20.pcs.PCS.send_multiple()).
+            self._simulator._stop()
+            self._simulator._transmit(''.join(map(chr, frame[3:6])), chr(frame[6]), chr(frame[7]), frame[8])
+        elif self._simulator._stop():
+            self._respond(pcs.RESPONSE_STOP_MULTIPLE_SENDING_OK)
+        else:
+            self._respond(pcs.RESPONSE_STOP_MULTIPLE_SENDING_NOT_SENT)
+        return len(frame)
+
+
+class Simulator:
+    """
+    Loopback simulation of FS20 PCS and FS20 PCE, which stands in for usb.core.
+
+    Commands sent by the simulated FS20 PCS are received by the simulated
+    FS20 PCE after the configured radio latency, so the whole I/O path can be
+    tested and benchmarked without any hardware.
+
+    Example:
+        simulator = Simulator(latency=0.05)
+        simulator.install()
+        fs20.device.Switch('1111-1111-1111').on()
+        print fs20.pce.PCE().get_response(timeout=1000)
+
+    Attributes:
+        buffer_size: Integer value of frames FS20 PCE holds at most (further frames are dropped).
+        dropped: Integer value of frames which were dropped, because the buffer of FS20 PCE was full.
+        latency: Float value of seconds until a sent command is received.
+        pce: The fs20.simulator.SimulatedPCE instance.
+        pcs: The fs20.simulator.SimulatedPCS instance.
+        repeat_delay: Float value of seconds between the repeats of a command which is sent multiple.
+        sent: Integer value of all commands transmitted by the simulated FS20 PCS (including repeats).
+    """
+
+    def __init__(self, latency=0.0, repeat_delay=0.25, buffer_size=1024):
+        """
+        Initializes the simulator.
+
+        Args:
+            latency: Float value of seconds until a sent command is received.
+            repeat_delay: Float value of seconds between the repeats of a command which is sent multiple.
+            buffer_size: Integer value of frames FS20 PCE holds at most (including frames on the air).
+        """
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._radio = []
+        self._repeats = set()
+        # Condition.wait() with a timeout polls on Python 2, so waiting readers are woken up by a pipe.
+        self._wakeup = os.pipe()
+        self.buffer_size = buffer_size
+        self.dropped = 0
+        for descriptor in self._wakeup:
+            fcntl.fcntl(descriptor, fcntl.F_SETFL, fcntl.fcntl(descriptor, fcntl.F_GETFL) | os.O_NONBLOCK)
+        self.latency = latency
+        self.pce = SimulatedPCE(self)
+        self.pcs = SimulatedPCS(self)
+        self.repeat_delay = repeat_delay
+        self.sent = 0
+
+    def _get_frame(self, address, command, time):
+        """
+        Returns the frame FS20 PCE would return for the given command.
+
+        Args:
+            address: Byte string which represents a fully qualified address.
+            command: Byte string which represents a fully qualified command.
+            time: Byte string which represents a fully qualified time.
+
+        Returns:
+            >>> self._get_frame('\x1b\x1b\x00', '\x24', '\x5e')
+            array('B', [2, 11, 18, 52, 18, 52, 17, 17, 4, 16, 4, 72, 22])
+        """
+        frame = array('B', [0x02, 0x0b])
+        for part in util.byte_to_address(address).split('-'):
+            frame.append(int(part[0]) << 4 | int(part[1]))
+            frame.append(int(part[2]) << 4 | int(part[3]))
+        value = ord(command) & 0x1f
+        frame.append((value // 10) << 4 | value % 10)
+        if ord(command) & 0x20:
+            digits = '%05i' % (util.byte_to_seconds(time) / 0.25)
+            frame.append(0x10 | int(digits[0]))
+            frame.append(int(digits[1]) << 4 | int(digits[2]))
+            frame.append(int(digits[3]) << 4 | int(digits[4]))
+        else:
+            frame.extend([0, 0, 0])
+        frame.append(VERSION_PCE)
+        return frame
+
+    def _push(self, entry):
+        """
+        Puts the given entry on the air (the simulator has to be locked).
+
+        Args:
+            entry: A tuple of arrival time, sequence number and frame.
+
+        Returns:
+            >>> self._push((1234.5, 0, frame))
+            True
+        """
+        if len(self._radio) < self.buffer_size:
+            heapq.heappush(self._radio, entry)
+            return True
+        self.dropped += 1
+        return False
+
+    def _receive(self, timeout=None):
+        """
+        Returns the next frame which arrived at FS20 PCE.
+
+        Args:
+            timeout: Integer value of milliseconds to wait for a frame (or "None" to not wait at all).
+
+        Returns:
+            >>> self._receive(100)
+            array('B', [2, 11, 17, 17, 17, 17, 17, 17, 16, 0, 0, 0, 22])
+            >>> self._receive(100)
+            None
+        """
+        deadline = _time.time() + (timeout or 0) / 1000.0
+        while True:
+            with self._lock:
+                now = _time.time()
+                if self._radio and self._radio[0][0] <= now:
+                    due, i, frame = heapq.heappop(self._radio)
+                    self._repeats.discard(i)
+                    return frame
+                if now >= deadline:
+                    return None
+                wait = deadline - now
+                if self._radio:
+                    wait = min(wait, self._radio[0][0] - now)
+            if select.select([self._wakeup[0]], [], [], wait)[0]:
+                try:
+                    os.read(self._wakeup[0], 4096)
+                except OSError:
+                    pass
+
+    def _stop(self):
+        """
+        Stops all pending repeats of commands which are sent multiple (repeats
+        which already went on air stay in the buffer of FS20 PCE).
+
+        Returns:
+            >>> self._stop()
+            True
+        """
+        with self._lock:
+            if not self._repeats:
+                return False
+            now = _time.time()
+            radio = [entry for entry in self._radio if entry[0] <= now or entry[1] not in self._repeats]
+            stopped = len(radio) < len(self._radio)
+            self._radio = radio
+            heapq.heapify(self._radio)
+            self._repeats.clear()
+            return stopped
+
+    def _transmit(self, address, command, time='\x00', repeats=None):
+        """
+        Transmits the given command over the simulated radio.
+
+        Args:
+            address: Byte string which represents a fully qualified address.
+            command: Byte string which represents a fully qualified command.
+            time: Byte string which represents a fully qualified time.
+            repeats: Integer value how often the command is sent (or "None" to send it once).
+        """
+        if 0 == repeats:
+            return
+        frame = self._get_frame(address, command, time)
+        now = _time.time()
+        with self._lock:
+            for repeat in range(repeats or 1):
+                i = next(self._counter)
+                if self._push((now + self.latency + repeat * self.repeat_delay, i, frame)) and repeats is not None:
+                    self._repeats.add(i)
+            self.sent += repeats or 1
+        self._wake()
+
+    def _wake(self):
+        """
+        Wakes up all readers which wait for a frame.
+        """
+        try:
+            os.write(self._wakeup[1], b'\x00')
+        except OSError:
+            # The pipe is full, so readers are woken up anyway.
+            pass
+
+    def find(self, idVendor=None, idProduct=None, custom_match=None, **kwargs):
+        """
+        Finds a simulated device (see usb.core.find()).
+
+        Args:
+            idVendor: Integer value of the USB vendor ID.
+            idProduct: Integer value of the USB product ID.
+            custom_match: Callable which returns TRUE for a matching device.
+
+        Returns:
+            >>> self.find(idVendor=0x18ef, idProduct=0xe015)
+            <fs20.simulator.SimulatedPCS instance>
+        """
+        for device in [self.pcs, self.pce]:
+            if ( (idVendor is None or idVendor == device.idVendor)
+             and (idProduct is None or idProduct == device.idProduct)
+             and (custom_match is None or custom_match(device))
+               ):
+                return device
+        return None
+
+    def get_pending(self):
+        """
+        Returns the number of transmitted frames which did not yet arrive at FS20 PCE.
+
+        Returns:
+            >>> self.get_pending()
+            0
+        """
+        with self._lock:
+            return len(self._radio)
+
+    def install(self):
+        """
+        Makes all connections use this simulator (see fs20.connection.set_backend()).
+        """
+        connection.set_backend(self)
+
+    def send(self, address, command, time='\x00'):
+        """
+        Sends a command from a simulated remote control or sensor (received by FS20 PCE only).
+
+        Args:
+            address: String which represents a fully qualified address.
+            command: Byte string which represents a fully qualified command.
+            time: Byte string which represents a fully qualified time.
+
+        Returns:
+            >>> self.send('1234-1234-1111', '\x12')
+            True
+            >>> self.send('1234-1234-1111', '\x12') # Buffer of FS20 PCE is full.
+            False
+        """
+        frame = self._get_frame(util.address_to_byte(address), command, time)
+        with self._lock:
+            sent = self._push((_time.time() + self.latency, next(self._counter), frame))
+        self._wake()
+        return sent
+
+    def uninstall(self):
+        """
+        Makes all connections use real USB devices again (see fs20.connection.set_backend()).
+        """
+        connection.set_backend()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2013 Daniel Prokscha
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import mmap
+import os
+
+from fs20 import util
+
+# Identifies a state file (followed by the layout version).
+MAGIC = 'FS20STATE\x01'
+
+# Size of the header and of the record of each address (flags and status).
+HEADER_SIZE = 16
+RECORD_SIZE = 2
+
+# Size of a state file, it holds a record for each of the 2^24 addresses. Only
+# written records occupy disk space (sparse file).
+FILE_SIZE = HEADER_SIZE + RECORD_SIZE * 2**24
+
+# Flags of a record.
+FLAG_STORED = 0x01
+FLAG_BLOCKED = 0x02
+FLAG_UNKNOWN = 0x04
+
+
+def _get_offset(address):
+    """
+    Returns the offset of the record of the given address.
+
+    Args:
+        address: A string which represents a fully qualified address or a byte string of 3 bytes.
+
+    Returns:
+        >>> _get_offset('\x00\x00\x01')
+        18
+
+    Raises:
+        InvalidInput: If the given address is invalid.
+    """
+    if not 3 == len(address):
+        address = util.address_to_byte(address)
+    return HEADER_SIZE + RECORD_SIZE * (ord(address[0]) << 16 | ord(address[1]) << 8 | ord(address[2]))
+
+
+class StateFile:
+    """
+    Status and blocked flag of devices, kept in a memory-mapped file.
+
+    The file has a fixed layout: a header followed by a record of two bytes
+    (flags and status) for each address, so a record is updated in place and
+    opening the file needs no parsing at all.
+
+    Attributes:
+        path: String which represents the path of the file.
+    """
+
+    def __init__(self, path):
+        """
+        Opens the given state file (it is created if it does not exist).
+
+        Args:
+            path: String which represents the path of the file.
+
+        Raises:
+            InvalidStateFile: If the given file is no state file.
+        """
+        self.path = path
+        descriptor = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(descriptor).st_size
+            if 0 == size:
+                os.ftruncate(descriptor, FILE_SIZE)
+                os.write(descriptor, MAGIC)
+            elif not FILE_SIZE == size or not MAGIC == os.read(descriptor, len(MAGIC)):
+                raise InvalidStateFile('No state file given: %s' % (path))
+            self._map = mmap.mmap(descriptor, FILE_SIZE)
+        finally:
+            os.close(descriptor)
+
+    def close(self):
+        """
+        Writes all changes to disk and closes the file.
+        """
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+
+    def flush(self):
+        """
+        Writes all changes to disk (changes are visible to other processes without flushing).
+        """
+        self._map.flush()
+
+    def get(self, address):
+        """
+        Returns the stored status and blocked flag of the given address.
+
+        Args:
+            address: A string which represents a fully qualified address or a byte string of 3 bytes.
+
+        Returns:
+            >>> self.get('1234-1234-1111')
+            (75, False)
+            >>> self.get('1234-1234-1112') # Unknown status.
+            (None, False)
+            >>> self.get('1234-1234-1113') # Nothing stored.
+            None
+
+        Raises:
+            InvalidInput: If the given address is invalid.
+        """
+        offset = _get_offset(address)
+        flags = ord(self._map[offset])
+        if not flags & FLAG_STORED:
+            return None
+        if flags & FLAG_UNKNOWN:
+            return None, bool(flags & FLAG_BLOCKED)
+        return ord(self._map[offset + 1]), bool(flags & FLAG_BLOCKED)
+
+    def remove(self, address):
+        """
+        Removes the stored state of the given address.
+
+        Args:
+            address: A string which represents a fully qualified address or a byte string of 3 bytes.
+
+        Raises:
+            InvalidInput: If the given address is invalid.
+        """
+        offset = _get_offset(address)
+        self._map[offset:offset + RECORD_SIZE] = '\x00\x00'
+
+    def set(self, address, status, blocked=False):
+        """
+        Stores status and blocked flag of the given address (written in place).
+
+        Args:
+            address: A string which represents a fully qualified address or a byte string of 3 bytes.
+            status: The device status (brightness level 0-100 or "None" for unknown).
+            blocked: Boolean value whether the device is blocked.
+
+        Raises:
+            InvalidInput: If the given address or status is invalid.
+        """
+        offset = _get_offset(address)
+        flags = FLAG_STORED
+        if blocked:
+            flags |= FLAG_BLOCKED
+        if status is None:
+            flags |= FLAG_UNKNOWN
+            status = 0
+        elif not 0 <= status <= 100:
+            raise util.InvalidInput('Invalid status given (0-100 or "None" expected).')
+        self._map[offset:offset + RECORD_SIZE] = chr(flags) + chr(int(status))
+
+
+# Module exceptions.
+class InvalidStateFile(Exception):
+    pass
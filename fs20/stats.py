@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2013 Daniel Prokscha
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+# Instrumentation is disabled by default, all call sites check "enabled" before
+# they measure anything (see enable()).
+
+from bisect import bisect_left
+import threading
+import time
+
+# Upper bounds (seconds) of the histogram buckets, the last bucket is unbounded.
+BUCKETS = ( 0.0001, 0.00025, 0.0005
+          , 0.001, 0.0025, 0.005
+          , 0.01, 0.025, 0.05
+          , 0.1, 0.25, 0.5
+          , 1.0, 2.5, 5.0
+          )
+
+# Returns the current time in seconds (used for all measurements).
+clock = time.time
+
+# Boolean value whether measurements are recorded.
+enabled = False
+
+# Holds all counters and histograms by name.
+_counters = {}
+_histograms = {}
+_lock = threading.Lock()
+
+
+class Histogram:
+    """
+    Latency histogram of a single operation.
+
+    Attributes:
+        count: Integer value of all observed latencies.
+        counts: List of integer values of observed latencies per bucket (see BUCKETS).
+        max: Float value of the highest observed latency in seconds (or "None").
+        min: Float value of the lowest observed latency in seconds (or "None").
+        total: Float value of the sum of all observed latencies in seconds.
+    """
+
+    def __init__(self):
+        """
+        Initializes the histogram instance.
+        """
+        self.count = 0
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.max = None
+        self.min = None
+        self.total = 0.0
+
+    def add(self, seconds):
+        """
+        Adds the given latency.
+
+        Args:
+            seconds: Float value of the latency in seconds.
+        """
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.max is None or self.max < seconds:
+            self.max = seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+
+    def get_percentile(self, percent):
+        """
+        Returns the upper bound of the bucket which holds the given percentile.
+
+        Latencies within the unbounded bucket are reported as the highest observed latency.
+
+        Args:
+            percent: Float value between 0 and 100.
+
+        Returns:
+            >>> self.get_percentile(99)
+            0.005
+            >>> Histogram().get_percentile(99)
+            None
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(self.count * percent / 100.0 + 0.5))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if rank <= seen:
+                break
+        if i < len(BUCKETS):
+            return min(BUCKETS[i], self.max)
+        return self.max
+
+    def get_snapshot(self):
+        """
+        Returns all values of the histogram.
+
+        Returns:
+            >>> self.get_snapshot()
+            {'buckets': [(0.0001, 0), ..., (None, 0)], 'count': 2, 'max': 0.003, 'mean': 0.002, 'min': 0.001, 'p50': 0.001, 'p99': 0.003, 'p999': 0.003}
+        """
+        return { 'buckets': list(zip(BUCKETS + (None,), self.counts))
+               , 'count': self.count
+               , 'max': self.max
+               , 'mean': self.total / self.count if self.count else None
+               , 'min': self.min
+               , 'p50': self.get_percentile(50)
+               , 'p99': self.get_percentile(99)
+               , 'p999': self.get_percentile(99.9)
+               }
+
+
+def disable():
+    """
+    Stops recording measurements (recorded values are kept).
+    """
+    global enabled
+    enabled = False
+
+def enable():
+    """
+    Starts recording measurements.
+    """
+    global enabled
+    enabled = True
+
+def increment(name, value=1):
+    """
+    Increments the given counter.
+
+    Args:
+        name: String which represents the name of the counter (e.g. "pcs.timeouts").
+        value: Integer value to add.
+    """
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def observe(name, seconds):
+    """
+    Adds the given latency to the histogram of the given operation.
+
+    Args:
+        name: String which represents the name of the operation (e.g. "pcs.write").
+        seconds: Float value of the latency in seconds.
+    """
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(seconds)
+
+def reset():
+    """
+    Removes all recorded counters and histograms.
+    """
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+def snapshot():
+    """
+    Returns all recorded counters and histograms.
+
+    Returns:
+        >>> snapshot()
+        {'counters': {'pce.timeouts': 12}, 'enabled': True, 'histograms': {'pce.read': {'count': 13, ...}}}
+    """
+    with _lock:
+        return { 'counters': dict(_counters)
+               , 'enabled': enabled
+               , 'histograms': dict([(name, histogram.get_snapshot()) for name, histogram in _histograms.items()])
+               }
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2013 Daniel Prokscha
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+# Tracers are called at the I/O boundaries of FS20 PCS and FS20 PCE. Without
+# any tracer, all call sites skip tracing by a single check of "tracers".
+
+import threading
+
+from fs20 import stats
+
+# Holds all added tracers (replaced as a whole, so it can be read without locking).
+tracers = ()
+
+_lock = threading.Lock()
+
+
+class Tracer(object):
+    """
+    Base class of tracers, all hooks do nothing by default.
+
+    Example:
+        class SlowWrites(fs20.trace.Tracer):
+            def after_write(self, address, command, time, response, seconds, error):
+                if 0.5 < seconds:
+                    print 'Slow write', repr(address), repr(command), seconds
+
+        fs20.trace.add_tracer(SlowWrites())
+    """
+
+    def after_decode(self, frame, response, seconds):
+        """
+        Is called after FS20 PCE received and decoded a frame.
+
+        Args:
+            frame: Array of unsigned bytes which represents the raw frame (13 bytes).
+            response: The decoded fs20.pce.Response instance.
+            seconds: Float value of seconds it took to decode the frame.
+        """
+        pass
+
+    def after_dispatch(self, response, seconds, callbacks):
+        """
+        Is called after the receiver dispatched a response to its callbacks.
+
+        With an executor (see fs20.pce.Executor) the callbacks are queued only,
+        so the given seconds cover the queuing.
+
+        Args:
+            response: The fs20.pce.Response instance (the same one as passed to after_decode()).
+            seconds: Float value of seconds it took to dispatch the response.
+            callbacks: Tuple of all callables which were run (or queued) for the response.
+        """
+        pass
+
+    def after_write(self, address, command, time, response, seconds, error):
+        """
+        Is called after a data frame was written to FS20 PCS (and its response was read).
+
+        Args:
+            address: Byte string which represents a fully qualified address (or "None" if the data frame sends no command).
+            command: Byte string which represents a fully qualified command (or "None").
+            time: Byte string which represents a fully qualified time (or "None").
+            response: Integer value of the response code of FS20 PCS (or "None" on error).
+            seconds: Float value of seconds it took to write the data frame and to read its response.
+            error: The raised exception (or "None").
+        """
+        pass
+
+    def before_write(self, address, command, time):
+        """
+        Is called before a data frame is written to FS20 PCS.
+
+        Args:
+            address: Byte string which represents a fully qualified address (or "None" if the data frame sends no command).
+            command: Byte string which represents a fully qualified command (or "None").
+            time: Byte string which represents a fully qualified time (or "None").
+        """
+        pass
+
+
+def _call(name, *args):
+    """
+    Calls the given hook of all tracers, exceptions of tracers never affect I/O.
+
+    Args:
+        name: String which represents the name of the hook (e.g. "after_write").
+    """
+    for tracer in tracers:
+        try:
+            getattr(tracer, name)(*args)
+        except Exception:
+            if stats.enabled:
+                stats.increment('trace.errors')
+
+def add_tracer(tracer):
+    """
+    Adds the given tracer.
+
+    Args:
+        tracer: A fs20.trace.Tracer instance.
+    """
+    global tracers
+    with _lock:
+        if tracer not in tracers:
+            tracers = tracers + (tracer,)
+
+def after_decode(frame, response, seconds):
+    """
+    Calls after_decode() of all tracers (see fs20.trace.Tracer).
+    """
+    _call('after_decode', frame, response, seconds)
+
+def after_dispatch(response, seconds, callbacks):
+    """
+    Calls after_dispatch() of all tracers (see fs20.trace.Tracer).
+    """
+    _call('after_dispatch', response, seconds, callbacks)
+
+def get_fields(dataframe):
+    """
+    Returns address, command and time of the given data frame of FS20 PCS.
+
+    Args:
+        dataframe: Byte string which represents a fully qualified data frame.
+
+    Returns:
+        >>> get_fields('\x01\x06\xf1\x00\x00\x00\x10\x00')
+        ('\x00\x00\x00', '\x10', '\x00')
+        >>> get_fields('\x01\x01\xf3')
+        (None, None, None)
+    """
+    if 8 <= len(dataframe) and dataframe[2:3] in ('\xf1', '\xf2'):
+        return dataframe[3:6], dataframe[6:7], dataframe[7:8]
+    return None, None, None
+
+def remove_tracer(tracer):
+    """
+    Removes the given tracer (see add_tracer()).
+
+    Args:
+        tracer: A fs20.trace.Tracer instance.
+    """
+    global tracers
+    with _lock:
+        tracers = tuple([added for added in tracers if added is not tracer])
+
+def write(function, dataframe, with_response=True):
+    """
+    Calls the given write function of FS20 PCS and the write hooks of all tracers.
+
+    Args:
+        function: A callable which writes the data frame (see fs20.pcs.PCS._transfer()).
+        dataframe: Byte string which represents a fully qualified data frame.
+        with_response: Boolean value whether to get a response from the sent command.
+
+    Returns:
+        Same as the given function.
+    """
+    address, command, time = get_fields(dataframe)
+    _call('before_write', address, command, time)
+    start = stats.clock()
+    try:
+        result = function(dataframe, with_response)
+    except Exception as error:
+        _call('after_write', address, command, time, None, stats.clock() - start, error)
+        raise
+    _call('after_write', address, command, time, result[0], stats.clock() - start, None)
+    return result
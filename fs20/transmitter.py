@@ -0,0 +1,794 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2013 Daniel Prokscha
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from collections import deque
+import threading
+import time as _time
+
+from fs20 import command
+from fs20 import pcs
+
+# Duration (seconds) of a single bit on air.
+BIT_0 = 0.0008
+BIT_1 = 0.0012
+
+# Allowed airtime (seconds) within the sliding window (1% duty cycle on 868 MHz).
+DUTY_CYCLE_LIMIT = 36.0
+DUTY_CYCLE_WINDOW = 3600.0
+
+# How often a command waiting for airtime may be overtaken by smaller ones.
+MAX_OVERTAKES = 16
+
+# Highest interval of fs20.pcs.PCS.send_multiple() (merged sends are capped).
+MAX_INTERVAL = 255
+
+# Each FS20 packet is repeated on air.
+PACKET_REPEATS = 3
+
+# Seconds between the repeats of a command which FS20 PCS sends multiple.
+REPEAT_DELAY = 0.25
+
+# Number of set bits for each byte value.
+_ONES = [bin(i).count('1') for i in range(256)]
+
+# Commands which set an absolute device state. A queued state command is
+# superseded by a newer state command for the same address.
+STATE_COMMANDS = frozenset([
+    command.DIM_BRIGHTNESS_LEVEL_1_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_2_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_3_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_4_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_5_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_6_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_7_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_8_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_9_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_10_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_11_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_12_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_13_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_14_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_15_IN_TIME,
+    command.DIM_BRIGHTNESS_LEVEL_16_IN_TIME,
+    command.DIM_OFF_IN_TIME,
+    command.OFF,
+    command.ON,
+    command.ON_BRIGHTNESS_LEVEL_1,
+    command.ON_BRIGHTNESS_LEVEL_2,
+    command.ON_BRIGHTNESS_LEVEL_3,
+    command.ON_BRIGHTNESS_LEVEL_4,
+    command.ON_BRIGHTNESS_LEVEL_5,
+    command.ON_BRIGHTNESS_LEVEL_6,
+    command.ON_BRIGHTNESS_LEVEL_7,
+    command.ON_BRIGHTNESS_LEVEL_8,
+    command.ON_BRIGHTNESS_LEVEL_9,
+    command.ON_BRIGHTNESS_LEVEL_10,
+    command.ON_BRIGHTNESS_LEVEL_11,
+    command.ON_BRIGHTNESS_LEVEL_12,
+    command.ON_BRIGHTNESS_LEVEL_13,
+    command.ON_BRIGHTNESS_LEVEL_14,
+    command.ON_BRIGHTNESS_LEVEL_15,
+    command.ON_BRIGHTNESS_LEVEL_16
+])
+
+
+class AirtimeBudget:
+    """
+    Sliding window budget of airtime (duty cycle).
+
+    Attributes:
+        limit: Float value of seconds of airtime allowed within the window.
+        window: Float value of seconds of the sliding window.
+    """
+
+    def __init__(self, limit=DUTY_CYCLE_LIMIT, window=DUTY_CYCLE_WINDOW, clock=_time.time):
+        """
+        Initializes the budget instance.
+
+        Args:
+            limit: Float value of seconds of airtime allowed within the window (defaults to 36 seconds).
+            window: Float value of seconds of the sliding window (defaults to 1 hour).
+            clock: A callable which returns the current time in seconds.
+        """
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sent = deque()
+        self._used = 0.0
+        self.limit = float(limit)
+        self.window = float(window)
+
+    def _expire(self, now):
+        """
+        Removes all sent airtime which left the window.
+
+        Args:
+            now: Float value of the current time in seconds.
+        """
+        while self._sent and self._sent[0][0] + self.window <= now:
+            self._used -= self._sent.popleft()[1]
+        if not self._sent:
+            self._used = 0.0
+
+    def consume(self, airtime):
+        """
+        Adds the given airtime to the budget.
+
+        Args:
+            airtime: Float value of seconds of airtime.
+        """
+        if not airtime:
+            return
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            self._sent.append((now, airtime))
+            self._used += airtime
+
+    def get_delay(self, airtime):
+        """
+        Returns the seconds to wait until the given airtime fits into the budget.
+
+        Args:
+            airtime: Float value of seconds of airtime.
+
+        Returns:
+            >>> self.get_delay(0.15)
+            0
+            >>> self.get_delay(0.15)
+            12.5
+        """
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            excess = self._used + airtime - self.limit
+            if excess <= 1e-9:
+                return 0
+            for sent, sent_airtime in self._sent:
+                excess -= sent_airtime
+                if excess <= 1e-9:
+                    return sent + self.window - now
+            return self.window
+
+    def get_remaining(self):
+        """
+        Returns the seconds of airtime which are currently available.
+
+        Returns:
+            >>> self.get_remaining()
+            35.85
+        """
+        return max(0.0, self.limit - self.get_used())
+
+    def get_used(self):
+        """
+        Returns the seconds of airtime which were used within the window.
+
+        Returns:
+            >>> self.get_used()
+            0.15
+        """
+        with self._lock:
+            self._expire(self._clock())
+            return self._used
+
+
+class Handle:
+    """
+    Handle of a queued command.
+
+    Attributes:
+        address: Byte string which represents a fully qualified address (or "None" for stop_multiple_sending()).
+        airtime: Float value of the estimated seconds on air.
+        cancelled: Is set to TRUE if the command was cancelled (see fs20.transmitter.Transmitter.cancel()).
+        command: Byte string which represents a fully qualified command (or "None" for stop_multiple_sending()).
+        interval: Integer value how often the command should be sent.
+        superseded: Is set to TRUE if the command was dropped in favour of a newer one.
+        time: Byte string which represents a fully qualified time.
+    """
+
+    def __init__(self, address=None, command=None, time='\x00', interval=1):
+        """
+        Initializes the handle instance.
+
+        Args:
+            address: Byte string which represents a fully qualified address.
+            command: Byte string which represents a fully qualified command.
+            time: Byte string which represents a fully qualified time.
+            interval: Integer value how often the command should be sent.
+        """
+        self._done = threading.Event()
+        self._error = None
+        # Handles merged into this one (see fs20.transmitter.Transmitter).
+        self._followers = []
+        self._leader = None
+        self._mergeable = False
+        self._overtaken = 0
+        self._queued = _time.time()
+        self._response = None
+        self.address = address
+        self.airtime = 0.0
+        if command is not None:
+            self.airtime = get_airtime(address, command, time, interval)
+        self.cancelled = False
+        self.command = command
+        self.interval = interval
+        self.superseded = False
+        self.time = time
+
+    def _resolve(self, response=None, error=None):
+        """
+        Stores the result of the command and wakes up all waiting callers (merged handles included).
+
+        Args:
+            response: The response code of FS20 PCS.
+            error: The exception which was raised while sending the command.
+        """
+        self._error = error
+        self._response = response
+        self._done.set()
+        for follower in self._followers:
+            follower._resolve(response, error)
+
+    def done(self):
+        """
+        Returns TRUE if the command was sent, superseded or cancelled.
+
+        Returns:
+            >>> self.done()
+            True
+        """
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """
+        Waits for the command and returns the response code of FS20 PCS.
+
+        Args:
+            timeout: Float value of seconds to wait (defaults to "None" which waits forever).
+
+        Returns:
+            >>> self.result()
+            0
+            >>> self.result() # Superseded or cancelled command.
+            None
+
+        Raises:
+            Timeout: If the command was not sent within the given timeout.
+            Exception: Any exception which was raised while sending the command.
+        """
+        if not self._done.wait(timeout) and not self._done.is_set():
+            raise Timeout('Command not sent within %s seconds.' % (timeout))
+        if self._error is not None:
+            raise self._error
+        return self._response
+
+
+class Transmitter:
+    """
+    Queues commands in front of FS20 PCS, all commands are sent by a single writer thread.
+
+    With an airtime budget, commands are paced to stay within the duty cycle.
+    A command which doesn't fit into the budget yet may be overtaken by smaller
+    commands for other addresses, commands for the same address are always
+    sent in order.
+
+    With a merge window, consecutive sends of the same relative command (e.g.
+    DIM_UP) for the same address are merged into a single multiple sending.
+
+    Any command ends a multiple sending of FS20 PCS, so after a command was
+    sent multiple the next one waits until all repeats went out (except for
+    stop_multiple_sending()).
+
+    Attributes:
+        budget: Holds the instance of fs20.transmitter.AirtimeBudget (or "None" for unlimited airtime).
+        failed: Integer value of commands which raised an exception while sending.
+        merge_window: Float value of seconds a send waits for identical ones to merge with (or "None" to never merge).
+        merged: Integer value of sends which were merged into a preceding one.
+        repeat_delay: Float value of seconds between the repeats of a command which is sent multiple.
+        superseded: Integer value of commands which were dropped in favour of newer ones.
+    """
+
+    def __init__(self, transmitter=None, budget=None, merge_window=None):
+        """
+        Initializes the transmitter instance and starts the writer thread.
+
+        Args:
+            transmitter: A fs20.pcs.PCS instance (defaults to the shared one, see fs20.pcs.get_pcs()).
+            budget: A fs20.transmitter.AirtimeBudget instance (defaults to "None" for unlimited airtime).
+            merge_window: Float value of seconds a send waits for identical ones to merge with (defaults to "None" to never merge).
+        """
+        # Handle which is currently sent by the writer thread.
+        self._active = None
+        self._condition = threading.Condition()
+        self._pcs = transmitter or pcs.get_pcs()
+        self._queue = deque()
+        self._running = True
+        # Time until the repeats of the last multiple sending are on air.
+        self._repeating = 0.0
+        # Handle which was sent multiple last (until another command is sent).
+        self._sending = None
+        self.budget = budget
+        self.failed = 0
+        self.merge_window = merge_window
+        self.merged = 0
+        self.repeat_delay = REPEAT_DELAY
+        self.superseded = 0
+        self._writer = threading.Thread(target=self._write)
+        self._writer.daemon = True
+        self._writer.start()
+
+    def _enqueue(self, handle):
+        """
+        Queues the given handle (queued state commands for the same address are superseded,
+        identical relative commands are merged with the last queued one).
+
+        Args:
+            handle: A fs20.transmitter.Handle instance.
+
+        Returns:
+            >>> self._enqueue(handle)
+            <fs20.transmitter.Handle instance>
+
+        Raises:
+            AirtimeExceeded: If the command needs more airtime than the whole budget.
+            TransmitterClosed: If the transmitter is already closed.
+        """
+        if self.budget is not None and handle.airtime > self.budget.limit:
+            raise AirtimeExceeded('Command needs more airtime than the budget allows.')
+        with self._condition:
+            if not self._running:
+                raise TransmitterClosed('Transmitter is already closed.')
+            if self._is_state(handle):
+                for queued in list(self._queue):
+                    if queued.address == handle.address and self._is_state(queued):
+                        self._queue.remove(queued)
+                        queued.superseded = True
+                        queued._resolve()
+                        self.superseded += 1
+            if self._merge(handle):
+                return handle
+            self._queue.append(handle)
+            self._condition.notify_all()
+        return handle
+
+    def _get_handle(self, dataframe):
+        """
+        Returns a handle which sends the given data frame of FS20 PCS (see fs20.pcs.PCS.get_dataframe()).
+
+        Args:
+            dataframe: Byte string which represents a fully qualified data frame.
+
+        Returns:
+            >>> self._get_handle('\x01\x06\xf1\x00\x00\x00\x10\x00')
+            <fs20.transmitter.Handle instance>
+
+        Raises:
+            DeviceDataframeUnknown: If the given data frame is unknown.
+        """
+        kind = dataframe[0:3]
+        if pcs.DATAFRAME_SEND_ONCE == kind and 8 == len(dataframe):
+            return Handle(dataframe[3:6], dataframe[6], dataframe[7])
+        if pcs.DATAFRAME_SEND_MULTIPLE == kind and 9 == len(dataframe):
+            return Handle(dataframe[3:6], dataframe[6], dataframe[7], ord(dataframe[8]))
+        if pcs.DATAFRAME_STOP_MULTIPLE_SENDING == dataframe:
+            return Handle()
+        raise pcs.DeviceDataframeUnknown('Unknown data frame sent to device.')
+
+    def _is_mergeable(self, command):
+        """
+        Returns TRUE if sending the given command once may be merged (see merge_window).
+
+        Args:
+            command: Byte string which represents a fully qualified command.
+
+        Returns:
+            >>> self._is_mergeable('\x14')
+            True
+        """
+        return self.merge_window is not None and command not in STATE_COMMANDS
+
+    def _is_state(self, handle):
+        """
+        Returns TRUE if the given handle sends a state command once.
+
+        Args:
+            handle: A fs20.transmitter.Handle instance.
+
+        Returns:
+            >>> self._is_state(Handle('\x00\x00\x00', '\x10'))
+            True
+        """
+        return 1 == handle.interval and handle.command in STATE_COMMANDS
+
+    def _merge(self, handle):
+        """
+        Merges the given handle into the last queued one if both send the same command.
+
+        Args:
+            handle: A fs20.transmitter.Handle instance.
+
+        Returns:
+            >>> self._merge(handle)
+            True
+        """
+        if not handle._mergeable or not self._queue:
+            return False
+        tail = self._queue[-1]
+        if ( not tail._mergeable
+          or MAX_INTERVAL <= tail.interval
+          or (tail.address, tail.command, tail.time) != (handle.address, handle.command, handle.time)
+           ):
+            return False
+        if self.budget is not None and tail.airtime + handle.airtime > self.budget.limit:
+            return False
+        tail.airtime += handle.airtime
+        tail.interval += 1
+        tail._followers.append(handle)
+        handle._leader = tail
+        self.merged += 1
+        return True
+
+    def _next(self):
+        """
+        Removes and returns the next queued handle which fits into the budget.
+
+        Returns a tuple of the handle (or "None") and the seconds to wait if no
+        queued handle may be sent yet (it doesn't fit into the budget, the
+        repeats of a multiple sending are still on air or the merge window is
+        still open).
+
+        Returns:
+            >>> self._next()
+            (<fs20.transmitter.Handle instance>, 0)
+            >>> self._next()
+            (None, 12.5)
+        """
+        head = self._queue[0]
+        if head.command is not None:
+            now = _time.time()
+            if now < self._repeating:
+                return None, self._repeating - now
+            if head._mergeable and self.merge_window:
+                delay = head._queued + self.merge_window - now
+                if 0 < delay:
+                    return None, delay
+        if self.budget is None:
+            return self._queue.popleft(), 0
+        addresses = set()
+        delay = None
+        for handle in self._queue:
+            if handle is not head:
+                if handle.address is None or MAX_OVERTAKES <= head._overtaken:
+                    break
+                if handle.address in addresses:
+                    continue
+            handle_delay = self.budget.get_delay(handle.airtime)
+            if not handle_delay:
+                if handle is not head:
+                    head._overtaken += 1
+                self._queue.remove(handle)
+                return handle, 0
+            if delay is None or handle_delay < delay:
+                delay = handle_delay
+            addresses.add(handle.address)
+        return None, delay
+
+    def _send(self, handle):
+        """
+        Sends the command of the given handle.
+
+        Args:
+            handle: A fs20.transmitter.Handle instance.
+
+        Returns:
+            >>> self._send(handle)
+            0
+        """
+        if handle.command is None:
+            return self._pcs.stop_multiple_sending()
+        if 1 == handle.interval:
+            return self._pcs.send_once(handle.address, handle.command, handle.time)
+        return self._pcs.send_multiple(handle.address, handle.command, handle.time, handle.interval)
+
+    def _write(self):
+        """
+        Sends all queued commands in order until the transmitter is closed.
+        """
+        while True:
+            with self._condition:
+                handle = None
+                while handle is None:
+                    if not self._queue:
+                        if not self._running:
+                            return
+                        self._condition.wait()
+                        continue
+                    handle, delay = self._next()
+                    if handle is None:
+                        self._condition.wait(delay)
+                if self.budget is not None:
+                    self.budget.consume(handle.airtime)
+                self._active = handle
+                # Any other command ends a multiple sending.
+                self._repeating = 0.0
+                self._sending = None
+            error = None
+            response = None
+            try:
+                response = self._send(handle)
+            except Exception as exception:
+                error = exception
+            with self._condition:
+                if error is not None:
+                    self.failed += 1
+                elif 1 < handle.interval:
+                    self._repeating = _time.time() + handle.interval * self.repeat_delay
+                    self._sending = handle
+            handle._resolve(response, error)
+            with self._condition:
+                self._active = None
+                self._condition.notify_all()
+
+    def cancel(self, handle):
+        """
+        Cancels the given command, a merged command is cancelled as a whole.
+
+        A queued command is dropped. If the command is already being sent
+        multiple, the multiple sending is stopped (the stop is queued first).
+
+        Args:
+            handle: A fs20.transmitter.Handle instance.
+
+        Returns:
+            >>> self.cancel(handle)
+            True
+            >>> self.cancel(handle) # Already sent.
+            False
+        """
+        handle = handle._leader or handle
+        with self._condition:
+            if handle in self._queue:
+                self._queue.remove(handle)
+                for cancelled in [handle] + handle._followers:
+                    cancelled.cancelled = True
+                handle._resolve()
+                return True
+            if handle is self._sending and _time.time() < self._repeating and self._running:
+                self._repeating = 0.0
+                self._sending = None
+                self._queue.appendleft(Handle())
+                self._condition.notify_all()
+                return True
+        return False
+
+    def close(self, wait=True):
+        """
+        Closes the transmitter, already queued commands are still sent.
+
+        Args:
+            wait: Boolean value whether to wait until all queued commands are sent.
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if wait:
+            self._writer.join()
+
+    def flush(self, timeout=None):
+        """
+        Waits until all queued commands are sent.
+
+        Args:
+            timeout: Float value of seconds to wait (defaults to "None" which waits forever).
+
+        Returns:
+            >>> self.flush()
+            True
+            >>> self.flush(0.1) # Commands are still queued.
+            False
+        """
+        deadline = timeout is not None and _time.time() + timeout
+        with self._condition:
+            while self._queue or self._active is not None:
+                if timeout is None:
+                    self._condition.wait()
+                    continue
+                remaining = deadline - _time.time()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def get_dataframe(self, address, command, time='\x00', interval=None):
+        """
+        Returns the data frame to send the given command (see fs20.pcs.PCS.get_dataframe()).
+
+        Returns:
+            >>> self.get_dataframe('\x00\x00\x00', '\x10')
+            '\x01\x06\xf1\x00\x00\x00\x10\x00'
+
+        Raises:
+            InvalidInput: If the given address, command or interval is invalid.
+        """
+        return self._pcs.get_dataframe(address, command, time, interval)
+
+    def get_queue_depth(self):
+        """
+        Returns the number of queued commands.
+
+        Returns:
+            >>> self.get_queue_depth()
+            2
+        """
+        return len(self._queue)
+
+    def send_batch(self, commands):
+        """
+        Queues the given commands in order and waits for all of them (see fs20.pcs.PCS.send_batch()).
+
+        All data frames are validated before anything is queued. Unlike
+        fs20.pcs.PCS.send_batch(), commands of other callers may be sent in
+        between.
+
+        Args:
+            commands: Iterable of tuples (address, command[, time[, interval]]), see get_dataframe().
+
+        Returns:
+            >>> self.send_batch([('\x00\x00\x00', '\x10'), ('\x00\x00\x01', '\x00')])
+            [0, DeviceInvalidResponse('Invalid response from device.',)]
+
+        Raises:
+            InvalidInput: If any of the given commands is invalid (nothing is queued).
+        """
+        handles = [self._get_handle(self.get_dataframe(*command)) for command in commands]
+        results = []
+        for handle in [self._enqueue(handle) for handle in handles]:
+            try:
+                results.append(handle.result())
+            except Exception as error:
+                results.append(error)
+        return results
+
+    def send_dataframe(self, dataframe):
+        """
+        Queues the given data frame and waits until it is sent (see fs20.pcs.PCS.send_dataframe()).
+
+        So devices (see fs20.device) can use the transmitter instead of FS20 PCS.
+        With a merge window, a relative command which is sent once is queued
+        without waiting (returns "None"), so it can be merged with following
+        ones (e.g. dim_down() in a loop). See flush() and failed.
+
+        Args:
+            dataframe: Byte string which represents a fully qualified data frame.
+
+        Returns:
+            >>> self.send_dataframe('\x01\x06\xf1\x00\x00\x00\x10\x00')
+            0
+            >>> self.send_dataframe('\x01\x06\xf1\x00\x00\x00\x10\x00') # Superseded command.
+            None
+            >>> self.send_dataframe('\x01\x06\xf1\x00\x00\x00\x14\x00') # Queued for merging.
+            None
+
+        Raises:
+            DeviceDataframeUnknown: If the given data frame is unknown.
+            Exception: Any exception which was raised while sending the command.
+        """
+        handle = self._get_handle(dataframe)
+        if pcs.DATAFRAME_SEND_ONCE == dataframe[0:3]:
+            handle._mergeable = self._is_mergeable(handle.command)
+        self._enqueue(handle)
+        if handle._mergeable:
+            return None
+        return handle.result()
+
+    def send_multiple(self, address, command, time='\x00', interval=1):
+        """
+        Queues the given command to be sent multiple (see fs20.pcs.PCS.send_multiple()).
+
+        Args:
+            address: Byte string which represents a fully qualified address.
+            command: Byte string which represents a fully qualified command.
+            time: Byte string which represents a fully qualified time.
+            interval: Interval between 1 and 255 how often the command should be sent.
+
+        Returns:
+            >>> self.send_multiple('\x00\x00\x00', '\x14', interval=10).result()
+            0
+        """
+        return self._enqueue(Handle(address, command, time, interval))
+
+    def send_once(self, address, command, time='\x00'):
+        """
+        Queues the given command to be sent once (see fs20.pcs.PCS.send_once()).
+
+        With a merge window, the send is merged with directly following sends of
+        the same relative command for the same address, all handles share the
+        result of the multiple sending.
+
+        Args:
+            address: Byte string which represents a fully qualified address.
+            command: Byte string which represents a fully qualified command.
+            time: Byte string which represents a fully qualified time.
+
+        Returns:
+            >>> self.send_once('\x00\x00\x00', '\x10').result()
+            0
+        """
+        handle = Handle(address, command, time)
+        handle._mergeable = self._is_mergeable(command)
+        return self._enqueue(handle)
+
+    def stop_multiple_sending(self):
+        """
+        Queues stopping the multiple sending (see fs20.pcs.PCS.stop_multiple_sending()).
+
+        Returns:
+            >>> self.stop_multiple_sending().result()
+            4
+        """
+        return self._enqueue(Handle())
+
+
+def get_airtime(address, command, time='\x00', interval=1):
+    """
+    Returns the estimated seconds on air of the given command.
+
+    A FS20 packet consists of the sync sequence, the address, the command, the
+    time (commands with additional byte only) and the checksum, each byte is
+    followed by a parity bit. Each packet is repeated on air.
+
+    Args:
+        address: Byte string which represents a fully qualified address.
+        command: Byte string which represents a fully qualified command.
+        time: Byte string which represents a fully qualified time.
+        interval: Integer value how often the command is sent.
+
+    Returns:
+        >>> get_airtime('\x00\x00\x00', '\x10')
+        0.15
+    """
+    values = [ord(value) for value in address + command[0:1]]
+    if command and ord(command[0]) & 0x20:
+        values.append(ord((command[1:2] or time[0:1]) or '\x00'))
+    values.append((6 + sum(values)) & 0xff)
+    # Sync sequence (12 zeros, 1 one) and end of transmission (1 zero).
+    ones = 1
+    zeros = 13
+    for value in values:
+        # Data bits and even parity bit.
+        bits = _ONES[value] + (_ONES[value] & 1)
+        ones += bits
+        zeros += 9 - bits
+    return (zeros * BIT_0 + ones * BIT_1) * PACKET_REPEATS * int(interval)
+
+
+# Module exceptions.
+class AirtimeExceeded(Exception):
+    pass
+
+
+class Timeout(Exception):
+    pass
+
+
+class TransmitterClosed(Exception):
+    pass
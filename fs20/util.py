@@ -20,10 +20,157 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+from bisect import bisect_left
 from datetime import datetime
-from math import log
-from math import floor
+from datetime import timedelta
+import re
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    _string_types = basestring
+except NameError:
+    _string_types = str
+
+# Minimum number of addresses to convert them with NumPy (if installed).
+NUMPY_THRESHOLD = 64
+
+# Maps each byte to its address part (e.g. 0x1b to "1234") and vice versa.
+_ADDRESS_PARTS = []
+_ADDRESS_PART_BYTES = {}
+for i in range(256):
+    part = '%i%i%i%i' % ( (i >> 6) + 1
+                        , (i >> 4 & 0x03) + 1
+                        , (i >> 2 & 0x03) + 1
+                        , (i & 0x03) + 1
+                        )
+    _ADDRESS_PARTS.append(part)
+    _ADDRESS_PART_BYTES[part] = chr(i)
+del i, part
+
+# Maps each time byte to its duration in seconds.
+_TIME_SECONDS = [2**(i >> 4) * (i & 0x0f) * 0.25 for i in range(256)]
+
+# All encodable durations (sorted) and their best time byte (finest resolution).
+_TIME_DURATIONS = []
+_TIME_BYTES = []
+for seconds, i in sorted([(_TIME_SECONDS[i], i) for i in range(256) if i & 0x0f or 0 == i]):
+    if not _TIME_DURATIONS or _TIME_DURATIONS[-1] != seconds:
+        _TIME_DURATIONS.append(seconds)
+        _TIME_BYTES.append(chr(i))
+del i, seconds
+
+# Holds already converted times (cleared when it reaches its maximum size).
+_TIME_CACHE = {}
+_TIME_CACHE_SIZE = 1024
+
+# Matches a time string like "%H:%M:%S.%f" (see time_string_to_byte()).
+_TIME_STRING = re.compile(r'^(\d{1,2}):(\d{1,2}):(\d{1,2})\.(\d{1,6})$')
+
+# Same as above, but as a NumPy table of digit characters (256 x 4).
+if numpy is not None:
+    _ADDRESS_DIGITS = numpy.array([[ord(digit) for digit in part] for part in _ADDRESS_PARTS], dtype=numpy.uint8)
+
+
+def _addresses_to_bytes_numpy(addresses):
+    """
+    Converts a sequence of addresses to a byte string with NumPy.
+
+    Args:
+        addresses: A sequence of strings which represent fully qualified addresses.
+
+    Returns:
+        >>> _addresses_to_bytes_numpy(['1111-1111-1111', '1234-1234-4444'])
+        '\x00\x00\x00\x1b\x1b\xff'
+        >>> _addresses_to_bytes_numpy(['1111-1111-1111', '1234-1234-5555'])
+        None
+    """
+    for address in addresses:
+        if 14 != len(address):
+            return None
+    value = ''.join(addresses)
+    digits = numpy.frombuffer(value, dtype=numpy.uint8).reshape(-1, 14)
+    if (digits[:, 4] != 0x2d).any() or (digits[:, 9] != 0x2d).any():
+        return None
+    # Digits "1" to "4" become 0 to 3, all other characters wrap around.
+    digits = digits[:, [0, 1, 2, 3, 5, 6, 7, 8, 10, 11, 12, 13]] - numpy.uint8(0x31)
+    if (digits > 3).any():
+        return None
+    digits = digits.reshape(-1, 4)
+    return ( digits[:, 0] << 6
+           | digits[:, 1] << 4
+           | digits[:, 2] << 2
+           | digits[:, 3]
+           ).tobytes()
+
+def _bytes_to_addresses_numpy(value):
+    """
+    Converts a byte string to a list of addresses with NumPy.
+
+    Args:
+        value: Byte string (3 bytes per address).
+
+    Returns:
+        >>> _bytes_to_addresses_numpy('\x00\x00\x00\x1b\x1b\xff')
+        ['1111-1111-1111', '1234-1234-4444']
+    """
+    values = numpy.frombuffer(value, dtype=numpy.uint8).reshape(-1, 3)
+    text = numpy.empty((len(values), 14), dtype=numpy.uint8)
+    text[:, 0:4] = _ADDRESS_DIGITS[values[:, 0]]
+    text[:, 5:9] = _ADDRESS_DIGITS[values[:, 1]]
+    text[:, 10:14] = _ADDRESS_DIGITS[values[:, 2]]
+    text[:, 4] = text[:, 9] = 0x2d
+    text = text.tobytes()
+    return [text[i:i + 14] for i in range(0, len(text), 14)]
+
+def _round_seconds(seconds):
+    """
+    Rounds the given value of seconds to a multiple of 0.25 which is compatible with FS20.
+
+    Args:
+        seconds: Float value of seconds.
+
+    Returns:
+        >>> _round_seconds(4812.35)
+        4812.25
+    """
+    offset = 0.25 - (seconds % 0.25)
+    if 0.25 == offset:
+        offset = 0
+    if 0.125 > offset or 0.250 > seconds:
+        seconds += offset
+    else:
+        seconds -= seconds % 0.25
+    return seconds
+
+def _time_string_to_seconds(time_string):
+    """
+    Converts a time string to a value of seconds which is compatible with FS20.
+
+    Args:
+        time_string: A time string like "%H:%M:%S.%f".
+
+    Returns:
+        >>> _time_string_to_seconds('01:20:12.350')
+        4812.25
+
+    Raises:
+        ValueError: If the given time string doesn't match "%H:%M:%S.%f".
+    """
+    match = _TIME_STRING.match(time_string)
+    if match is not None:
+        hours, minutes, seconds, fraction = match.groups()
+        if 24 > int(hours) and 60 > int(minutes) and 60 > int(seconds):
+            return _round_seconds( int(hours)   * 3600
+                                 + int(minutes) * 60
+                                 + int(seconds)
+                                 + float('0.' + fraction)
+                                 )
+    # Let strptime() handle (or reject) all other formats.
+    return datetime_to_seconds(datetime.strptime(time_string, '%H:%M:%S.%f'))
 
 def address_part_to_byte(part):
     """
@@ -38,8 +185,11 @@ def address_part_to_byte(part):
         >>> address_part_to_byte('4444')
         '\xff'
     """
+    part = str(part)
+    if part in _ADDRESS_PART_BYTES:
+        return _ADDRESS_PART_BYTES[part]
     int_value = 0;
-    for str_value in str(part):
+    for str_value in part:
         int_value <<= 2
         int_value += int(str_value) - 1
     return chr(int_value)
@@ -59,16 +209,49 @@ def address_to_byte(address):
         InvalidInput: If the given address is invalid.
     """
     address = str(address).split('-')
-    if (3 == len(address)                 and
-        is_valid_address_part(address[0]) and
-        is_valid_address_part(address[1]) and
-        is_valid_address_part(address[2])):
-        return ( address_part_to_byte(address[0])
-               + address_part_to_byte(address[1])
-               + address_part_to_byte(address[2])
-               )
+    if 3 == len(address):
+        try:
+            return ( _ADDRESS_PART_BYTES[address[0]]
+                   + _ADDRESS_PART_BYTES[address[1]]
+                   + _ADDRESS_PART_BYTES[address[2]]
+                   )
+        except KeyError:
+            pass
     raise InvalidInput('Invalid address given (e.g. "1234-1234-1234" expected).')
 
+def addresses_to_bytes(addresses):
+    """
+    Converts a sequence of addresses to one byte string (3 bytes per address).
+
+    Large sequences are converted with NumPy (if installed).
+
+    Args:
+        addresses: A sequence of strings which represent fully qualified addresses.
+
+    Returns:
+        >>> addresses_to_bytes(['1111-1111-1111', '1234-1234-4444'])
+        '\x00\x00\x00\x1b\x1b\xff'
+
+    Raises:
+        InvalidInput: If one of the given addresses is invalid.
+    """
+    if numpy is not None and NUMPY_THRESHOLD <= len(addresses):
+        try:
+            value = _addresses_to_bytes_numpy(addresses)
+        except TypeError:
+            value = None
+        if value is not None:
+            return value
+    parts = _ADDRESS_PART_BYTES
+    value = []
+    try:
+        for address in addresses:
+            first, second, third = address.split('-')
+            value.append(parts[first] + parts[second] + parts[third])
+    except (AttributeError, KeyError, ValueError):
+        raise InvalidInput('Invalid address given (e.g. "1234-1234-1234" expected).')
+    return ''.join(value)
+
 def byte_to_address(value):
     """
     Converts a byte string to an address.
@@ -84,9 +267,10 @@ def byte_to_address(value):
         InvalidInput: If the given value is invalid.
     """
     if 3 == len(str(value)):
-        return '%s-%s-%s' % (byte_to_address_part(value[0]),
-                             byte_to_address_part(value[1]),
-                             byte_to_address_part(value[2]))
+        return '%s-%s-%s' % ( _ADDRESS_PARTS[ord(value[0])]
+                            , _ADDRESS_PARTS[ord(value[1])]
+                            , _ADDRESS_PARTS[ord(value[2])]
+                            )
     raise InvalidInput('Invalid address given (3 bytes expected).')
 
 def byte_to_address_part(value):
@@ -102,10 +286,48 @@ def byte_to_address_part(value):
         >>> byte_to_address_part('\xff')
         '4444'
     """
-    address_part = ''
-    for i in [3, 2, 1, 0]:
-        address_part += str(((ord(value) >> i * 2) & 0x03) + 1)
-    return address_part
+    return _ADDRESS_PARTS[ord(value)]
+
+def bytes_to_addresses(buffer):
+    """
+    Converts a buffer of addresses (3 bytes per address) to a list of addresses.
+
+    Large buffers are converted with NumPy (if installed).
+
+    Args:
+        buffer: Byte string, byte array or array of unsigned bytes (e.g. array('B') or a NumPy uint8 array).
+
+    Returns:
+        >>> bytes_to_addresses('\x00\x00\x00\x1b\x1b\xff')
+        ['1111-1111-1111', '1234-1234-4444']
+
+    Raises:
+        InvalidInput: If the size of the given buffer is not a multiple of 3 bytes.
+    """
+    values = bytearray(buffer)
+    if not 0 == len(values) % 3:
+        raise InvalidInput('Invalid buffer given (multiple of 3 bytes expected).')
+    if numpy is not None and 3 * NUMPY_THRESHOLD <= len(values):
+        return _bytes_to_addresses_numpy(values)
+    parts = _ADDRESS_PARTS
+    return [ '%s-%s-%s' % (parts[values[i]], parts[values[i + 1]], parts[values[i + 2]])
+             for i in range(0, len(values), 3)
+           ]
+
+def byte_to_seconds(value):
+    """
+    Converts a byte string to a value of seconds.
+
+    Args:
+        value: Byte string.
+
+    Returns:
+        >>> byte_to_seconds('\x01')
+        0.25
+        >>> byte_to_seconds('\xcf')
+        15360.0
+    """
+    return _TIME_SECONDS[ord(value)]
 
 def byte_to_time_string(value):
     """
@@ -120,7 +342,7 @@ def byte_to_time_string(value):
         >>> byte_to_time_string('\xcf')
         '04:16:0.000'
     """
-    seconds = 2**(ord(value) >> 4) * (ord(value) & 0x0f) * 0.25
+    seconds = _TIME_SECONDS[ord(value)]
     hours = seconds / 3600
     seconds %= 3600
     minutes = seconds / 60
@@ -138,19 +360,50 @@ def datetime_to_seconds(datetime):
         >>> datetime_to_seconds(datetime.strptime('01:20:12.350', '%H:%M:%S.%f'))
         4812.250
     """
-    seconds = ( datetime.hour   * 3600
-              + datetime.minute * 60
-              + datetime.second
-              + float(datetime.microsecond) / 10**6
-              )
-    offset = 0.25 - (seconds % 0.25)
-    if 0.25 == offset:
-        offset = 0
-    if 0.125 > offset or 0.250 > seconds:
-        seconds += offset
-    else:
-        seconds -= seconds % 0.25
-    return seconds
+    return _round_seconds( datetime.hour   * 3600
+                         + datetime.minute * 60
+                         + datetime.second
+                         + float(datetime.microsecond) / 10**6
+                         )
+
+def is_function_group_address(address):
+    """
+    Returns TRUE if the given byte string is a function group address (e.g. "1234-1234-4412").
+
+    Args:
+        address: Byte string which represents a fully qualified address.
+
+    Returns:
+        >>> is_function_group_address('\x1b\x1b\xf1')
+        True
+    """
+    return 0xf0 == ord(address[2]) & 0xf0 and not 0x0f == ord(address[2]) & 0x0f
+
+def is_global_master_address(address):
+    """
+    Returns TRUE if the given byte string is a global master address (e.g. "1234-1234-4444").
+
+    Args:
+        address: Byte string which represents a fully qualified address.
+
+    Returns:
+        >>> is_global_master_address('\x1b\x1b\xff')
+        True
+    """
+    return 0xff == ord(address[2])
+
+def is_local_master_address(address):
+    """
+    Returns TRUE if the given byte string is a local master address (e.g. "1234-1234-1244").
+
+    Args:
+        address: Byte string which represents a fully qualified address.
+
+    Returns:
+        >>> is_local_master_address('\x1b\x1b\x1f')
+        True
+    """
+    return 0x0f == ord(address[2]) & 0x0f and not 0xf0 == ord(address[2]) & 0xf0
 
 def is_valid_address_part(part):
     """
@@ -165,12 +418,7 @@ def is_valid_address_part(part):
         >>> is_valid_address_part(4448)
         False
     """
-    if 4 == len(str(part)):
-        for i in str(part):
-            if not 1 <= int(i) <= 4:
-                return False
-        return True
-    return False
+    return str(part) in _ADDRESS_PART_BYTES
 
 def time_string_to_byte(time_string):
     """
@@ -184,17 +432,56 @@ def time_string_to_byte(time_string):
         '\x58'
         >>> time_string_to_byte('04:16:0.0')
         '\xcf'
+
+    Raises:
+        InvalidInput: If the given time is out of range.
+    """
+    return time_to_byte(time_string)
+
+def time_to_byte(value):
     """
-    seconds = datetime_to_seconds(datetime.strptime(time_string, '%H:%M:%S.%f'))
-    if 0.0 == seconds:
-        return '\x00'
-    if not seconds <= 15360.0:
+    Converts a time to the byte string of the nearest duration FS20 supports.
+
+    If two durations are equally near, the one with the finer resolution
+    (lower high nibble) and then the shorter one is used. Results are cached.
+
+    Args:
+        value: Seconds, a timedelta object or a time string like "%H:%M:%S.%f" (between 0ms and 4h 16m).
+
+    Returns:
+        >>> time_to_byte(64)
+        '\x58'
+        >>> time_to_byte(timedelta(minutes=1, seconds=4))
+        '\x58'
+        >>> time_to_byte('00:00:5.75')
+        '\x1b'
+
+    Raises:
+        InvalidInput: If the given time is out of range.
+    """
+    try:
+        return _TIME_CACHE[value]
+    except (KeyError, TypeError):
+        pass
+    if isinstance(value, _string_types):
+        seconds = _time_string_to_seconds(value)
+    elif isinstance(value, timedelta):
+        seconds = _round_seconds(value.total_seconds())
+    else:
+        seconds = _round_seconds(float(value))
+    if not 0.0 <= seconds <= 15360.0:
         raise InvalidInput('Only times between 0ms and 4h 16m are supported.')
-    high_nibble = int(floor(log(seconds, 2))) - 1
-    if 0 > high_nibble:
-        high_nibble = 0
-    low_nibble = int(seconds / (2**high_nibble * 0.25))
-    return chr((high_nibble << 4) + low_nibble)
+    i = bisect_left(_TIME_DURATIONS, seconds)
+    if 0 < i:
+        # Compare the nearest shorter and longer duration.
+        shorter = (seconds - _TIME_DURATIONS[i - 1], ord(_TIME_BYTES[i - 1]) >> 4)
+        longer = (_TIME_DURATIONS[i] - seconds, ord(_TIME_BYTES[i]) >> 4)
+        if shorter <= longer:
+            i -= 1
+    if _TIME_CACHE_SIZE <= len(_TIME_CACHE):
+        _TIME_CACHE.clear()
+    _TIME_CACHE[value] = _TIME_BYTES[i]
+    return _TIME_BYTES[i]
 
 
 # Module exceptions.
@@ -6,4 +6,25 @@ import sys
 parent_dir = os.path.split(os.getcwd())[0]
 
 if os.path.exists(os.path.join(parent_dir, 'fs20')):
-    sys.path.insert(0, parent_dir)
\ No newline at end of file
+    sys.path.insert(0, parent_dir)
+
+from fs20 import connection
+from fs20 import simulator
+
+
+def install():
+    """
+    Installs the simulator if the tests should run without hardware (e.g. "FS20_SIMULATOR=1 python runall.py").
+    """
+    if os.environ.get('FS20_SIMULATOR'):
+        simulator.Simulator().install()
+    else:
+        connection.set_backend()
+
+
+if os.environ.get('FS20_SIMULATOR'):
+    from fs20.simulator import SimulatedDevice as Device
+else:
+    from usb.core import Device
+
+install()
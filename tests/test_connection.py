@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from usb.core import USBError
+
+import environment
+from environment import Device
+import fs20
+from fs20.connection import Connection
+from fs20.pce import PCE
+from fs20.pcs import PCS
+
+
+class FakeBackend:
+
+    def __init__(self, *devices):
+        self.calls = 0
+        self.devices = devices
+
+    def find(self, idVendor=None, idProduct=None, custom_match=None):
+        self.calls += 1
+        for device in self.devices:
+            if custom_match(device):
+                return device
+        return None
+
+
+class FakeDevice:
+
+    def __init__(self, bus, port_numbers):
+        self.bus = bus
+        self.port_numbers = port_numbers
+
+
+class TestConnection(unittest.TestCase):
+
+    def setUp(self):
+        self._connection = fs20.connection.get_connection(fs20.pcs.ID_VENDOR, fs20.pcs.ID_PRODUCT)
+
+    def test_close(self):
+        self.assertTrue(isinstance(self._connection.get_device(), Device))
+        self._connection.close()
+        self.assertEqual(self._connection.device, None)
+        self.assertTrue(isinstance(self._connection.get_device(), Device))
+
+    def test_find(self):
+        first = FakeDevice(1, (1,))
+        second = FakeDevice(2, (3, 1))
+        backend = FakeBackend(first, second)
+        connection = Connection(fs20.pcs.ID_VENDOR, fs20.pcs.ID_PRODUCT)
+        default = fs20.connection._backend
+        fs20.connection._backend = backend
+        try:
+            self.assertTrue(connection._find() is first)
+            # The last known path is preferred.
+            connection.bus, connection.port_numbers = second.bus, second.port_numbers
+            self.assertTrue(connection._find() is second)
+            # Each search (even a miss) enumerates only once.
+            backend.devices = ()
+            self.assertEqual(connection._find(), None)
+            self.assertEqual(backend.calls, 3)
+        finally:
+            fs20.connection._backend = default
+
+    def test_get_connection(self):
+        self.assertTrue(isinstance(self._connection, Connection))
+        self.assertTrue(self._connection is fs20.connection.get_connection(fs20.pcs.ID_VENDOR, fs20.pcs.ID_PRODUCT))
+        self.assertFalse(self._connection is fs20.connection.get_connection(fs20.pce.ID_VENDOR, fs20.pce.ID_PRODUCT))
+        self.assertTrue(PCS()._connection is PCS()._connection)
+        self.assertTrue(PCE()._connection is PCE()._connection)
+
+    def test_get_device(self):
+        device = self._connection.get_device()
+        self.assertTrue(isinstance(device, Device))
+        self.assertTrue(device is self._connection.get_device())
+        self.assertEqual(self._connection.bus, device.bus)
+
+    def test_handle_error(self):
+        connection = Connection(fs20.pcs.ID_VENDOR, fs20.pcs.ID_PRODUCT)
+        connection.device = object()
+        self.assertFalse(connection.handle_error(USBError('Operation timed out', errno=110)))
+        self.assertFalse(connection.device is None)
+        self.assertTrue(connection.handle_error(USBError('Pipe error', errno=32)))
+        self.assertEqual(connection.device, None)
+
+    def test_is_timeout(self):
+        self.assertTrue(fs20.connection.is_timeout(USBError('Operation timed out', errno=110)))
+        self.assertFalse(fs20.connection.is_timeout(USBError('Pipe error', errno=32)))
+        self.assertFalse(fs20.connection.is_timeout(ValueError()))
+
+
+def get_suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestConnection)
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(get_suite())
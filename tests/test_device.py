@@ -6,9 +6,23 @@ import unittest
 import environment
 import fs20
 from fs20.pcs import PCS
+from fs20.device import DeviceGroup
+from fs20.device import DeviceRegistry
+from fs20.device import Dimmer
 from fs20.device import Switch
 
 
+class RecordingPCS(PCS):
+
+    def __init__(self):
+        PCS.__init__(self)
+        self.sent = []
+
+    def send_dataframe(self, dataframe):
+        self.sent.append(dataframe)
+        return fs20.pcs.RESPONSE_OK
+
+
 class TestDevice(unittest.TestCase):
 
     def setUp(self):
@@ -28,14 +42,194 @@ class TestDevice(unittest.TestCase):
         self._switch.blocked = True
         self.assertRaises(fs20.device.DeviceBlocked, self._switch.on)
 
+    def test_callable_suppression(self):
+        recording = RecordingPCS()
+        switch = Switch('1111-1111-1111', transmitter=recording, suppression=60)
+        # The initial status is never trusted.
+        self.assertEqual(switch.off(), 0)
+        self.assertEqual(switch.off(), 0)
+        self.assertEqual(switch.on(), 100)
+        self.assertEqual(switch.on(), 100)
+        self.assertEqual(switch.suppressed, 2)
+        self.assertEqual(len(recording.sent), 2)
+        # Commands which don't set an absolute state are always sent.
+        switch.on_for_time_then_off(time_string='00:00:10.0')
+        switch.on_for_time_then_off(time_string='00:00:10.0')
+        self.assertEqual(len(recording.sent), 4)
+        # Stale status forces a refresh.
+        switch.suppression = 0
+        self.assertEqual(switch.off(), 0)
+        self.assertEqual(len(recording.sent), 5)
+        self.assertEqual(switch.suppressed, 2)
+        # Views of a registry.
+        registry = DeviceRegistry(transmitter=recording, suppression=60)
+        view = registry.add('1111-1111-1112', Dimmer, status=100)
+        view.on()
+        registry.get('1111-1111-1112').on()
+        self.assertEqual(registry.suppressed, 1)
+        self.assertEqual(len(recording.sent), 6)
+
     def test_callable_unknown(self):
         def unknown_command():
             self._switch.foobar()
         self.assertRaises(fs20.device.UnknownCommand, unknown_command)
 
+    def test_compiled(self):
+        self.assertTrue('on' in Switch.__dict__)
+        self.assertTrue('dim_up' in Dimmer.__dict__)
+        self.assertEqual(Switch.statuses[fs20.command.ON], 100)
+        self.assertEqual(Dimmer.statuses[fs20.command.DIM_UP], None)
+        self.assertFalse('dim_up' in Switch.__dict__)
+        self.assertTrue('change_internal_timer' in Dimmer.callables)
+        self.assertTrue('dim_brightness_level_1_in_time' in Dimmer.callables)
+        self.assertTrue('off_for_time_then_last_brightness_level' in Switch.callables)
+        for name in Dimmer.callables:
+            self.assertEqual(getattr(Dimmer, name).__name__, name)
+        self.assertTrue(callable(self._switch.reset))
+
+    def test_get_dataframe(self):
+        self.assertEqual(self._switch.get_dataframe(fs20.command.ON), '\x01\x06\xf1\x00\x00\x00\x10\x00')
+        self.assertEqual(self._switch.get_dataframe(fs20.command.ON, '00:01:4.0'), '\x01\x06\xf1\x00\x00\x00\x10\x58')
+        self.assertEqual(self._switch.get_dataframe(fs20.command.ON, interval=10), '\x01\x07\xf2\x00\x00\x00\x10\x00\x0a')
+
+    def test_transition(self):
+        recording = RecordingPCS()
+        dimmer = Dimmer('1111-1111-1111', transmitter=recording)
+        # Without duration a level command without time byte is used.
+        self.assertEqual(dimmer.get_transition(50), [(fs20.command.ON_BRIGHTNESS_LEVEL_8, 50, '00:00:0.000')])
+        self.assertEqual(dimmer.get_transition(3), [(fs20.command.OFF, 0, '00:00:0.000')])
+        self.assertEqual(dimmer.get_transition(0, 5), [(fs20.command.DIM_OFF_IN_TIME, 0, '00:00:5.000')])
+        self.assertRaises(fs20.util.InvalidInput, dimmer.get_transition, 40, tolerance=0)
+        self.assertRaises(fs20.util.InvalidInput, dimmer.get_transition, 101)
+        # The exact level wins over a cheaper one within the tolerance.
+        for level in range(1, 17):
+            status = Dimmer.statuses[getattr(fs20.command, 'ON_BRIGHTNESS_LEVEL_%i' % (level))]
+            self.assertEqual(dimmer.get_transition(status, tolerance=20)[0][1], status)
+            self.assertEqual(dimmer.get_transition(status, 10, tolerance=20)[0][1], status)
+        self.assertEqual(dimmer.transition_to(51, 10), 50)
+        self.assertEqual(recording.sent, ['\x01\x06\xf1\x00\x00\x00' + fs20.command.DIM_BRIGHTNESS_LEVEL_8_IN_TIME + '\x2a'])
+        # The dimmer is known to be at the target already.
+        self.assertEqual(dimmer.transition_to(52, 10), 50)
+        self.assertEqual(len(recording.sent), 1)
+
+
+class TestDeviceGroup(unittest.TestCase):
+
+    def setUp(self):
+        self._group = DeviceGroup()
+        self._dimmer_1 = Dimmer('1111-1111-1111')
+        self._dimmer_2 = Dimmer('1111-1111-1112')
+        self._switch = Switch('1111-1111-1113')
+        self._group.add(self._dimmer_1, '1111-1111-4411', '1111-1111-4444')
+        self._group.add(self._dimmer_2, '1111-1111-4411', '1111-1111-4444')
+        self._group.add(self._switch, '1111-1111-4444')
+
+    def test_add(self):
+        self.assertEqual(self._group.devices, [self._dimmer_1, self._dimmer_2, self._switch])
+        self.assertEqual(self._group.learned['\x00\x00\xf0'], [self._dimmer_1, self._dimmer_2])
+        self.assertEqual(self._group.learned['\x00\x00\xff'], [self._dimmer_1, self._dimmer_2, self._switch])
+        self.assertRaises(fs20.util.InvalidInput, self._group.add, self._switch, '1111-1111-1111')
+        self.assertRaises(fs20.util.InvalidInput, self._group.add, self._switch, '1111-1111-11')
+
+    def test_compile(self):
+        self.assertEqual(self._group.compile([self._dimmer_1, self._dimmer_2, self._switch]), [('\x00\x00\xff', [self._dimmer_1, self._dimmer_2, self._switch])])
+        self.assertEqual(self._group.compile([self._dimmer_1, self._dimmer_2]), [('\x00\x00\xf0', [self._dimmer_1, self._dimmer_2])])
+        self.assertEqual(self._group.compile([self._dimmer_2, self._switch]), [('\x00\x00\x01', [self._dimmer_2]), ('\x00\x00\x02', [self._switch])])
+        self.assertEqual(self._group.compile([self._switch]), [('\x00\x00\x02', [self._switch])])
+        self.assertEqual(self._group.compile([]), [])
+
+    def test_execute(self):
+        self.assertEqual(self._group.execute([self._dimmer_1, self._dimmer_2, self._switch], 'on'), [fs20.pcs.RESPONSE_OK])
+        self.assertEqual([self._dimmer_1.status, self._dimmer_2.status, self._switch.status], [100, 100, 100])
+        self._switch.blocked = True
+        self.assertEqual(self._group.execute([self._dimmer_1, self._dimmer_2, self._switch], 'off'), [fs20.pcs.RESPONSE_OK])
+        self.assertEqual([self._dimmer_1.status, self._dimmer_2.status, self._switch.status], [0, 0, 100])
+        self.assertRaises(fs20.device.UnknownCommand, self._group.execute, [self._dimmer_1], 'foobar')
+
+
+class TestDeviceRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self._registry = DeviceRegistry()
+        self._dimmer_1 = self._registry.add('1111-1111-1112', Dimmer, status=75)
+        self._dimmer_2 = self._registry.add('1111-1111-1111', Dimmer, status=25)
+        self._switch = self._registry.add('1111-1111-1113', status=None, blocked=True)
+
+    def test_add(self):
+        self.assertEqual(len(self._registry), 3)
+        self.assertEqual(list(self._registry), [self._dimmer_2, self._dimmer_1, self._switch])
+        self.assertEqual(self._registry.types, [Dimmer, Switch])
+        self.assertTrue(isinstance(self._dimmer_1, Dimmer))
+        self.assertTrue(isinstance(self._switch, Switch))
+        self.assertRaises(fs20.util.InvalidInput, self._registry.add, '1111-1111-1111')
+        self.assertRaises(fs20.util.InvalidInput, self._registry.add, '1111-1111-1114', status=101)
+        self.assertRaises(fs20.util.InvalidInput, self._registry.add, '1111-1111-1114', object)
+        self.assertEqual(len(self._registry), 3)
+
+    def test_get(self):
+        self.assertEqual(self._registry.get('\x00\x00\x01'), self._dimmer_1)
+        self.assertEqual(self._registry.get('1111-1111-1113').status, None)
+        self.assertTrue(self._registry.get('1111-1111-1113').blocked)
+        self.assertEqual(self._registry.get('1111-1111-1114'), None)
+        self.assertTrue('1111-1111-1111' in self._registry)
+
+    def test_remove(self):
+        self._registry.remove('1111-1111-1112')
+        self.assertEqual(list(self._registry), [self._dimmer_2, self._switch])
+        self.assertRaises(fs20.device.DeviceNotRegistered, getattr, self._dimmer_1, 'status')
+        self.assertRaises(fs20.device.DeviceNotRegistered, self._registry.remove, '1111-1111-1112')
+
+    def test_select(self):
+        self.assertEqual(self._registry.select(Dimmer, minimum=51), [self._dimmer_1])
+        self.assertEqual(self._registry.select(maximum=50), [self._dimmer_2])
+        self.assertEqual(self._registry.select(blocked=True), [self._switch])
+        self.assertEqual(self._registry.select(Switch), [self._switch])
+        self.assertEqual(self._registry.select(fs20.device.Device), [self._dimmer_2, self._dimmer_1, self._switch])
+
+    def test_select_large(self):
+        for i in range(200):
+            self._registry.add(chr(i) + '\x01\x00', [Dimmer, Switch][i % 2], status=[i % 101, None][i % 3 / 2], blocked=0 == i % 5)
+        numpy = fs20.util.numpy
+        try:
+            fs20.util.numpy = None
+            expected = [ self._registry.select(Dimmer, minimum=51)
+                       , self._registry.select(maximum=10, blocked=False)
+                       , self._registry.select(Switch)
+                       ]
+        finally:
+            fs20.util.numpy = numpy
+        self.assertEqual(self._registry.select(Dimmer, minimum=51), expected[0])
+        self.assertEqual(self._registry.select(maximum=10, blocked=False), expected[1])
+        self.assertEqual(self._registry.select(Switch), expected[2])
+        self.assertEqual(len(expected[2]), 101)
+
+    def test_frames(self):
+        registry = DeviceRegistry(transmitter=RecordingPCS())
+        views = [registry.add(chr(i) + '\x02\x00') for i in range(2 * fs20.device.FRAME_CACHE_SIZE)]
+        for view in views + views:
+            view.on()
+        # Each device keeps its own frames, more devices than the cache size don't evict each other.
+        self.assertEqual(len(registry._frames), len(views))
+        for view in views:
+            self.assertEqual(len(registry.get(view.address)._frames), 1)
+        registry.remove(views[0].address)
+        self.assertEqual(len(registry._frames), len(views) - 1)
+
+    def test_view(self):
+        self.assertEqual(self._dimmer_1.off(), 0)
+        self.assertEqual(self._registry.get('1111-1111-1112').status, 0)
+        self.assertRaises(fs20.device.DeviceBlocked, self._switch.on)
+        self._switch.blocked = False
+        self.assertEqual(self._switch.on(), 100)
+        self.assertEqual(self._registry.select(minimum=100), [self._switch])
+
 
 def get_suite():
-    return unittest.TestLoader().loadTestsFromTestCase(TestDevice)
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestDevice))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestDeviceGroup))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestDeviceRegistry))
+    return suite
 
 
 if __name__ == '__main__':
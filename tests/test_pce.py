@@ -2,18 +2,108 @@
 # -*- coding: utf-8 -*-
 
 from array import array
+import threading
+import time
 import unittest
 
-from usb.core import Device
-
 import environment
+from environment import Device
 import fs20
+from fs20.device import DeviceRegistry
+from fs20.device import Dimmer
+from fs20.device import Switch
+from fs20.pce import Executor
 from fs20.pce import PCE
 from fs20.pce import Receiver
 from fs20.pce import Response
 from fs20.pcs import PCS
 
 
+class MissingBackend:
+
+    def __init__(self):
+        self.calls = 0
+
+    def find(self, **kwargs):
+        self.calls += 1
+        return None
+
+
+# Pauses after the first lookup of catchall callbacks, so callbacks can be changed while a key is compiled.
+class SlowCallbacks(dict):
+
+    def __init__(self):
+        dict.__init__(self)
+        self.entered = threading.Event()
+
+    def get(self, key, default=None):
+        value = dict.get(self, key, default)
+        if (None, None) == key and not self.entered.is_set():
+            self.entered.set()
+            time.sleep(0.1)
+        return value
+
+
+class TestExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self._blocker = threading.Event()
+        self._responses = []
+
+    def callback_blocking(self, response):
+        self._blocker.wait()
+
+    def callback_failing(self, response):
+        raise CallbackCatchall()
+
+    def callback_recording(self, response):
+        self._responses.append(response)
+
+    def test___init__(self):
+        self.assertRaises(fs20.pce.InvalidInput, Executor, workers=0)
+        self.assertRaises(fs20.pce.InvalidInput, Executor, queue_size=0)
+        self.assertRaises(fs20.pce.InvalidInput, Executor, overflow='foobar')
+
+    def test_submit(self):
+        executor = Executor(workers=3)
+        responses = [Response(array('B', [17, 17, 17, 17, 17, 17, i, 0, 0, 0, 22])) for i in range(10)]
+        for response in responses:
+            executor.submit(response, (self.callback_recording,))
+        executor.submit(responses[0], (self.callback_failing, self.callback_failing))
+        executor.shutdown()
+        # Same address, so the order is kept.
+        self.assertEqual(self._responses, responses)
+        self.assertEqual(executor.failed, 2)
+
+    def test_submit_drop_newest(self):
+        executor = Executor(workers=1, queue_size=2, overflow=fs20.pce.OVERFLOW_DROP_NEWEST)
+        responses = [Response(array('B', [17, 17, 17, 17, 17, 17, i, 0, 0, 0, 22])) for i in range(5)]
+        executor.submit(responses[0], (self.callback_blocking,))
+        while executor.get_queue_depth():
+            self._blocker.wait(0.01)
+        for response in responses[1:]:
+            executor.submit(response, (self.callback_recording,))
+        self.assertEqual(executor.get_queue_depth(), 2)
+        self.assertEqual(executor.dropped, 2)
+        self._blocker.set()
+        executor.shutdown()
+        self.assertEqual(self._responses, responses[1:3])
+
+    def test_submit_drop_oldest(self):
+        executor = Executor(workers=1, queue_size=2, overflow=fs20.pce.OVERFLOW_DROP_OLDEST)
+        responses = [Response(array('B', [17, 17, 17, 17, 17, 17, i, 0, 0, 0, 22])) for i in range(5)]
+        executor.submit(responses[0], (self.callback_blocking,))
+        while executor.get_queue_depth():
+            self._blocker.wait(0.01)
+        for response in responses[1:]:
+            executor.submit(response, (self.callback_recording,))
+        self.assertEqual(executor.get_queue_depth(), 2)
+        self.assertEqual(executor.dropped, 2)
+        self._blocker.set()
+        executor.shutdown()
+        self.assertEqual(self._responses, responses[3:5])
+
+
 class TestPCE(unittest.TestCase):
 
     def setUp(self):
@@ -66,57 +156,144 @@ class TestReceiver(unittest.TestCase):
         self._receiver = Receiver()
         self._pce.reset()
 
+    def test___init__(self):
+        self.assertEqual(self._receiver.timeout, 1000)
+        self.assertEqual(self._receiver.interval, 0)
+        receiver = Receiver(timeout=100, interval=0.15)
+        self.assertEqual(receiver.timeout, 100)
+        self.assertEqual(receiver.interval, 0.15)
+
     def test_add_callback(self):
         self.assertEqual(self._receiver.callbacks, {})
         # Callback for specific address.
         self._receiver.add_callback(self.callback_address, address='1111-1111-1111')
-        self.assertEqual(self._receiver.callbacks, {'ed5ed2627e91cd1d47baead8ff7899a5': [self.callback_address]})
+        self.assertEqual(self._receiver.callbacks, {('\x00\x00\x00', None): [self.callback_address]})
         # Callback for specific address and command.
         self._receiver.add_callback(self.callback_address_command, address='1111-1111-1111', command=fs20.command.ON)
-        self.assertEqual(self._receiver.callbacks, { 'ed5ed2627e91cd1d47baead8ff7899a5': [self.callback_address]
-                                                   , 'a08940b3a7ad5568657b5fba5db2165c': [self.callback_address_command]
+        self.assertEqual(self._receiver.callbacks, { ('\x00\x00\x00', None): [self.callback_address]
+                                                   , ('\x00\x00\x00', '\x10'): [self.callback_address_command]
                                                    })
         # Catchall callback.
         self._receiver.add_callback(self.callback_catchall)
-        self.assertEqual(self._receiver.callbacks, { 'ed5ed2627e91cd1d47baead8ff7899a5': [self.callback_address]
-                                                   , 'a08940b3a7ad5568657b5fba5db2165c': [self.callback_address_command]
-                                                   , 'c7485dcc8d256a6f197ed7802687f252': [self.callback_catchall]
+        self.assertEqual(self._receiver.callbacks, { ('\x00\x00\x00', None): [self.callback_address]
+                                                   , ('\x00\x00\x00', '\x10'): [self.callback_address_command]
+                                                   , (None, None): [self.callback_catchall]
                                                    })
         # Yet another catchall callback (multiple callbacks for one request are possible and allowed).
         self._receiver.add_callback(self.callback_catchall)
-        self.assertEqual(self._receiver.callbacks, { 'ed5ed2627e91cd1d47baead8ff7899a5': [self.callback_address]
-                                                   , 'a08940b3a7ad5568657b5fba5db2165c': [self.callback_address_command]
-                                                   , 'c7485dcc8d256a6f197ed7802687f252': [self.callback_catchall, self.callback_catchall]
+        self.assertEqual(self._receiver.callbacks, { ('\x00\x00\x00', None): [self.callback_address]
+                                                   , ('\x00\x00\x00', '\x10'): [self.callback_address_command]
+                                                   , (None, None): [self.callback_catchall, self.callback_catchall]
                                                    })
         # Callback for specific command.
         self._receiver.add_callback(self.callback_command, command=fs20.command.ON)
-        self.assertEqual(self._receiver.callbacks, { 'ed5ed2627e91cd1d47baead8ff7899a5': [self.callback_address]
-                                                   , 'a08940b3a7ad5568657b5fba5db2165c': [self.callback_address_command]
-                                                   , 'c7485dcc8d256a6f197ed7802687f252': [self.callback_catchall, self.callback_catchall]
-                                                   , '36869acece705e939d4730507563c723': [self.callback_command]
+        self.assertEqual(self._receiver.callbacks, { ('\x00\x00\x00', None): [self.callback_address]
+                                                   , ('\x00\x00\x00', '\x10'): [self.callback_address_command]
+                                                   , (None, None): [self.callback_catchall, self.callback_catchall]
+                                                   , (None, '\x10'): [self.callback_command]
                                                    })
+        # Invalid address.
+        self.assertRaises(fs20.util.InvalidInput, self._receiver.add_callback, self.callback_address, address='1111-1111-5555')
+
+    def test__compile(self):
+        self._receiver.add_callback(self.callback_catchall)
+        self._receiver.add_callback(self.callback_command, command=fs20.command.ON)
+        self._receiver.add_callback(self.callback_address, address='1111-1111-1111')
+        self._receiver.add_callback(self.callback_address_command, address='1111-1111-1111', command=fs20.command.ON)
+        self.assertEqual(self._receiver._dispatch, {('\x00\x00\x00', '\x10'): ( self.callback_address_command
+                                                                              , self.callback_address
+                                                                              , self.callback_command
+                                                                              , self.callback_catchall
+                                                                              )})
+        self.assertEqual(self._receiver._compile(('\x00\x00\xff', '\x10')), (self.callback_command, self.callback_catchall))
+        self.assertEqual(self._receiver._compile(('\x00\x00\xff', None)), (self.callback_catchall,))
+        self.assertEqual(self._receiver._compile(('\x00\x00\x00', None)), (self.callback_address, self.callback_catchall))
+        self._receiver.clear_callbacks()
+        self.assertEqual(self._receiver.callbacks, {})
+        self.assertEqual(self._receiver._dispatch, {})
+
+    def test__compile_concurrent(self):
+        self._receiver.callbacks = SlowCallbacks()
+        key = ('\x00\x00\xff', '\x10')
+        thread = threading.Thread(target=self._receiver._compile, args=(key,))
+        thread.start()
+        self._receiver.callbacks.entered.wait()
+        # A catchall callback is added while the key is compiled without it.
+        self._receiver.add_callback(self.callback_catchall)
+        thread.join()
+        # The key is either compiled again or up to date, but never outdated.
+        self.assertTrue(self._receiver._dispatch.get(key) in (None, (self.callback_catchall,)))
+        self.assertEqual(self._receiver._compile(key), (self.callback_catchall,))
+
+    def test_mirror(self):
+        dimmer = Dimmer('1111-1111-1111', transmitter=self._pcs)
+        switch = Switch('1111-1111-1112', transmitter=self._pcs)
+        self._receiver.mirror([dimmer, switch])
+        self._receiver.add_callback(self.callback_catchall)
+        self.assertEqual(self._pcs.send_once('\x00\x00\x00', fs20.command.ON_BRIGHTNESS_LEVEL_8), fs20.pcs.RESPONSE_OK)
+        self.assertRaises(CallbackCatchall, self._receiver.run)
+        self.assertEqual(self._pcs.send_once('\x00\x00\x01', fs20.command.TOGGLE), fs20.pcs.RESPONSE_OK)
+        self.assertRaises(CallbackCatchall, self._receiver.run)
+        self.assertEqual((dimmer.status, switch.status), (50, None))
+        # Registries are looked up directly.
+        registry = DeviceRegistry(transmitter=self._pcs)
+        self._receiver.mirror(registry)
+        registry.add('1111-1111-1111', Dimmer)
+        self.assertEqual(self._pcs.send_once('\x00\x00\x00', fs20.command.ON), fs20.pcs.RESPONSE_OK)
+        self.assertRaises(CallbackCatchall, self._receiver.run)
+        self.assertEqual(registry.get('1111-1111-1111').status, 100)
+        self._receiver.mirror(None)
+        self.assertEqual(self._pcs.send_once('\x00\x00\x00', fs20.command.OFF), fs20.pcs.RESPONSE_OK)
+        self.assertRaises(CallbackCatchall, self._receiver.run)
+        self.assertEqual(registry.get('1111-1111-1111').status, 100)
+
+    def test_remove_callback(self):
+        self._receiver.add_callback(self.callback_catchall)
+        self._receiver.add_callback(self.callback_address_command, address='1111-1111-1111', command=fs20.command.ON)
+        self._receiver.remove_callback(self.callback_catchall)
+        self.assertEqual(self._receiver.callbacks, {('\x00\x00\x00', '\x10'): [self.callback_address_command]})
+        self.assertEqual(self._receiver._dispatch, {('\x00\x00\x00', '\x10'): (self.callback_address_command,)})
+        # Unknown callbacks are ignored.
+        self._receiver.remove_callback(self.callback_command, command=fs20.command.ON)
+        self._receiver.remove_callback(self.callback_address_command, address='1111-1111-1111', command=fs20.command.ON)
+        self.assertEqual(self._receiver.callbacks, {})
+        self.assertEqual(self._receiver._dispatch, {})
 
     def test_run(self):
         # Callback for specific address.
         self._receiver.add_callback(self.callback_address, address='1111-1111-1111')
         self.assertEqual(self._pcs.send_once('\x00\x00\x00', fs20.command.ON), fs20.pcs.RESPONSE_OK)
         self.assertRaises(CallbackAddress, self._receiver.run)
-        self._receiver.callbacks = {}
+        self._receiver.clear_callbacks()
         # Callback for specific address and command.
         self._receiver.add_callback(self.callback_address_command, address='1111-1111-1111', command=fs20.command.ON)
         self.assertEqual(self._pcs.send_once('\x00\x00\x00', fs20.command.ON), fs20.pcs.RESPONSE_OK)
         self.assertRaises(CallbackAddressCommand, self._receiver.run)
-        self._receiver.callbacks = {}
+        self._receiver.clear_callbacks()
         # Catchall callback.
         self._receiver.add_callback(self.callback_catchall)
         self.assertEqual(self._pcs.send_once('\x00\x00\x00', fs20.command.ON), fs20.pcs.RESPONSE_OK)
         self.assertRaises(CallbackCatchall, self._receiver.run)
-        self._receiver.callbacks = {}
+        self._receiver.clear_callbacks()
         # Callback for specific command.
         self._receiver.add_callback(self.callback_command, command=fs20.command.ON)
         self.assertEqual(self._pcs.send_once('\x00\x00\x00', fs20.command.ON), fs20.pcs.RESPONSE_OK)
         self.assertRaises(CallbackCommand, self._receiver.run)
-        self._receiver.callbacks = {}
+        self._receiver.clear_callbacks()
+
+    def test_run_missing_device(self):
+        backend = MissingBackend()
+        fs20.connection.set_backend(backend)
+        try:
+            receiver = Receiver()
+            receiver.start()
+            time.sleep(0.5)
+            receiver.stop()
+            receiver.join()
+        finally:
+            environment.install()
+        # Failing reads back off instead of searching the device continuously.
+        self.assertTrue(1 <= backend.calls <= 5)
 
     def test_stop(self):
         self.assertTrue(self._receiver.receiving)
@@ -130,15 +307,22 @@ class TestResponse(unittest.TestCase):
         # Response without time value.
         response = Response(array('B', [17, 17, 17, 17, 17, 17, 22, 0, 0, 0, 22]))
         self.assertEquals(response.address, '1111-1111-1111')
+        self.assertEquals(response.raw_address, '\x00\x00\x00')
         self.assertEquals(response.command, fs20.command.ON_BRIGHTNESS_LEVEL_16)
         self.assertEquals(response.name, 'ON_BRIGHTNESS_LEVEL_16')
         self.assertEquals(response.time, None)
         # Response with time value.
         response = Response(array('B', [18, 52, 18, 52, 17, 17, 4, 20, 145, 82, 22]))
         self.assertEquals(response.address, '1234-1234-1111')
+        self.assertEquals(response.raw_address, '\x1b\x1b\x00')
         self.assertEquals(response.command, fs20.command.DIM_BRIGHTNESS_LEVEL_4_IN_TIME)
         self.assertEquals(response.name, 'DIM_BRIGHTNESS_LEVEL_4_IN_TIME')
         self.assertEquals(response.time, 12288.0)
+        # Response with unknown command.
+        response = Response(array('B', [17, 17, 17, 17, 17, 17, 50, 0, 0, 0, 22]))
+        self.assertEquals(response.command, None)
+        self.assertEquals(response.name, 'UNKNOWN')
+        self.assertEquals(response.time, None)
 
     def test__str__(self):
         response = Response(array('B', [17, 17, 17, 17, 17, 17, 22, 0, 0, 0, 22]))
@@ -166,6 +350,7 @@ class CallbackCommand(Exception):
 
 def get_suite():
     suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestExecutor))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestPCE))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestReceiver))
     suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestResponse))
@@ -1,11 +1,15 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from array import array
+import threading
+import time
 import unittest
 
-from usb.core import Device
+import usb.core
 
 import environment
+from environment import Device
 import fs20
 from fs20.pcs import PCS
 
@@ -44,9 +48,84 @@ class TestPCS(unittest.TestCase):
         self.assertRaises(fs20.pcs.DeviceDataframeMismatch, self._pcs._write, '\x01\x03\xf1\x00\x00\x00\x00')
         self.assertEqual(self._pcs._write('\xff\x00', False)[0], fs20.pcs.RESPONSE_OK)
 
+    def test_get_dataframe(self):
+        self.assertEqual(self._pcs.get_dataframe('\x00\x00\x00', fs20.command.ON), '\x01\x06\xf1\x00\x00\x00\x10\x00')
+        self.assertEqual(self._pcs.get_dataframe('\x00\x00\x00', fs20.command.DIM_OFF_IN_TIME, '\x0f'), '\x01\x06\xf1\x00\x00\x00\x20\x0f')
+        self.assertEqual(self._pcs.get_dataframe('\x00\x00\x00', fs20.command.ON, interval=1), '\x01\x07\xf2\x00\x00\x00\x10\x00\x01')
+        self.assertEqual(self._pcs.get_dataframe('\x00\x00\x00', fs20.command.ON, interval=10), '\x01\x07\xf2\x00\x00\x00\x10\x00\x0a')
+        self.assertRaises(fs20.pcs.InvalidInput, self._pcs.get_dataframe, '\x00\x00', fs20.command.ON)
+        self.assertRaises(fs20.pcs.InvalidInput, self._pcs.get_dataframe, '\x00\x00\x00', fs20.command.ON, interval=0)
+
     def test_get_version(self):
         self.assertEqual(self._pcs.get_version(), 'v1.7')
 
+    def test__write_concurrent(self):
+        # Each write gets its own response, even with concurrent callers.
+        class FakeDevice:
+            def read(self, endpoint, size, timeout=None):
+                time.sleep(0.001)
+                return array('B', [0x02, 0x03, 0xa0, fs20.pcs.RESPONSE_OK, ord(self.dataframe[-1])])
+            def write(self, endpoint, dataframe):
+                self.dataframe = dataframe
+        self._pcs._get_device = lambda: FakeDevice.device
+        FakeDevice.device = FakeDevice()
+        mismatches = []
+        def write(i):
+            for j in range(10):
+                if not self._pcs._write('\x01\x01' + chr(i))[1] == i:
+                    mismatches.append(i)
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(mismatches, [])
+
+    def test_get_pcs(self):
+        self.assertTrue(isinstance(fs20.pcs.get_pcs(), PCS))
+        self.assertTrue(fs20.pcs.get_pcs() is fs20.pcs.get_pcs())
+
+    def test_send_batch(self):
+        self.assertEqual(self._pcs.send_batch([]), [])
+        self.assertEqual(self._pcs.send_batch([ ('\x00\x00\x00', fs20.command.ON)
+                                              , ('\x00\x00\x01', fs20.command.DIM_OFF_IN_TIME, '\x0f')
+                                              , ('\x00\x00\x02', fs20.command.OFF)
+                                              ]), [fs20.pcs.RESPONSE_OK] * 3)
+
+    def test_send_batch_invalid(self):
+        # Invalid commands are detected before sending.
+        written = []
+        self._pcs._write = lambda dataframe, with_response=True: written.append(dataframe)
+        self.assertRaises(fs20.pcs.InvalidInput, self._pcs.send_batch, [('\x00\x00\x00', fs20.command.ON), ('\x00', fs20.command.ON)])
+        self.assertEqual(written, [])
+
+    def test_send_batch_usb_error(self):
+        # Errors of each frame are returned, the other frames are still sent.
+        written = []
+        def write(dataframe, with_response=True):
+            if '\x01' == dataframe[5]:
+                raise usb.core.USBError('Pipe error', errno=32)
+            if '\x02' == dataframe[5]:
+                raise fs20.pcs.DeviceNotFound('FS20 PCS not found.')
+            written.append(dataframe)
+            return array('B', [fs20.pcs.RESPONSE_OK])
+        self._pcs._write = write
+        results = self._pcs.send_batch([ ('\x00\x00\x00', fs20.command.ON)
+                                       , ('\x00\x00\x01', fs20.command.ON)
+                                       , ('\x00\x00\x02', fs20.command.ON)
+                                       , ('\x00\x00\x03', fs20.command.ON)
+                                       ])
+        self.assertEqual(results[0], fs20.pcs.RESPONSE_OK)
+        self.assertTrue(isinstance(results[1], usb.core.USBError))
+        self.assertTrue(isinstance(results[2], fs20.pcs.DeviceNotFound))
+        self.assertEqual(results[3], fs20.pcs.RESPONSE_OK)
+        self.assertEqual(len(written), 2)
+
+    def test_send_dataframe(self):
+        self.assertEqual(self._pcs.send_dataframe(self._pcs.get_dataframe('\x00\x00\x00', fs20.command.ON)), fs20.pcs.RESPONSE_OK)
+        self.assertEqual(self._pcs.send_dataframe(self._pcs.get_dataframe('\x00\x00\x00', fs20.command.DIM_DOWN, interval=5)), fs20.pcs.RESPONSE_OK)
+        self.assertEqual(self._pcs.stop_multiple_sending(), fs20.pcs.RESPONSE_STOP_MULTIPLE_SENDING_OK)
+
     def test_send_multiple(self):
         self.assertEqual(self._pcs.send_multiple('\x00\x00\x00', fs20.command.DIM_DOWN, interval=5), fs20.pcs.RESPONSE_OK)
         self.assertRaises(fs20.pcs.InvalidInput, self._pcs.send_multiple, '\x00\x00\x00', fs20.command.ON, interval=0)
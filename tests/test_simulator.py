@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+import time
+import unittest
+
+import environment
+import fs20
+from fs20.pce import PCE
+from fs20.pcs import PCS
+from fs20.simulator import SimulatedPCE
+from fs20.simulator import SimulatedPCS
+from fs20.simulator import Simulator
+
+
+class TestSimulator(unittest.TestCase):
+
+    def setUp(self):
+        self._simulator = Simulator(repeat_delay=0.01)
+        self._simulator.install()
+        self._pce = PCE()
+        self._pcs = PCS()
+
+    def tearDown(self):
+        self._simulator.uninstall()
+        environment.install()
+
+    def test__get_frame(self):
+        self.assertEqual(self._simulator._get_frame('\x00\x00\x00', fs20.command.ON, '\x00'), array('B', [2, 11, 17, 17, 17, 17, 17, 17, 22, 0, 0, 0, 22]))
+        self.assertEqual(self._simulator._get_frame('\x1b\x1b\x00', fs20.command.DIM_BRIGHTNESS_LEVEL_4_IN_TIME, '\xc0'), array('B', [2, 11, 18, 52, 18, 52, 17, 17, 4, 16, 0, 0, 22]))
+        self.assertEqual(self._simulator._get_frame('\x1b\x1b\x00', fs20.command.DIM_BRIGHTNESS_LEVEL_4_IN_TIME, '\xcc'), array('B', [2, 11, 18, 52, 18, 52, 17, 17, 4, 20, 145, 82, 22]))
+
+    def test_buffer_size(self):
+        self._simulator.buffer_size = 2
+        self.assertTrue(self._simulator.send('1234-1234-1111', fs20.command.TOGGLE))
+        self.assertTrue(self._simulator.send('1234-1234-1111', fs20.command.TOGGLE))
+        self.assertFalse(self._simulator.send('1234-1234-1111', fs20.command.TOGGLE))
+        self.assertEqual(self._simulator.get_pending(), 2)
+        self.assertEqual(self._simulator.dropped, 1)
+
+    def test_find(self):
+        self.assertTrue(isinstance(self._simulator.find(idVendor=fs20.pcs.ID_VENDOR, idProduct=fs20.pcs.ID_PRODUCT), SimulatedPCS))
+        self.assertTrue(isinstance(self._simulator.find(idVendor=fs20.pce.ID_VENDOR, idProduct=fs20.pce.ID_PRODUCT), SimulatedPCE))
+        self.assertEqual(self._simulator.find(idVendor=0x1234, idProduct=fs20.pcs.ID_PRODUCT), None)
+        self.assertEqual(self._simulator.find(idVendor=fs20.pcs.ID_VENDOR, idProduct=fs20.pcs.ID_PRODUCT, custom_match=lambda device: False), None)
+        self.assertTrue(self._pcs._get_device() is self._simulator.pcs)
+        self.assertTrue(self._pce._get_device() is self._simulator.pce)
+
+    def test_latency(self):
+        self._simulator.latency = 0.05
+        self.assertEqual(self._pcs.send_once('\x00\x00\x00', fs20.command.ON), fs20.pcs.RESPONSE_OK)
+        self.assertRaises(fs20.pce.DeviceInvalidResponse, self._pce.get_response, 10)
+        self.assertEqual(self._simulator.get_pending(), 1)
+        start = time.time()
+        self.assertEqual(self._pce.get_response(1000).command, fs20.command.ON)
+        self.assertTrue(time.time() - start < 0.1)
+
+    def test_send(self):
+        self._simulator.send('1234-1234-1111', fs20.command.TOGGLE)
+        response = self._pce.get_response()
+        self.assertEqual(response.address, '1234-1234-1111')
+        self.assertEqual(response.command, fs20.command.TOGGLE)
+        self.assertEqual(self._simulator.sent, 0)
+
+    def test_send_multiple(self):
+        self.assertEqual(self._pcs.send_multiple('\x00\x00\x00', fs20.command.DIM_UP, interval=3), fs20.pcs.RESPONSE_OK)
+        for i in range(3):
+            self.assertEqual(self._pce.get_response(1000).command, fs20.command.DIM_UP)
+        self.assertEqual(self._simulator.sent, 3)
+        self.assertEqual(self._pcs.stop_multiple_sending(), fs20.pcs.RESPONSE_STOP_MULTIPLE_SENDING_NOT_SENT)
+        self.assertEqual(self._pcs.send_multiple('\x00\x00\x00', fs20.command.DIM_UP, interval=100), fs20.pcs.RESPONSE_OK)
+        self.assertEqual(self._pcs.stop_multiple_sending(), fs20.pcs.RESPONSE_STOP_MULTIPLE_SENDING_OK)
+        self.assertTrue(self._simulator.get_pending() <= 1)
+        # Repeats which already went on air are not stopped.
+        self.assertEqual(self._pcs.send_multiple('\x00\x00\x00', fs20.command.DIM_DOWN, interval=100), fs20.pcs.RESPONSE_OK)
+        time.sleep(0.035)
+        self.assertEqual(self._pcs.send_once('\x00\x00\x01', fs20.command.ON), fs20.pcs.RESPONSE_OK)
+        commands = []
+        while True:
+            try:
+                commands.append(self._pce.get_response(10).command)
+            except fs20.pce.DeviceInvalidResponse:
+                break
+        self.assertTrue(3 <= commands.count(fs20.command.DIM_DOWN) < 10)
+        self.assertEqual(commands[-1], fs20.command.ON)
+
+
+def get_suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestSimulator)
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(get_suite())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import environment
+import fs20
+from fs20.device import DeviceRegistry
+from fs20.device import Dimmer
+from fs20.device import Switch
+from fs20.state import StateFile
+
+
+class TestStateFile(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'state')
+        self._state = StateFile(self._path)
+
+    def tearDown(self):
+        self._state.close()
+        shutil.rmtree(self._directory)
+
+    def test_device(self):
+        dimmer = Dimmer('1234-1234-1111', state=self._state)
+        self.assertEqual(dimmer.status, 0)
+        dimmer.status = 75
+        dimmer.blocked = True
+        self.assertEqual(self._state.get('\x1b\x1b\x00'), (75, True))
+        dimmer = Dimmer('1234-1234-1111', state=self._state)
+        self.assertEqual(dimmer.status, 75)
+        self.assertTrue(dimmer.blocked)
+
+    def test_get(self):
+        self.assertEqual(self._state.get('1234-1234-1111'), None)
+        self._state.set('1234-1234-1111', 75)
+        self._state.set('1234-1234-1112', None, True)
+        self.assertEqual(self._state.get('1234-1234-1111'), (75, False))
+        self.assertEqual(self._state.get('1234-1234-1112'), (None, True))
+        self.assertRaises(fs20.util.InvalidInput, self._state.get, '1234-1234-111')
+
+    def test_open(self):
+        self._state.set('1234-1234-1111', 75)
+        self._state.close()
+        self._state = StateFile(self._path)
+        self.assertEqual(self._state.get('1234-1234-1111'), (75, False))
+        with open(os.path.join(self._directory, 'invalid'), 'w') as file:
+            file.write('foobar')
+        self.assertRaises(fs20.state.InvalidStateFile, StateFile, os.path.join(self._directory, 'invalid'))
+
+    def test_registry(self):
+        registry = DeviceRegistry(state=self._state)
+        registry.add('1234-1234-1111', Dimmer, status=75)
+        registry.add('1234-1234-1112', Switch).blocked = True
+        registry.get('1234-1234-1111').status = 50
+        registry = DeviceRegistry(state=self._state)
+        self.assertEqual(registry.add('1234-1234-1111', Dimmer).status, 50)
+        self.assertTrue(registry.add('1234-1234-1112', Switch).blocked)
+        self.assertEqual(registry.add('1234-1234-1113', Switch, status=None).status, None)
+
+    def test_remove(self):
+        self._state.set('1234-1234-1111', 75)
+        self._state.remove('1234-1234-1111')
+        self.assertEqual(self._state.get('1234-1234-1111'), None)
+
+    def test_set(self):
+        self.assertRaises(fs20.util.InvalidInput, self._state.set, '1234-1234-1111', 101)
+        self._state.set('\x1b\x1b\x00', 100)
+        self.assertEqual(self._state.get('1234-1234-1111'), (100, False))
+
+
+def get_suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestStateFile)
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(get_suite())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import environment
+import fs20
+from fs20 import stats
+from fs20.pce import PCE
+from fs20.pce import Receiver
+from fs20.pcs import PCS
+from fs20.simulator import Simulator
+
+
+class TestStats(unittest.TestCase):
+
+    def setUp(self):
+        stats.reset()
+        stats.enable()
+
+    def tearDown(self):
+        stats.disable()
+        stats.reset()
+
+    def test_disable(self):
+        stats.disable()
+        self.assertFalse(stats.snapshot()['enabled'])
+        stats.enable()
+        self.assertTrue(stats.snapshot()['enabled'])
+
+    def test_get_percentile(self):
+        histogram = stats.Histogram()
+        self.assertEqual(histogram.get_percentile(50), None)
+        for i in range(98):
+            histogram.add(0.0002)
+        histogram.add(0.003)
+        histogram.add(10.0)
+        self.assertEqual(histogram.get_percentile(50), 0.00025)
+        self.assertEqual(histogram.get_percentile(99), 0.005)
+        self.assertEqual(histogram.get_percentile(100), 10.0)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.max, 10.0)
+        self.assertEqual(histogram.min, 0.0002)
+
+    def test_increment(self):
+        stats.increment('pcs.timeouts')
+        stats.increment('pcs.timeouts', 2)
+        self.assertEqual(stats.snapshot()['counters'], {'pcs.timeouts': 3})
+
+    def test_observe(self):
+        stats.observe('pcs.write', 0.001)
+        stats.observe('pcs.write', 0.003)
+        histogram = stats.snapshot()['histograms']['pcs.write']
+        self.assertEqual(histogram['count'], 2)
+        self.assertEqual(histogram['min'], 0.001)
+        self.assertEqual(histogram['max'], 0.003)
+        self.assertAlmostEqual(histogram['mean'], 0.002)
+        self.assertEqual(histogram['buckets'][3], (0.001, 1))
+        self.assertEqual(histogram['buckets'][-1], (None, 0))
+
+    def test_reset(self):
+        stats.increment('pcs.timeouts')
+        stats.observe('pcs.write', 0.001)
+        stats.reset()
+        self.assertEqual(stats.snapshot()['counters'], {})
+        self.assertEqual(stats.snapshot()['histograms'], {})
+
+    def test_simulated(self):
+        simulator = Simulator()
+        simulator.install()
+        try:
+            self.assertEqual(PCS().send_once('\x00\x00\x00', fs20.command.ON), fs20.pcs.RESPONSE_OK)
+            self.assertRaises(fs20.pcs.DeviceDataframeUnknown, PCS()._write, '\x01\x01\xff')
+            receiver = Receiver(timeout=10)
+            receiver.add_callback(lambda response: receiver.stop())
+            receiver.run()
+            self.assertRaises(fs20.pce.DeviceInvalidResponse, PCE().get_response, 10)
+            snapshot = stats.snapshot()
+            self.assertEqual(snapshot['counters']['pcs.dataframe_errors'], 1)
+            self.assertEqual(snapshot['counters']['pce.timeouts'], 1)
+            self.assertEqual(snapshot['histograms']['pcs.write']['count'], 2)
+            self.assertEqual(snapshot['histograms']['pcs.response']['count'], 2)
+            self.assertEqual(snapshot['histograms']['pce.read']['count'], 2)
+            self.assertEqual(snapshot['histograms']['pce.decode']['count'], 1)
+            self.assertEqual(snapshot['histograms']['receiver.dispatch']['count'], 1)
+        finally:
+            simulator.uninstall()
+            environment.install()
+
+
+def get_suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestStats)
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(get_suite())
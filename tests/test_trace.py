@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+import unittest
+
+import environment
+import fs20
+from fs20 import trace
+from fs20.pce import PCE
+from fs20.pce import Receiver
+from fs20.pcs import PCS
+from fs20.simulator import Simulator
+
+
+class RecordingTracer(trace.Tracer):
+
+    def __init__(self):
+        self.calls = []
+
+    def after_decode(self, frame, response, seconds):
+        self.calls.append(('after_decode', frame, response))
+
+    def after_dispatch(self, response, seconds, callbacks):
+        self.calls.append(('after_dispatch', response, callbacks))
+
+    def after_write(self, address, command, time, response, seconds, error):
+        self.calls.append(('after_write', address, command, time, response, error))
+
+    def before_write(self, address, command, time):
+        self.calls.append(('before_write', address, command, time))
+
+
+class FailingTracer(trace.Tracer):
+
+    def before_write(self, address, command, time):
+        raise Exception('Tracer failed.')
+
+
+class TestTrace(unittest.TestCase):
+
+    def setUp(self):
+        self._simulator = Simulator()
+        self._simulator.install()
+        self._tracer = RecordingTracer()
+        trace.add_tracer(self._tracer)
+
+    def tearDown(self):
+        trace.remove_tracer(self._tracer)
+        self._simulator.uninstall()
+        environment.install()
+
+    def test_add_tracer(self):
+        trace.add_tracer(self._tracer)
+        self.assertEqual(trace.tracers, (self._tracer,))
+        trace.remove_tracer(self._tracer)
+        self.assertEqual(trace.tracers, ())
+
+    def test_get_fields(self):
+        self.assertEqual(trace.get_fields('\x01\x06\xf1\x1b\x1b\x00\x10\x00'), ('\x1b\x1b\x00', '\x10', '\x00'))
+        self.assertEqual(trace.get_fields('\x01\x07\xf2\x1b\x1b\x00\x34\x0c\x0a'), ('\x1b\x1b\x00', '\x34', '\x0c'))
+        self.assertEqual(trace.get_fields(fs20.pcs.DATAFRAME_STOP_MULTIPLE_SENDING), (None, None, None))
+
+    def test_receive(self):
+        callback = lambda response: receiver.stop()
+        receiver = Receiver(timeout=10)
+        receiver.add_callback(callback)
+        self._simulator.send('1234-1234-1111', fs20.command.ON)
+        receiver.run()
+        self.assertEqual(len(self._tracer.calls), 2)
+        self.assertEqual(self._tracer.calls[0][0], 'after_decode')
+        self.assertEqual(self._tracer.calls[0][1], array('B', [2, 11, 18, 52, 18, 52, 17, 17, 22, 0, 0, 0, 22]))
+        self.assertEqual(self._tracer.calls[1], ('after_dispatch', self._tracer.calls[0][2], (callback,)))
+
+    def test_write(self):
+        trace.add_tracer(FailingTracer())
+        try:
+            self.assertEqual(PCS().send_once('\x1b\x1b\x00', fs20.command.ON), fs20.pcs.RESPONSE_OK)
+        finally:
+            trace.remove_tracer(trace.tracers[-1])
+        self.assertRaises(fs20.pcs.DeviceDataframeUnknown, PCS()._write, '\x01\x01\xff')
+        self.assertEqual(self._tracer.calls[0], ('before_write', '\x1b\x1b\x00', fs20.command.ON, '\x00'))
+        self.assertEqual(self._tracer.calls[1], ('after_write', '\x1b\x1b\x00', fs20.command.ON, '\x00', fs20.pcs.RESPONSE_OK, None))
+        self.assertEqual(self._tracer.calls[2], ('before_write', None, None, None))
+        self.assertTrue(isinstance(self._tracer.calls[3][5], fs20.pcs.DeviceDataframeUnknown))
+
+
+def get_suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestTrace)
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(get_suite())
@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import time as _time
+import unittest
+
+import environment
+import fs20
+from fs20.device import DeviceGroup
+from fs20.device import DeviceRegistry
+from fs20.device import Dimmer
+from fs20.pcs import PCS
+from fs20.transmitter import AirtimeBudget
+from fs20.transmitter import Handle
+from fs20.transmitter import Transmitter
+
+
+class FakePCS(PCS):
+
+    def __init__(self):
+        PCS.__init__(self)
+        self.blocker = threading.Event()
+        self.sent = []
+        self.times = []
+
+    def send_multiple(self, address, command, time='\x00', interval=1):
+        self.blocker.wait()
+        self.sent.append((address, command, time, interval))
+        self.times.append(_time.time())
+        return fs20.pcs.RESPONSE_OK
+
+    def send_once(self, address, command, time='\x00'):
+        self.blocker.wait()
+        if '\xff\xff\xff' == address:
+            raise fs20.pcs.DeviceInvalidResponse('Invalid response from device.')
+        self.sent.append((address, command, time, 1))
+        self.times.append(_time.time())
+        return fs20.pcs.RESPONSE_OK
+
+    def stop_multiple_sending(self):
+        self.blocker.wait()
+        self.sent.append(None)
+        self.times.append(_time.time())
+        return fs20.pcs.RESPONSE_STOP_MULTIPLE_SENDING_OK
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAirtimeBudget(unittest.TestCase):
+
+    def setUp(self):
+        self._clock = FakeClock()
+        self._budget = AirtimeBudget(limit=1.0, window=10.0, clock=self._clock)
+
+    def test_consume(self):
+        self.assertEqual(self._budget.get_used(), 0.0)
+        self.assertEqual(self._budget.get_remaining(), 1.0)
+        self._budget.consume(0.25)
+        self._clock.now += 5
+        self._budget.consume(0.5)
+        self.assertEqual(self._budget.get_used(), 0.75)
+        self.assertEqual(self._budget.get_remaining(), 0.25)
+        # First airtime leaves the window.
+        self._clock.now += 5
+        self.assertEqual(self._budget.get_used(), 0.5)
+        self._clock.now += 5
+        self.assertEqual(self._budget.get_used(), 0.0)
+
+    def test_get_delay(self):
+        self.assertEqual(self._budget.get_delay(1.0), 0)
+        self._budget.consume(0.5)
+        self._clock.now += 2
+        self._budget.consume(0.25)
+        self.assertEqual(self._budget.get_delay(0.25), 0)
+        self.assertEqual(self._budget.get_delay(0.5), 8.0)
+        self.assertEqual(self._budget.get_delay(1.0), 10.0)
+
+
+class TestHandle(unittest.TestCase):
+
+    def test_result(self):
+        handle = Handle('\x00\x00\x00', fs20.command.ON)
+        self.assertFalse(handle.done())
+        self.assertRaises(fs20.transmitter.Timeout, handle.result, 0.01)
+        handle._resolve(response=fs20.pcs.RESPONSE_OK)
+        self.assertTrue(handle.done())
+        self.assertEqual(handle.result(), fs20.pcs.RESPONSE_OK)
+        handle._resolve(error=fs20.pcs.DeviceInvalidResponse())
+        self.assertRaises(fs20.pcs.DeviceInvalidResponse, handle.result)
+
+
+class TestTransmitterModule(unittest.TestCase):
+
+    def test_get_airtime(self):
+        self.assertAlmostEqual(fs20.transmitter.get_airtime('\x00\x00\x00', fs20.command.ON), 0.15)
+        self.assertAlmostEqual(fs20.transmitter.get_airtime('\x00\x00\x00', fs20.command.ON, interval=10), 1.5)
+        # Time is only sent for commands with additional byte.
+        self.assertAlmostEqual(fs20.transmitter.get_airtime('\x00\x00\x00', fs20.command.ON, '\xff'), 0.15)
+        self.assertAlmostEqual(fs20.transmitter.get_airtime('\xff\xff\xff', fs20.command.DIM_BRIGHTNESS_LEVEL_16_IN_TIME, '\xff'), 0.21)
+        self.assertAlmostEqual(fs20.transmitter.get_airtime('\xff\xff\xff', fs20.command.DIM_BRIGHTNESS_LEVEL_16_IN_TIME + '\xff'), 0.21)
+
+
+class TestTransmitter(unittest.TestCase):
+
+    def setUp(self):
+        self._pcs = FakePCS()
+        self._transmitter = Transmitter(self._pcs)
+        self._transmitter.repeat_delay = 0.001
+
+    def tearDown(self):
+        self._pcs.blocker.set()
+        self._transmitter.close()
+
+    def test_cancel(self):
+        self._transmitter.merge_window = 0
+        # The first command blocks the writer, all others are queued.
+        first = self._transmitter.send_once('\x00\x00\x01', fs20.command.DIM_UP)
+        queued = [self._transmitter.send_once('\x00\x00\x00', fs20.command.DIM_UP) for i in range(3)]
+        # Cancelling any merged handle drops the whole queued sequence.
+        self.assertTrue(self._transmitter.cancel(queued[1]))
+        for handle in queued:
+            self.assertTrue(handle.cancelled)
+            self.assertEqual(handle.result(), None)
+        handles = [self._transmitter.send_once('\x00\x00\x00', fs20.command.DIM_DOWN) for i in range(3)]
+        self._pcs.blocker.set()
+        self.assertEqual(first.result(5), fs20.pcs.RESPONSE_OK)
+        self.assertEqual(handles[2].result(5), fs20.pcs.RESPONSE_OK)
+        self.assertFalse(self._transmitter.cancel(first))
+        # The sequence is already sent multiple, so the multiple sending is stopped.
+        self.assertTrue(self._transmitter.cancel(handles[0]))
+        self.assertFalse(self._transmitter.cancel(handles[0]))
+        self._transmitter.close()
+        self.assertEqual(self._pcs.sent, [ ('\x00\x00\x01', fs20.command.DIM_UP, '\x00', 1)
+                                         , ('\x00\x00\x00', fs20.command.DIM_DOWN, '\x00', 3)
+                                         , None
+                                         ])
+
+    def test_close(self):
+        handle = self._transmitter.send_once('\x00\x00\x00', fs20.command.ON)
+        self._pcs.blocker.set()
+        self._transmitter.close()
+        self.assertTrue(handle.done())
+        self.assertRaises(fs20.transmitter.TransmitterClosed, self._transmitter.send_once, '\x00\x00\x00', fs20.command.ON)
+
+    def test_send_dataframe(self):
+        self._pcs.blocker.set()
+        # Devices, groups and registries send through the queue.
+        dimmer = Dimmer('1111-1111-1111', transmitter=self._transmitter)
+        self.assertEqual(dimmer.on(), 100)
+        self.assertEqual(dimmer.dim_down(interval=3), None)
+        group = DeviceGroup(self._transmitter)
+        group.add(dimmer, '1111-1111-4411')
+        self.assertEqual(group.execute([dimmer], 'off'), [fs20.pcs.RESPONSE_OK])
+        self.assertEqual(dimmer.status, 0)
+        registry = DeviceRegistry(self._transmitter)
+        self.assertEqual(registry.add('1111-1111-1112', Dimmer).on(), 100)
+        self.assertEqual(self._transmitter.send_dataframe(fs20.pcs.DATAFRAME_STOP_MULTIPLE_SENDING), fs20.pcs.RESPONSE_STOP_MULTIPLE_SENDING_OK)
+        self.assertRaises(fs20.pcs.DeviceDataframeUnknown, self._transmitter.send_dataframe, fs20.pcs.DATAFRAME_VERSION)
+        self.assertEqual(self._transmitter.send_batch([('\x00\x00\x01', fs20.command.ON), ('\xff\xff\xff', fs20.command.ON)])[0], fs20.pcs.RESPONSE_OK)
+        self.assertRaises(fs20.pcs.InvalidInput, self._transmitter.send_batch, [('\x00\x00\x01', fs20.command.ON), ('\x00', fs20.command.ON)])
+        self.assertEqual(self._pcs.sent, [ ('\x00\x00\x00', fs20.command.ON, '\x00', 1)
+                                         , ('\x00\x00\x00', fs20.command.DIM_DOWN, '\x00', 3)
+                                         , ('\x00\x00\x00', fs20.command.OFF, '\x00', 1)
+                                         , ('\x00\x00\x01', fs20.command.ON, '\x00', 1)
+                                         , None
+                                         , ('\x00\x00\x01', fs20.command.ON, '\x00', 1)
+                                         ])
+
+    def test_send_dataframe_merge(self):
+        self._transmitter.merge_window = 0.05
+        self._pcs.blocker.set()
+        dimmer = Dimmer('1111-1111-1111', transmitter=self._transmitter)
+        self.assertEqual(dimmer.on(), 100)
+        # Relative commands are queued without waiting, so a loop is merged into one frame.
+        for i in range(10):
+            self.assertEqual(dimmer.dim_down(), None)
+        self.assertTrue(self._transmitter.flush(5))
+        self.assertEqual(self._transmitter.merged, 9)
+        self.assertEqual(self._pcs.sent, [ ('\x00\x00\x00', fs20.command.ON, '\x00', 1)
+                                         , ('\x00\x00\x00', fs20.command.DIM_DOWN, '\x00', 10)
+                                         ])
+        # Errors of commands nobody waits for are counted.
+        Dimmer('4444-4444-4444', transmitter=self._transmitter).dim_up()
+        self.assertTrue(self._transmitter.flush(5))
+        self.assertEqual(self._transmitter.failed, 1)
+
+    def test_send_once(self):
+        # The first command blocks the writer, all others are queued.
+        first = self._transmitter.send_once('\x00\x00\x01', fs20.command.DIM_UP)
+        handles = [ self._transmitter.send_once('\x00\x00\x00', fs20.command.ON)
+                  , self._transmitter.send_once('\x00\x00\x00', fs20.command.DIM_UP)
+                  , self._transmitter.send_once('\x00\x00\xff', fs20.command.ON)
+                  , self._transmitter.send_once('\x00\x00\x00', fs20.command.OFF)
+                  , self._transmitter.send_multiple('\x00\x00\x00', fs20.command.ON, interval=5)
+                  , self._transmitter.stop_multiple_sending()
+                  , self._transmitter.send_once('\xff\xff\xff', fs20.command.ON)
+                  ]
+        # ON for 0x000000 is superseded by OFF, other commands are kept.
+        self.assertTrue(handles[0].done())
+        self.assertTrue(handles[0].superseded)
+        self.assertEqual(handles[0].result(), None)
+        self.assertEqual(self._transmitter.superseded, 1)
+        self._pcs.blocker.set()
+        self.assertEqual(first.result(), fs20.pcs.RESPONSE_OK)
+        for handle in handles[1:-2]:
+            self.assertEqual(handle.result(), fs20.pcs.RESPONSE_OK)
+        self.assertEqual(handles[-2].result(), fs20.pcs.RESPONSE_STOP_MULTIPLE_SENDING_OK)
+        self.assertRaises(fs20.pcs.DeviceInvalidResponse, handles[-1].result)
+        self.assertEqual(self._pcs.sent, [ ('\x00\x00\x01', fs20.command.DIM_UP, '\x00', 1)
+                                         , ('\x00\x00\x00', fs20.command.DIM_UP, '\x00', 1)
+                                         , ('\x00\x00\xff', fs20.command.ON, '\x00', 1)
+                                         , ('\x00\x00\x00', fs20.command.OFF, '\x00', 1)
+                                         , ('\x00\x00\x00', fs20.command.ON, '\x00', 5)
+                                         , None
+                                         ])
+        self.assertEqual(self._transmitter.get_queue_depth(), 0)
+
+    def test_send_once_merge(self):
+        self._transmitter.merge_window = 0.5
+        self._pcs.blocker.set()
+        handles = [self._transmitter.send_once('\x00\x00\x00', fs20.command.DIM_DOWN) for i in range(300)]
+        # State commands and other addresses are never merged.
+        handles += [ self._transmitter.send_once('\x00\x00\x00', fs20.command.ON)
+                   , self._transmitter.send_once('\x00\x00\x01', fs20.command.DIM_DOWN)
+                   , self._transmitter.send_once('\x00\x00\x00', fs20.command.DIM_DOWN)
+                   ]
+        for handle in handles:
+            self.assertEqual(handle.result(5), fs20.pcs.RESPONSE_OK)
+        self.assertEqual(self._transmitter.merged, 298)
+        self.assertEqual(self._pcs.sent, [ ('\x00\x00\x00', fs20.command.DIM_DOWN, '\x00', 255)
+                                         , ('\x00\x00\x00', fs20.command.DIM_DOWN, '\x00', 45)
+                                         , ('\x00\x00\x00', fs20.command.ON, '\x00', 1)
+                                         , ('\x00\x00\x01', fs20.command.DIM_DOWN, '\x00', 1)
+                                         , ('\x00\x00\x00', fs20.command.DIM_DOWN, '\x00', 1)
+                                         ])
+
+    def test_send_once_merge_repeats(self):
+        self._transmitter.merge_window = 0.05
+        self._transmitter.repeat_delay = 0.01
+        self._pcs.blocker.set()
+        handles = [self._transmitter.send_once('\x00\x00\x00', fs20.command.DIM_DOWN) for i in range(20)]
+        handles.append(self._transmitter.send_once('\x00\x00\x01', fs20.command.ON))
+        for handle in handles:
+            self.assertEqual(handle.result(5), fs20.pcs.RESPONSE_OK)
+        self.assertEqual(self._pcs.sent, [ ('\x00\x00\x00', fs20.command.DIM_DOWN, '\x00', 20)
+                                         , ('\x00\x00\x01', fs20.command.ON, '\x00', 1)
+                                         ])
+        # The next command would end the multiple sending, so it waits for all repeats.
+        self.assertTrue(self._pcs.times[1] - self._pcs.times[0] >= 20 * 0.01)
+
+    def test_send_once_budget(self):
+        airtime = fs20.transmitter.get_airtime('\x00\x00\x00', fs20.command.DIM_UP)
+        self._transmitter.budget = AirtimeBudget(limit=airtime * 2.5, window=0.3)
+        self.assertRaises(fs20.transmitter.AirtimeExceeded, self._transmitter.send_multiple, '\x00\x00\x00', fs20.command.DIM_UP, interval=3)
+        # The first command blocks the writer, all others are queued.
+        first = self._transmitter.send_once('\x00\x00\x01', fs20.command.DIM_UP)
+        handles = [ self._transmitter.send_multiple('\x00\x00\x00', fs20.command.DIM_UP, interval=2)
+                  , self._transmitter.send_once('\x00\x00\x00', fs20.command.DIM_UP)
+                  , self._transmitter.send_once('\x00\x00\x02', fs20.command.DIM_UP)
+                  ]
+        self._pcs.blocker.set()
+        for handle in [first] + handles:
+            self.assertEqual(handle.result(5), fs20.pcs.RESPONSE_OK)
+        # Smaller command for another address overtakes, same address keeps order.
+        self.assertEqual(self._pcs.sent, [ ('\x00\x00\x01', fs20.command.DIM_UP, '\x00', 1)
+                                         , ('\x00\x00\x02', fs20.command.DIM_UP, '\x00', 1)
+                                         , ('\x00\x00\x00', fs20.command.DIM_UP, '\x00', 2)
+                                         , ('\x00\x00\x00', fs20.command.DIM_UP, '\x00', 1)
+                                         ])
+
+
+def get_suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestAirtimeBudget))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestHandle))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestTransmitter))
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestTransmitterModule))
+    return suite
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run(get_suite())
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from datetime import datetime
+from datetime import timedelta
 import unittest
 
 import environment
@@ -30,6 +31,22 @@ class TestUtil(unittest.TestCase):
         self.assertRaises(util.InvalidInput, util.address_to_byte, '111-111-44411')
         self.assertRaises(util.InvalidInput, util.address_to_byte, '1111-1111-4445')
 
+    def test_addresses_to_bytes(self):
+        self.assertEqual(util.addresses_to_bytes(['1111-1111-1111', '1234-1234-4444']), '\x00\x00\x00\x1b\x1b\xff')
+        self.assertEqual(util.addresses_to_bytes([]), '')
+        self.assertRaises(util.InvalidInput, util.addresses_to_bytes, ['1111-1111-1111', '1111-1111-4445'])
+        self.assertRaises(util.InvalidInput, util.addresses_to_bytes, ['1111-1111'])
+        self.assertRaises(util.InvalidInput, util.addresses_to_bytes, [1234])
+        # Large sequences (converted with NumPy if installed).
+        addresses = [util.byte_to_address(chr(i) * 3) for i in range(256)]
+        value = ''.join([chr(i) * 3 for i in range(256)])
+        self.assertEqual(util.addresses_to_bytes(addresses), value)
+        self.assertRaises(util.InvalidInput, util.addresses_to_bytes, addresses + ['1111-1111-4445'])
+        self.assertRaises(util.InvalidInput, util.addresses_to_bytes, addresses + ['1111-11111-111'])
+        self.assertRaises(util.InvalidInput, util.addresses_to_bytes, addresses + ['1111-1111-11111'])
+        # Lengths which cancel each other out.
+        self.assertRaises(util.InvalidInput, util.addresses_to_bytes, addresses + ['1111-1111-', '11111111-1111-1111'])
+
     def test_byte_to_address(self):
         self.assertEqual(util.byte_to_address('\x00\x00\xff'), '1111-1111-4444')
         self.assertEqual(util.byte_to_address('\x00\x00\xf0'), '1111-1111-4411')
@@ -46,6 +63,23 @@ class TestUtil(unittest.TestCase):
         self.assertEqual(util.byte_to_address_part('\xf0'), '4411')
         self.assertEqual(util.byte_to_address_part('\xff'), '4444')
 
+    def test_bytes_to_addresses(self):
+        self.assertEqual(util.bytes_to_addresses('\x00\x00\x00\x1b\x1b\xff'), ['1111-1111-1111', '1234-1234-4444'])
+        self.assertEqual(util.bytes_to_addresses(bytearray('\x1b\x1b\xff')), ['1234-1234-4444'])
+        self.assertEqual(util.bytes_to_addresses(''), [])
+        self.assertRaises(util.InvalidInput, util.bytes_to_addresses, '\x00\x00')
+        # Large buffers (converted with NumPy if installed).
+        addresses = [util.byte_to_address(chr(i) * 3) for i in range(256)]
+        value = ''.join([chr(i) * 3 for i in range(256)])
+        self.assertEqual(util.bytes_to_addresses(value), addresses)
+
+    def test_byte_to_seconds(self):
+        self.assertEqual(util.byte_to_seconds('\x00'), 0.0)
+        self.assertEqual(util.byte_to_seconds('\x01'), 0.25)
+        self.assertEqual(util.byte_to_seconds('\x1b'), 5.5)
+        self.assertEqual(util.byte_to_seconds('\x5e'), 112.0)
+        self.assertEqual(util.byte_to_seconds('\xcf'), 15360.0)
+
     def test_byte_to_time_string(self):
         self.assertEqual(util.byte_to_time_string('\x01'), '00:00:0.250')
         self.assertEqual(util.byte_to_time_string('\x0f'), '00:00:3.750')
@@ -64,6 +98,25 @@ class TestUtil(unittest.TestCase):
         self.assertEqual(util.datetime_to_seconds(datetime.strptime('00:05:20.450', '%H:%M:%S.%f')), 320.5)
         self.assertEqual(util.datetime_to_seconds(datetime.strptime('01:20:12.350', '%H:%M:%S.%f')), 4812.25)
 
+    def test_is_function_group_address(self):
+        self.assertTrue(util.is_function_group_address(util.address_to_byte('1234-1234-4411')))
+        self.assertTrue(util.is_function_group_address(util.address_to_byte('1234-1234-4443')))
+        self.assertFalse(util.is_function_group_address(util.address_to_byte('1234-1234-4444')))
+        self.assertFalse(util.is_function_group_address(util.address_to_byte('1234-1234-1144')))
+        self.assertFalse(util.is_function_group_address(util.address_to_byte('1234-1234-3411')))
+
+    def test_is_global_master_address(self):
+        self.assertTrue(util.is_global_master_address(util.address_to_byte('1234-1234-4444')))
+        self.assertFalse(util.is_global_master_address(util.address_to_byte('1234-1234-4443')))
+        self.assertFalse(util.is_global_master_address(util.address_to_byte('1234-1234-3444')))
+
+    def test_is_local_master_address(self):
+        self.assertTrue(util.is_local_master_address(util.address_to_byte('1234-1234-1144')))
+        self.assertTrue(util.is_local_master_address(util.address_to_byte('1234-1234-4344')))
+        self.assertFalse(util.is_local_master_address(util.address_to_byte('1234-1234-4444')))
+        self.assertFalse(util.is_local_master_address(util.address_to_byte('1234-1234-4411')))
+        self.assertFalse(util.is_local_master_address(util.address_to_byte('1234-1234-1143')))
+
     def test_is_valid_address_part(self):
         self.assertTrue(util.is_valid_address_part('1111'))
         self.assertTrue(util.is_valid_address_part(1111))
@@ -90,6 +143,30 @@ class TestUtil(unittest.TestCase):
         self.assertEqual(util.time_string_to_byte('00:42:40.000'), '\xaa')
         self.assertEqual(util.time_string_to_byte('04:16:0.000'), '\xcf')
         self.assertRaises(util.InvalidInput, util.time_string_to_byte, '04:16:5.000')
+        self.assertEqual(util.time_string_to_byte('0:1:4.0'), '\x58')
+        self.assertEqual(util.time_string_to_byte('00:00:5.750'), '\x1b')
+        self.assertEqual(util.time_string_to_byte('00:01:1.130'), '\x4f')
+        self.assertRaises(ValueError, util.time_string_to_byte, 'foobar')
+        self.assertRaises(ValueError, util.time_string_to_byte, '00:00:60.0')
+        self.assertRaises(ValueError, util.time_string_to_byte, '00:00:61.0')
+
+    def test_time_to_byte(self):
+        self.assertEqual(util.time_to_byte(0), '\x00')
+        self.assertEqual(util.time_to_byte(0.1), '\x01')
+        self.assertEqual(util.time_to_byte(10), '\x2a')
+        self.assertEqual(util.time_to_byte(10.2), '\x2a')
+        self.assertEqual(util.time_to_byte(64), '\x58')
+        self.assertEqual(util.time_to_byte(15360), '\xcf')
+        self.assertEqual(util.time_to_byte(timedelta(minutes=1, seconds=52)), '\x5e')
+        self.assertEqual(util.time_to_byte('00:19:12.000'), '\x99')
+        self.assertRaises(util.InvalidInput, util.time_to_byte, -1)
+        self.assertRaises(util.InvalidInput, util.time_to_byte, 15365)
+        self.assertRaises(util.InvalidInput, util.time_to_byte, timedelta(hours=5))
+        # Each supported duration is encoded to a byte of the same duration.
+        for i in range(256):
+            seconds = util.byte_to_seconds(chr(i))
+            if seconds <= 15360.0:
+                self.assertEqual(util.byte_to_seconds(util.time_to_byte(seconds)), seconds)
 
 
 def get_suite():